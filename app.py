@@ -1,29 +1,45 @@
 import os
 import time
+import atexit
 import uuid
+import json
 import base64
+import hmac
 import threading
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_from_directory
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template, request, jsonify, send_from_directory, Response
+from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 from werkzeug.utils import secure_filename
 import cv2
 import numpy as np
 from dotenv import load_dotenv
 
 from utils.helpers import load_config
-from utils.database import Database
+from utils.database import Database, DEFAULT_DB_PATH, SEARCH_RANK_WINDOW, EVENT_LOG_COLUMNS, SESSION_COLUMNS, ROLLUP_DIMENSIONS
+from utils.log_writer import EventLogWriter
+from utils.log_stream import LogStream
+from utils.export import EXPORT_FORMATS, export_rows
+from utils.retention import RetentionManager
+from utils.metrics import registry as metrics, stage_seconds, alerts_total, errors_total, ingest_frames_total
+from utils.profiler import ProfilingSession, timed_stage
 from utils.logger import Logger
-from utils.helpers import ensure_directory
+from utils.subsystems import SubsystemLoader
+from utils.eventloop import HubBridge, LoopLagMonitor, configure_blocking_pool, in_green_thread, run_blocking
+from utils.helpers import ensure_directory, encode_cursor, decode_cursor, split_query_list, inclusive_until
 
-from core.camera import Camera
+from core.alerts import PRIORITY_RANK
+from core.camera import Camera, RemoteCamera
 from core.detector import ObjectDetector
 from core.face_rec import FaceRecognizer
 from core.ocr import OCRReader
-from core.scene_ai import SceneAI
+from core.scene_ai import SceneAI, SceneAIError
 from core.voice import VoiceSystem
-from core.alerts import AlertManager
 from core.wake_word import WakeWordDetector
+from core.audio import AudioCaptureService
+from core.commands import parse_command
+from core.workers import InferenceWorkers, OffloadedDetector
+from core.scheduler import infer_batch
+from core.sessions import SessionManager
 
 load_dotenv()
 
@@ -32,133 +48,309 @@ app.config['SECRET_KEY'] = os.urandom(24)
 app.config['UPLOAD_FOLDER'] = 'static/uploads/faces'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
-
 config = load_config()
-db = Database()
+# Opening the database applies any pending migrations, which must finish before the
+# face workers open it too.
+db = Database(DEFAULT_DB_PATH)
+
+# CPU-heavy stages can run in worker processes fed through shared-memory frame slots.
+# They are forked here, while this is still the only thread: a child forked later could
+# inherit a lock (stdout, imports, SQLite) held by the log writer or retention threads.
+workers_config = config.get('workers', {})
+inference_workers = InferenceWorkers(config, DEFAULT_DB_PATH) if workers_config.get('enabled', False) else None
+offload_detection = inference_workers is not None and inference_workers.offloads('detect')
+if inference_workers:
+    # Children must not inherit an open SQLite connection; the parent reconnects on next use.
+    db.close()
+    inference_workers.start()
+    atexit.register(inference_workers.close)
+
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet',
+                    max_http_buffer_size=config.get('ingest', {}).get('max_frame_bytes', 1024 * 1024))
+# Blocking native calls made from green threads (request handlers, Socket.IO events) run on
+# this OS thread pool; emits from native threads are replayed on the hub.
+configure_blocking_pool(config.get('execution', {}).get('blocking_threads', 8))
+hub_bridge = HubBridge(config.get('execution', {}).get('bridge_poll_ms', 10) / 1000.0)
+loop_monitor = LoopLagMonitor(config)
+log_writer = EventLogWriter(db, config)
+atexit.register(log_writer.stop)
+log_stream = LogStream(db, config)
+log_writer.add_listener(log_stream.publish)
+profiling_session = ProfilingSession(config)
+retention_manager = RetentionManager(db, config)
+retention_manager.start()
+atexit.register(retention_manager.stop)
 logger = Logger()
 
-camera = Camera(config)
-detector = ObjectDetector(config)
-face_recognizer = FaceRecognizer(config, db)
 ocr_reader = OCRReader(config)
-scene_ai = SceneAI(config)
-voice_system = VoiceSystem(config)
-alert_manager = AlertManager(config)
-wake_word_detector = WakeWordDetector(config)
+audio_capture = AudioCaptureService(config)
+
+# Model-backed subsystems load in background workers so the web server is reachable
+# immediately; until one is ready the features that need it degrade gracefully.
+subsystems = SubsystemLoader(config.get('startup', {}).get('loader_workers', 4))
+
+
+def load_detector():
+    workers = subsystems.get('workers')
+    if workers and workers.has_stage('detect'):
+        return OffloadedDetector(workers)
+    object_detector = ObjectDetector(config)
+    if object_detector.model is None:
+        raise RuntimeError("YOLO model could not be loaded")
+    return object_detector
+
+
+def load_face_recognizer():
+    recognizer = FaceRecognizer(config, db)
+    # With offloading the model lives in the workers; this instance keeps names and cooldowns.
+    if not (inference_workers and inference_workers.offloads('faces')):
+        recognizer.warm_up()
+    return recognizer
+
+
+def load_wake_word_detector():
+    wake_word_detector = WakeWordDetector(config, audio_capture)
+    if not wake_word_detector.get_model():
+        raise RuntimeError("Vosk model could not be loaded")
+    return wake_word_detector
+
+
+def load_voice_commands():
+    subsystems.get('voice').set_command_model(subsystems.get('wake_word').get_model)
+    return True
+
+
+if inference_workers:
+    subsystems.register('workers', inference_workers.wait_ready)
+subsystems.register('detector', load_detector, depends_on=['workers'] if offload_detection else (), required=True)
+subsystems.register('faces', load_face_recognizer)
+subsystems.register('scene_ai', lambda: SceneAI(config))
+subsystems.register('voice', lambda: VoiceSystem(config, audio_capture))
+subsystems.register('wake_word', load_wake_word_detector)
+subsystems.register('voice_commands', load_voice_commands, depends_on=['voice', 'wake_word'])
+
+
+def on_subsystem_ready(name, instance):
+    if name == 'voice':
+        instance.scheduler.add_lag_listener(lambda lag, priority: stage_seconds.observe(lag, stage='tts_queue'))
+    if name in ('voice', 'faces'):
+        sync_known_names(prepare=True)
+    if name == 'wake_word' and session_manager.local_session() and not wake_word_state['active']:
+        instance.start_listening(on_wake_word)
+        wake_word_state['active'] = True
+    logger.info(f"Subsystem ready: {name}")
+    timed_emit('subsystem_ready', {'name': name})
+
+
+subsystems.add_listener(on_subsystem_ready)
+
+
+def speak(text, **kwargs):
+    voice_system = subsystems.get('voice')
+    if voice_system:
+        voice_system.speak(text, **kwargs)
+
+
+def sync_known_names(prepare=False):
+    voice_system = subsystems.get('voice')
+    if voice_system and subsystems.is_ready('faces'):
+        names = face_recognizer_names()
+        voice_system.set_known_names(names)
+        if prepare:
+            voice_system.prepare_phrases(names)
+
+
+def voice_metric(read):
+    def sample():
+        voice_system = subsystems.get('voice')
+        return read(voice_system) if voice_system else None
+    return sample
+
+
+metrics.gauge('speech_queue_depth', "Utterances waiting to be spoken",
+              voice_metric(lambda voice: voice.scheduler.queue_depth()))
+metrics.gauge('phrase_cache', "Pre-rendered phrase cache counters",
+              voice_metric(lambda voice: voice.phrase_cache.get_stats() if voice.phrase_cache else {}), ['stat'])
+metrics.gauge('scene_ai', "Scene AI client counters",
+              lambda: subsystems.get('scene_ai').get_stats() if subsystems.get('scene_ai') else {}, ['stat'])
+metrics.gauge('log_writer', "Event log writer counters", log_writer.get_stats, ['stat'])
+metrics.gauge('log_stream', "Live log tail counters", log_stream.get_stats, ['stat'])
+metrics.gauge('worker_tasks_in_flight', "Frames queued or running in worker processes",
+              lambda: subsystems.get('workers').in_flight() if subsystems.get('workers') else {}, ['stage'])
+metrics.gauge('event_loop', "Event loop stall counters", loop_monitor.get_stats, ['stat'])
+metrics.gauge('session_active', "Sessions running", lambda: len(session_manager.list()))
 
 ensure_directory(app.config['UPLOAD_FOLDER'])
 
-session_state = {
-    'active': False,
-    'session_id': None,
-    'start_time': None,
-    'frame_count': 0,
-    'last_frame_time': time.time(),
-    'processing_thread': None,
-    'alert_count': 0,
-    'wake_word_active': False,
-    'voice_listening': False
-}
-
-
-def process_frame():
-    frame_skip = config['detection'].get('frame_skip', 2)
-    inactivity_threshold = config['alerts'].get('auto_pause_inactivity_minutes', 15) * 60
-    last_activity = time.time()
-    
-    while session_state['active']:
-        frame = camera.get_raw_frame()
-        if frame is None:
-            time.sleep(0.1)
-            continue
-        
-        current_time = time.time()
-        session_state['frame_count'] += 1
+# The server's microphone belongs to whichever session is local.
+wake_word_state = {'active': False}
+
+
+def build_local_cameras():
+    # Each configured camera has its own capture thread and ring buffer; the first one is
+    # the session's primary camera for voice commands, traffic lights and the preview.
+    cameras = {}
+    for index, camera_entry in enumerate(config.get('cameras') or [{'name': 'main'}]):
+        camera_name = camera_entry.get('name', f"camera{index}")
+        cameras[camera_name] = Camera(config, camera_entry, camera_name)
+    return cameras
+
+
+def infer_frames(frames):
+    return infer_batch(frames, subsystems.get('detector'), subsystems.get('faces'), subsystems.get('workers'))
+
+
+def handle_frame_result(session, camera_name, sequence, timestamp, frame, result):
+    detections, face_matches = result
+    current_time = time.time()
+    session.frame_count += 1
+    source = f" ({camera_name} camera)" if len(session.cameras) > 1 else ""
+    
+    detections = [dict(detection, camera=camera_name) for detection in detections]
+    face_recognitions = []
+    face_recognizer = subsystems.get('faces')
+    if face_matches is not None and face_recognizer:
+        face_matches = [dict(match, camera=camera_name) for match in face_matches]
+        face_recognitions = face_recognizer.apply_cooldowns(face_matches, current_time, session.face_cooldowns)
+    
+    # Everyone matched is published, not only those past their announcement cooldown.
+    sections = {'objects': detections}
+    if face_matches is not None:
+        sections['people'] = face_matches
+    session.world_state.publish(current_time, sequence, camera=camera_name, **sections)
+    if camera_name == session.primary_camera.name:
+        with timed_stage('traffic_light'):
+            session.traffic_light_classifier.update(frame, detections, current_time)
+    
+    alert_manager = session.alert_manager
+    alert_aggregator = session.alert_aggregator
+    # One cooldown decision per class and direction, but every object in the group is
+    # added so the summary can count them ("two cars on your left").
+    groups = {}
+    for detection in detections:
+        if detection['class'] != 'traffic light':
+            groups.setdefault((detection['class'], detection['direction']), []).append(detection)
+    
+    for (object_class, direction), members in groups.items():
+        # The group's most urgent member decides the cooldown, so a far object seen
+        # first cannot mute a close one on the same side.
+        priority = min((member.get('priority', 'informational') for member in members),
+                       key=lambda p: PRIORITY_RANK.get(p, len(PRIORITY_RANK)))
+        alert_type = f"object_{object_class}"
+        identifier = f"{camera_name}_{object_class}_{direction}"
         
-        if session_state['frame_count'] % frame_skip != 0:
+        if not alert_manager.should_alert(alert_type, priority, identifier):
             continue
         
-        try:
-            detections = detector.detect(frame)
-            face_recognitions = face_recognizer.recognize(frame, current_time)
-            
-            for detection in detections:
-                priority = detection.get('priority', 'informational')
-                alert_type = f"object_{detection['class']}"
-                identifier = f"{detection['class']}_{detection['direction']}"
-                
-                if alert_manager.should_alert(alert_type, priority, identifier):
-                    distance_cat, distance_feet = calculate_distance_estimate(
-                        detection['size'][1], frame.shape[0]
-                    )
-                    
-                    if priority == 'critical':
-                        message = f"{detection['class'].upper()} detected {distance_cat} distance from your {detection['direction']}!"
-                    elif priority == 'important':
-                        message = f"{detection['class']} detected {distance_cat} distance from your {detection['direction']}"
-                    else:
-                        message = f"{detection['class']} in view"
-                    
-                    formatted_msg = alert_manager.format_alert_message(priority, message)
-                    
-                    voice_system.speak(formatted_msg, interrupt=(priority == 'critical'))
-                    alert_manager.add_to_history(priority, message, detection)
-                    
-                    db.add_event_log(
-                        session_state['session_id'],
-                        'object_detection',
-                        priority,
-                        message,
-                        detection
-                    )
-                    
-                    socketio.emit('alert', {
-                        'priority': priority,
-                        'message': message,
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    
-                    session_state['alert_count'] += 1
-                    last_activity = current_time
-            
-            for recognition in face_recognitions:
-                alert_type = f"face_{recognition['name']}"
-                
-                if alert_manager.should_alert(alert_type, 'important', str(recognition['face_id'])):
-                    message = f"{recognition['name']} is {recognition['distance_feet']:.0f} feet in front of you"
-                    formatted_msg = alert_manager.format_alert_message('important', message)
-                    
-                    voice_system.speak(formatted_msg)
-                    alert_manager.add_to_history('important', message, recognition)
-                    
-                    db.add_event_log(
-                        session_state['session_id'],
-                        'face_recognition',
-                        'important',
-                        message,
-                        recognition
-                    )
-                    
-                    socketio.emit('alert', {
-                        'priority': 'important',
-                        'message': message,
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    
-                    session_state['alert_count'] += 1
-                    last_activity = current_time
+        for instance, detection in enumerate(members):
+            distance_cat, distance_feet = calculate_distance_estimate(
+                detection['size'][1], frame.shape[0]
+            )
+            member_priority = detection.get('priority', 'informational')
             
-            if current_time - last_activity > inactivity_threshold:
-                session_state['active'] = False
-                socketio.emit('session_paused', {'reason': 'inactivity'})
-                break
+            if member_priority == 'critical':
+                message = f"{object_class.upper()} detected {distance_cat} distance from your {direction}{source}!"
+            elif member_priority == 'important':
+                message = f"{object_class} detected {distance_cat} distance from your {direction}{source}"
+            else:
+                message = f"{object_class} in view{source}"
             
-            time.sleep(1.0 / config['detection'].get('target_fps', 15))
+            alert_aggregator.add('object_detection', member_priority, message, detection,
+                                 object_class, direction, distance_cat,
+                                 f"{alert_type}_{identifier}", instance)
+    
+    for recognition in face_recognitions:
+        alert_type = f"face_{recognition['name']}"
         
-        except Exception as e:
-            logger.error(f"Frame processing error: {e}")
-            time.sleep(0.1)
+        if alert_manager.should_alert(alert_type, 'important', str(recognition['face_id'])):
+            message = f"{recognition['name']} is {recognition['distance_feet']:.0f} feet in front of you{source}"
+            
+            alert_aggregator.add('face_recognition', 'important', message, recognition,
+                                 recognition['name'], recognition['direction'],
+                                 identifier=alert_type)
+    
+    if alert_aggregator.ready():
+        dispatch_alerts(session, alert_aggregator.flush())
+        session.last_activity = current_time
+
+
+def on_session_idle(session):
+    if end_session(session):
+        timed_emit('session_paused', {'session_id': session.session_id, 'reason': 'inactivity'}, to=session.room)
+
+
+# Every session's frames go through one scheduler, so they share the loaded models.
+session_manager = SessionManager(config, infer_frames, handle_frame_result)
+session_manager.on_idle = on_session_idle
+
+
+def timed_emit(event, data=None, **kwargs):
+    if not in_green_thread():
+        hub_bridge.call(timed_emit, event, data, **kwargs)
+        return
+    with timed_stage('socketio_emit'):
+        socketio.emit(event, data, **kwargs)
+
+
+def session_speak(session, text, priority=None, key=None):
+    # Local sessions use the server's speakers; remote devices speak what arrives in their room.
+    if session.local:
+        speak(text, priority=priority, key=key)
+    else:
+        # Cached phrases go out as WAV in a binary frame; the rest the client synthesises.
+        voice_system = subsystems.get('voice')
+        audio = voice_system.render_audio(text) if voice_system else None
+        timed_emit('speak', {'session_id': session.session_id, 'text': text, 'priority': priority,
+                             'audio': audio}, to=session.room)
+
+
+def dispatch_alerts(session, summary, announce=True):
+    priority = summary['priority']
+    formatted_msg = session.alert_manager.format_alert_message(priority, summary['message'])
+    if announce:
+        session_speak(session, formatted_msg, priority=priority, key=f"alert_summary_{priority}")
+    
+    for item in summary['items']:
+        session.alert_manager.add_to_history(item['priority'], item['message'], item['metadata'])
+        alerts_total.inc(priority=item['priority'])
+    
+    log_writer.log_many(
+        session.session_id,
+        [(item['event_type'], item['priority'], item['message'], item['metadata']) for item in summary['items']]
+    )
+    
+    timed_emit('alert', {
+        'session_id': session.session_id,
+        'priority': priority,
+        'message': summary['message'],
+        'timestamp': datetime.now().isoformat(),
+        'items': [{'priority': item['priority'], 'message': item['message'],
+                   'camera': (item['metadata'] or {}).get('camera')} for item in summary['items']]
+    }, to=session.room)
+    
+    session.alert_count += len(summary['items'])
+    log_writer.update_session(session.session_id, session.alert_count)
+
+
+def get_traffic_light_state(session, frame):
+    traffic_light_classifier = session.traffic_light_classifier
+    light_color, confidence = traffic_light_classifier.current_state()
+    
+    detector = subsystems.get('detector')
+    if not traffic_light_classifier.is_confident(confidence) and detector:
+        detections = detector.detect(frame)
+        if detections is not None:
+            light_color, confidence = traffic_light_classifier.update(frame, detections)
+    
+    if traffic_light_classifier.is_confident(confidence):
+        return light_color
+    
+    scene_ai = subsystems.get('scene_ai')
+    if scene_ai and config.get('traffic_light', {}).get('cloud_fallback', True):
+        with timed_stage('scene_ai'):
+            return scene_ai.detect_traffic_light(frame)
+    
+    return None
 
 
 def calculate_distance_estimate(bbox_height, frame_height):
@@ -215,13 +407,22 @@ def add_face():
     if not name or file.filename == '':
         return jsonify({'error': 'Name and photo required'}), 400
     
+    face_recognizer = subsystems.get('faces')
+    if not face_recognizer:
+        return jsonify({'error': 'Face recognition is still loading'}), 503
+    
     filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     file.save(filepath)
     
-    face_id = face_recognizer.add_face(filepath, name, relationship)
+    face_id = run_blocking(face_recognizer.add_face, filepath, name, relationship)
     
     if face_id:
+        reload_face_workers()
+        sync_known_names()
+        voice_system = subsystems.get('voice')
+        if voice_system:
+            voice_system.prepare_phrases([name])
         return jsonify({'success': True, 'face_id': face_id})
     else:
         return jsonify({'error': 'Could not detect face in image'}), 400
@@ -229,150 +430,631 @@ def add_face():
 
 @app.route('/api/faces/<int:face_id>', methods=['DELETE'])
 def delete_face(face_id):
+    face_recognizer = subsystems.get('faces')
+    if not face_recognizer:
+        return jsonify({'error': 'Face recognition is still loading'}), 503
     if face_recognizer.delete_face(face_id):
+        reload_face_workers()
+        sync_known_names()
         return jsonify({'success': True})
     return jsonify({'error': 'Face not found'}), 404
 
 
+MAX_PAGE_SIZE = 500
+
+
+def page_response(items, next_cursor):
+    # /api/v2 returns the {items, next_cursor} envelope. The original routes keep
+    # returning a bare list for existing clients and carry the cursor in a header.
+    if request.path.startswith('/api/v2/'):
+        return jsonify({'items': items, 'next_cursor': next_cursor})
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
 @app.route('/api/sessions', methods=['GET'])
+@app.route('/api/v2/sessions', methods=['GET'])
 def get_sessions():
-    sessions = db.get_all_sessions()
-    return jsonify(sessions)
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), MAX_PAGE_SIZE))
+        cursor = decode_cursor(request.args.get('cursor'))
+        if cursor is not None and len(cursor) != 2:
+            raise ValueError("Invalid cursor")
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
+    
+    sessions = db.query_sessions(
+        before=tuple(cursor) if cursor else None,
+        limit=limit,
+        fields=split_query_list(request.args.get('fields'))
+    )
+    
+    next_cursor = None
+    if len(sessions) == limit:
+        next_cursor = encode_cursor([sessions[-1]['start_time'], sessions[-1]['session_id']])
+    
+    return page_response(sessions, next_cursor)
 
 
 @app.route('/api/logs', methods=['GET'])
+@app.route('/api/v2/logs', methods=['GET'])
 def get_logs():
-    session_id = request.args.get('session_id')
-    limit = int(request.args.get('limit', 100))
+    try:
+        limit = max(1, min(int(request.args.get('limit', 100)), MAX_PAGE_SIZE))
+        cursor = decode_cursor(request.args.get('cursor'))
+        before_id = int(cursor[0]) if cursor else None
+    except (ValueError, IndexError, TypeError):
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
     
-    if session_id:
-        logs = db.get_session_logs(session_id)
-    else:
-        logs = db.get_all_event_logs(limit)
+    logs = db.query_event_logs(
+        session_id=request.args.get('session_id'),
+        priorities=split_query_list(request.args.get('priority')),
+        event_types=split_query_list(request.args.get('event_type')),
+        object_classes=split_query_list(request.args.get('object_class')),
+        directions=split_query_list(request.args.get('direction')),
+        since=request.args.get('since'),
+        until=inclusive_until(request.args.get('until')),
+        before_id=before_id,
+        limit=limit,
+        fields=split_query_list(request.args.get('fields'))
+    )
+    
+    next_cursor = encode_cursor([logs[-1]['id']]) if len(logs) == limit else None
+    
+    return page_response(logs, next_cursor)
+
+
+@app.route('/api/logs/search', methods=['GET'])
+def search_logs():
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': 'Missing search query'}), 400
+    order = request.args.get('order', 'rank')
+    if order not in ('rank', 'recent'):
+        return jsonify({'error': 'order must be rank or recent'}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), MAX_PAGE_SIZE))
+        cursor = decode_cursor(request.args.get('cursor'))
+        offset = int(cursor[0]) if cursor else 0
+    except (ValueError, IndexError, TypeError):
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
+    
+    results = db.search_event_logs(
+        text,
+        session_id=request.args.get('session_id'),
+        priorities=split_query_list(request.args.get('priority')),
+        event_types=split_query_list(request.args.get('event_type')),
+        since=request.args.get('since'),
+        until=inclusive_until(request.args.get('until')),
+        order=order,
+        offset=offset,
+        limit=limit
+    )
+    
+    next_cursor = encode_cursor([offset + limit]) if len(results) == limit else None
+    response = {'items': results, 'next_cursor': next_cursor}
+    if order == 'rank':
+        # Only the newest SEARCH_RANK_WINDOW matches are ranked, so paging stops there;
+        # order=recent pages through every match.
+        if offset + limit >= SEARCH_RANK_WINDOW:
+            response['next_cursor'] = None
+        response['rank_window'] = SEARCH_RANK_WINDOW
+    
+    return jsonify(response)
+
+
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    group_by = split_query_list(request.args.get('group_by')) or ['day']
+    unknown = [d for d in group_by if d not in ROLLUP_DIMENSIONS]
+    if unknown:
+        return jsonify({'error': f"Unknown dimensions: {', '.join(unknown)}"}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', 1000)), 10000))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    rows = db.query_rollups(
+        group_by,
+        session_id=request.args.get('session_id'),
+        priorities=split_query_list(request.args.get('priority')),
+        event_types=split_query_list(request.args.get('event_type')),
+        object_classes=split_query_list(request.args.get('object_class')),
+        directions=split_query_list(request.args.get('direction')),
+        since=request.args.get('since'),
+        until=inclusive_until(request.args.get('until')),
+        limit=limit
+    )
+    return jsonify({'group_by': group_by, 'items': rows})
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics_snapshot():
+    return jsonify(metrics.snapshot())
+
+
+def check_admin():
+    # Admin endpoints (profiling, manual retention) write files or delete data, so they
+    # are off unless configured, and need the X-Admin-Token header when a token is set.
+    admin_config = config.get('admin', {})
+    if not admin_config.get('enabled', False):
+        return jsonify({'error': 'Admin API is disabled'}), 403
+    token = admin_config.get('token')
+    if token and not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), str(token)):
+        return jsonify({'error': 'Invalid admin token'}), 401
+    return None
+
+
+@app.route('/api/admin/profile', methods=['GET'])
+def get_profile_status():
+    denied = check_admin()
+    if denied:
+        return denied
+    return jsonify(profiling_session.status())
+
+
+@app.route('/api/admin/profile', methods=['POST'])
+def start_profile():
+    denied = check_admin()
+    if denied:
+        return denied
+    data = request.json or {}
+    try:
+        duration = float(data.get('duration_seconds', 30))
+        interval_ms = data.get('sample_interval_ms')
+        interval = float(interval_ms) / 1000.0 if interval_ms else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid duration or sample interval'}), 400
     
-    return jsonify(logs)
+    try:
+        status = profiling_session.start(duration, interval,
+                                         sample=data.get('sample', True), trace=data.get('trace', True))
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify(status)
+
+
+@app.route('/api/admin/profile/stop', methods=['POST'])
+def stop_profile():
+    denied = check_admin()
+    if denied:
+        return denied
+    return jsonify(profiling_session.stop())
+
+
+@app.route('/api/admin/profile/<path:filename>', methods=['GET'])
+def download_profile(filename):
+    denied = check_admin()
+    if denied:
+        return denied
+    return send_from_directory(os.path.abspath(profiling_session.output_dir), secure_filename(filename),
+                               as_attachment=True)
+
+
+@app.route('/api/storage', methods=['GET'])
+def get_storage_report():
+    return jsonify(retention_manager.get_report())
+
+
+@app.route('/api/storage/retention', methods=['POST'])
+def run_retention():
+    denied = check_admin()
+    if denied:
+        return denied
+    threading.Thread(target=retention_manager.run_once, name='retention-manual', daemon=True).start()
+    return jsonify({'success': True, 'status': 'started'})
+
+
+def export_response(rows, export_format, columns, name):
+    extension = 'ndjson' if export_format == 'ndjson' else 'csv'
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return Response(export_rows(rows, export_format, columns), mimetype=EXPORT_FORMATS[export_format],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+@app.route('/api/export/logs', methods=['GET'])
+def export_logs():
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format; use one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        since_id = int(request.args.get('since_id', 0))
+    except ValueError:
+        return jsonify({'error': 'Invalid since_id'}), 400
+
+    fields = split_query_list(request.args.get('fields'))
+    columns = [c for c in (fields or EVENT_LOG_COLUMNS) if c in EVENT_LOG_COLUMNS]
+    if 'id' not in columns:
+        columns.insert(0, 'id')
+    rows = db.iter_event_logs(session_id=request.args.get('session_id'), since_id=since_id, fields=columns)
+    return export_response(rows, export_format, columns, 'event_logs')
+
+
+@app.route('/api/export/sessions', methods=['GET'])
+def export_sessions():
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format; use one of {', '.join(EXPORT_FORMATS)}"}), 400
+    return export_response(db.iter_sessions(), export_format, list(SESSION_COLUMNS), 'sessions')
+
+
+STREAM_POLL_INTERVAL = config['session'].get('stream_poll_interval_seconds', 0.25)
+STREAM_KEEPALIVE_SECONDS = 15
+stream_clients = {}
+stream_pump_started = threading.Lock()
+
+
+def parse_stream_request(args, last_event_id=None):
+    last_id = args.get('last_id', last_event_id)
+    priorities = args.get('priority')
+    if isinstance(priorities, str):
+        priorities = split_query_list(priorities)
+    return {
+        'session_id': args.get('session_id') or None,
+        'priorities': priorities or None,
+        'last_id': int(last_id) if last_id not in (None, '') else None
+    }
+
+
+@app.route('/api/logs/stream', methods=['GET'])
+def stream_logs():
+    try:
+        options = parse_stream_request(request.args, request.headers.get('Last-Event-ID'))
+    except ValueError:
+        return jsonify({'error': 'Invalid last_id'}), 400
+
+    subscription = log_stream.subscribe(**options)
+
+    def generate():
+        idle = 0.0
+        try:
+            yield "retry: 2000\n\n"
+            while not subscription.closed:
+                batch = log_stream.drain(subscription)
+                if batch['dropped'] or batch['truncated']:
+                    yield f"event: gap\ndata: {json.dumps({'dropped': batch['dropped'], 'truncated': batch['truncated']})}\n\n"
+                for row in batch['rows']:
+                    yield f"id: {row['id']}\nevent: log\ndata: {json.dumps(row, default=str)}\n\n"
+                if batch['rows']:
+                    idle = 0.0
+                elif idle >= STREAM_KEEPALIVE_SECONDS:
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+                socketio.sleep(STREAM_POLL_INTERVAL)
+                idle += STREAM_POLL_INTERVAL
+        finally:
+            log_stream.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/logs/stream/stats', methods=['GET'])
+def get_log_stream_stats():
+    return jsonify(log_stream.get_stats())
+
+
+def pump_log_streams():
+    while True:
+        for sid, subscription in list(stream_clients.items()):
+            batch = log_stream.drain(subscription)
+            if batch['rows'] or batch['dropped'] or batch['truncated']:
+                timed_emit('log_rows', batch, to=sid)
+        socketio.sleep(STREAM_POLL_INTERVAL)
+
+
+def end_session(session) -> bool:
+    # The idle watcher and /api/session/stop can race; only the caller that removed
+    # the session tears it down.
+    if session_manager.remove(session.session_id) is None:
+        return False
+    # Alerts still waiting for the aggregation window are recorded, not spoken.
+    summary = session.alert_aggregator.flush()
+    if summary:
+        dispatch_alerts(session, summary, announce=False)
+    if session.local:
+        wake_word_detector = subsystems.get('wake_word')
+        if wake_word_detector:
+            wake_word_detector.stop_listening()
+        audio_capture.stop()
+        wake_word_state['active'] = False
+    
+    # Both wait on the writer thread or SQLite; from a request handler that would stall the hub.
+    run_blocking(log_writer.flush)
+    log_writer.untrack_session(session.session_id)
+    
+    duration = int(time.time() - session.start_time)
+    run_blocking(db.end_session, session.session_id, duration, session.alert_count)
+    
+    logger.info(f"Session stopped: {session.session_id}")
+    return True
+
+
+def session_capabilities():
+    return {name: info['state'] for name, info in subsystems.status()['subsystems'].items()}
+
+
+def build_source_cameras(sources):
+    session_cameras = {}
+    for index, source in enumerate(sources):
+        camera_entry = source if isinstance(source, dict) else {'source': source}
+        camera_name = camera_entry.get('name', f"camera{index}")
+        session_cameras[camera_name] = Camera(config, camera_entry, camera_name)
+    return session_cameras
 
 
 @app.route('/api/session/start', methods=['POST'])
 def start_session():
-    if session_state['active']:
-        return jsonify({'error': 'Session already active'}), 400
-    
-    session_id = str(uuid.uuid4())
-    session_state['session_id'] = session_id
-    session_state['start_time'] = time.time()
-    session_state['frame_count'] = 0
-    session_state['alert_count'] = 0
-    session_state['active'] = True
-    
-    if not camera.start():
-        session_state['active'] = False
-        return jsonify({'error': 'Could not start camera'}), 500
+    data = request.get_json(silent=True) or {}
+    sources = data.get('sources')
+    
+    # Without sources the session uses this machine's cameras, speakers and microphone;
+    # with them, or with frames uploaded by the client, it is a remote session that is
+    # spoken to through its Socket.IO room.
+    if data.get('ingest'):
+        if not config.get('ingest', {}).get('enabled', True):
+            return jsonify({'error': 'Frame ingest is disabled'}), 403
+        session_cameras = {'device': RemoteCamera(config, {}, 'device')}
+    elif sources:
+        if not config.get('sessions', {}).get('allow_custom_sources', False):
+            return jsonify({'error': 'Custom sources are disabled'}), 403
+        session_cameras = build_source_cameras(sources)
+    else:
+        session_cameras = build_local_cameras()
+    local = not (sources or data.get('ingest'))
+    
+    try:
+        weight = float(data.get('weight', 1.0))
+        session = session_manager.create(session_cameras, local=local, weight=weight,
+                                         label=data.get('label'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid weight'}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 400
     
-    db.create_session(session_id)
+    started_cameras = session.start()
+    if not started_cameras:
+        session_manager.remove(session.session_id)
+        return jsonify({'error': 'Could not start camera'}), 500
+    for name in session_cameras:
+        if name not in started_cameras:
+            logger.warning(f"Camera {name} could not be started")
     
-    session_state['processing_thread'] = threading.Thread(target=process_frame, daemon=True)
-    session_state['processing_thread'].start()
+    db.create_session(session.session_id)
+    log_writer.track_session(session.session_id, session.start_time)
     
-    if not session_state['wake_word_active']:
-        wake_word_detector.start_listening(lambda: on_wake_word())
-        session_state['wake_word_active'] = True
+    wake_word_detector = subsystems.get('wake_word')
+    if session.local and wake_word_detector and not wake_word_state['active']:
+        wake_word_detector.start_listening(on_wake_word)
+        wake_word_state['active'] = True
     
-    logger.info(f"Session started: {session_id}")
-    socketio.emit('session_started', {'session_id': session_id})
+    capabilities = session_capabilities()
+    logger.info(f"Session started: {session.session_id}")
     
-    return jsonify({'success': True, 'session_id': session_id})
+    response = {'success': True, 'session_id': session.session_id, 'local': session.local,
+                'room': session.room, 'capabilities': capabilities, 'cameras': started_cameras}
+    if data.get('ingest'):
+        ingest_camera = session.primary_camera
+        response['ingest'] = {'width': ingest_camera.camera_config['resolution_width'],
+                              'height': ingest_camera.camera_config['resolution_height'],
+                              'interval_ms': round(ingest_camera.interval * 1000),
+                              'quality': config.get('ingest', {}).get('jpeg_quality', 0.7)}
+    return jsonify(response)
 
 
 @app.route('/api/session/stop', methods=['POST'])
 def stop_session():
-    if not session_state['active']:
+    data = request.get_json(silent=True) or {}
+    session = session_manager.resolve(data.get('session_id'))
+    if session is None:
         return jsonify({'error': 'No active session'}), 400
     
-    session_state['active'] = False
-    
-    if session_state['processing_thread']:
-        session_state['processing_thread'].join(timeout=3)
-    
-    camera.stop()
-    wake_word_detector.stop_listening()
-    session_state['wake_word_active'] = False
-    
-    duration = int(time.time() - session_state['start_time']) if session_state['start_time'] else 0
-    db.end_session(session_state['session_id'], duration, session_state['alert_count'])
-    
-    logger.info(f"Session stopped: {session_state['session_id']}")
-    socketio.emit('session_stopped')
+    if not end_session(session):
+        return jsonify({'error': 'No active session'}), 400
+    socketio.emit('session_stopped', {'session_id': session.session_id}, to=session.room)
     
     return jsonify({'success': True})
 
 
+@app.route('/api/sessions/active', methods=['GET'])
+def get_active_sessions():
+    return jsonify({
+        'sessions': [session.get_status() for session in session_manager.list()],
+        'max_sessions': session_manager.max_sessions
+    })
+
+
 @app.route('/api/voice/command', methods=['POST'])
 def handle_voice_command():
     data = request.json
     command = data.get('command', '').lower()
     
-    if not session_state['active']:
+    session = session_manager.resolve(data.get('session_id'))
+    if session is None or not session.active:
         return jsonify({'error': 'No active session'}), 400
     
-    frame = camera.get_raw_frame()
+    frame = session.primary_camera.get_raw_frame()
     if frame is None:
         return jsonify({'error': 'Camera not available'}), 400
     
-    response_text = ""
+    # Answer straight away; the response arrives as a voice_response event.
+    command_id = str(uuid.uuid4())
+    socketio.start_background_task(run_voice_command, session, command_id, command, frame)
     
-    if 'what\'s in front' in command or 'describe' in command or 'what do you see' in command:
-        response_text = scene_ai.describe_scene(frame)
-        voice_system.speak(response_text)
+    return jsonify({'success': True, 'command_id': command_id}), 202
+
+
+def run_voice_command(session, command_id, command, frame):
+    try:
+        response_text = run_blocking(execute_voice_command, session, command, frame)
+    except Exception as e:
+        print(f"Voice command error: {e}")
+        errors_total.inc(component='voice_command')
+        timed_emit('voice_response', {'command_id': command_id, 'command': command, 'error': str(e)},
+                   to=session.room)
+        return
+    timed_emit('voice_response', {'command_id': command_id, 'command': command, 'response': response_text},
+               to=session.room)
+
+
+def execute_voice_command(session, command, frame):
+    intent, argument = parse_command(command, face_recognizer_names())
+    
+    scene_ai = subsystems.get('scene_ai')
+    face_recognizer = subsystems.get('faces')
+    world_state = session.world_state
     
-    elif 'traffic light' in command or 'red light' in command:
-        light_color = scene_ai.detect_traffic_light(frame)
+    if intent == 'describe':
+        scene = world_state.fresh('scene')
+        if scene:
+            response_text = scene['value']
+        elif scene_ai:
+            try:
+                with timed_stage('scene_ai'):
+                    response_text = scene_ai.describe_scene(frame)
+                world_state.publish(scene=response_text)
+            except SceneAIError as e:
+                # Spoken, but not cached, so the next request retries.
+                response_text = str(e)
+        else:
+            response_text = "Scene description is still starting up"
+    
+    elif intent == 'traffic_light':
+        light_color = get_traffic_light_state(session, frame)
         if light_color:
             response_text = f"The traffic light is {light_color}"
         else:
             response_text = "I don't see a traffic light"
-        voice_system.speak(response_text)
     
-    elif 'read this' in command or 'read' in command:
-        text = ocr_reader.read_text(frame)
+    elif intent == 'read':
+        recent_text = world_state.fresh('text')
+        if recent_text:
+            text = recent_text['value']
+        else:
+            with timed_stage('ocr'):
+                text = read_text(frame)
+            world_state.publish(text=text)
         if text:
             response_text = f"I read: {text}"
         else:
             response_text = "I couldn't read any text"
-        voice_system.speak(response_text)
     
-    elif 'who is here' in command or 'who\'s here' in command:
-        face_recognitions = face_recognizer.recognize(frame, time.time())
-        if face_recognitions:
-            names = [r['name'] for r in face_recognitions]
+    elif intent in ('who_is_here', 'find_person') and not face_recognizer:
+        response_text = "Face recognition is still starting up"
+    
+    elif intent == 'who_is_here':
+        people = current_people(session, face_recognizer, frame)
+        if people:
+            names = [r['name'] for r in people]
             response_text = f"I see: {', '.join(names)}"
         else:
             response_text = "I don't recognize anyone"
-        voice_system.speak(response_text)
     
-    elif 'pause' in command:
-        alert_manager.pause()
+    elif intent == 'find_person':
+        match = next((r for r in current_people(session, face_recognizer, frame) if r['name'] == argument), None)
+        if match:
+            response_text = f"{argument} is {match['distance_feet']:.0f} feet away on your {match['direction']}"
+        else:
+            response_text = f"I don't see {argument}"
+    
+    elif intent == 'pause':
+        session.alert_manager.pause()
         response_text = "Alerts paused"
-        voice_system.speak(response_text)
     
-    elif 'resume' in command:
-        alert_manager.resume()
+    elif intent == 'resume':
+        session.alert_manager.resume()
         response_text = "Alerts resumed"
-        voice_system.speak(response_text)
     
     else:
         response_text = "I didn't understand that command"
-        voice_system.speak(response_text)
     
-    db.add_event_log(
-        session_state['session_id'],
+    session_speak(session, response_text)
+    session.last_activity = time.time()
+    
+    log_writer.log(
+        session.session_id,
         'voice_command',
         'informational',
         response_text,
         {'command': command}
     )
     
-    return jsonify({'success': True, 'response': response_text})
+    return response_text
+
+
+def read_text(frame):
+    workers = subsystems.get('workers')
+    if workers:
+        return workers.run('ocr', frame, '', fallback=lambda: ocr_reader.read_text(frame))
+    return ocr_reader.read_text(frame)
+
+
+def current_people(session, face_recognizer, frame):
+    # Answer from the pipeline's latest results; only look again when they are stale
+    # (faces not processed recently).
+    world_state = session.world_state
+    people = world_state.fresh('people')
+    if people is None:
+        workers = subsystems.get('workers')
+        if workers and workers.has_stage('faces'):
+            matches = workers.run('faces', frame, [], fallback=lambda: face_recognizer.identify(frame))
+        else:
+            matches = face_recognizer.identify(frame)
+        world_state.publish(people=matches)
+        people = world_state.fresh('people')
+    return people['value']
+
+
+def reload_face_workers():
+    workers = subsystems.get('workers')
+    if workers:
+        workers.reload('faces')
+
+
+def face_recognizer_names():
+    face_recognizer = subsystems.get('faces')
+    if not face_recognizer:
+        return []
+    return [info['name'] for info in face_recognizer.known_names.values()]
+
+
+@app.route('/api/cameras', methods=['GET'])
+def get_cameras():
+    return jsonify(session_manager.get_stats())
+
+
+@app.route('/api/world', methods=['GET'])
+def get_world_state():
+    session = session_manager.resolve(request.args.get('session_id'))
+    if session is None:
+        return jsonify({'error': 'No active session'}), 404
+    return jsonify(session.world_state.to_dict())
+
+
+@app.route('/api/voice/metrics', methods=['GET'])
+def get_voice_metrics():
+    voice_system = subsystems.get('voice')
+    if not voice_system:
+        return jsonify({'error': 'Voice system is still loading'}), 503
+    return jsonify(voice_system.get_metrics())
+
+
+@app.route('/api/health', methods=['GET'])
+def get_health():
+    health = subsystems.status()
+    health['database'] = {'schema_version': db.schema_version()}
+    health['session_active'] = bool(session_manager.list())
+    health['sessions'] = len(session_manager.list())
+    health['workers'] = subsystems.get('workers').get_stats() if subsystems.get('workers') else None
+    health['event_loop'] = loop_monitor.get_stats()
+    return jsonify(health), 200 if health['ready'] else 503
 
 
 @socketio.on('connect')
@@ -380,28 +1062,126 @@ def handle_connect():
     emit('connected', {'status': 'connected'})
 
 
+@socketio.on('disconnect')
+def handle_disconnect():
+    subscription = stream_clients.pop(request.sid, None)
+    if subscription:
+        log_stream.unsubscribe(subscription)
+
+
+@socketio.on('subscribe_logs')
+def handle_subscribe_logs(data=None):
+    try:
+        options = parse_stream_request(data or {})
+    except ValueError:
+        emit('log_stream_error', {'error': 'Invalid last_id'})
+        return
+
+    previous = stream_clients.pop(request.sid, None)
+    if previous:
+        log_stream.unsubscribe(previous)
+    stream_clients[request.sid] = log_stream.subscribe(**options)
+
+    if stream_pump_started.acquire(blocking=False):
+        socketio.start_background_task(pump_log_streams)
+    emit('logs_subscribed', {'last_id': stream_clients[request.sid].last_id})
+
+
+@socketio.on('unsubscribe_logs')
+def handle_unsubscribe_logs():
+    subscription = stream_clients.pop(request.sid, None)
+    if subscription:
+        log_stream.unsubscribe(subscription)
+
+
+@socketio.on('join_session')
+def handle_join_session(data=None):
+    session = session_manager.resolve((data or {}).get('session_id'))
+    if session is None:
+        emit('session_error', {'error': 'No active session'})
+        return
+    join_room(session.room)
+    emit('session_joined', session.get_status())
+    # Clients join after /api/session/start returns, so the room would not hear this yet.
+    emit('session_started', {'session_id': session.session_id, 'capabilities': session_capabilities(),
+                             'cameras': [name for name, camera in session.cameras.items() if camera.running]})
+
+
+@socketio.on('leave_session')
+def handle_leave_session(data=None):
+    session = session_manager.get((data or {}).get('session_id'))
+    if session is not None:
+        leave_room(session.room)
+
+
+@socketio.on('ingest_frame')
+def handle_ingest_frame(data=None):
+    # Clients send one JPEG at a time and wait for this acknowledgement, which carries
+    # the interval to wait before the next one; nothing queues up on the socket.
+    data = data or {}
+    session = session_manager.get(data.get('session_id'))
+    if session is None or not session.active or session.room not in rooms():
+        return {'accepted': False, 'error': 'No active session'}
+    camera_name = data.get('camera') or session.primary_camera.name
+    ingest_camera = session.cameras.get(camera_name)
+    frame_data = data.get('frame')
+    if not isinstance(ingest_camera, RemoteCamera) or not isinstance(frame_data, (bytes, bytearray)):
+        return {'accepted': False, 'error': 'Invalid frame'}
+    
+    # While the last upload is still waiting for the model this one would only replace it.
+    behind = session_manager.is_behind(session, camera_name)
+    if behind:
+        ingest_camera.drop()
+        accepted = False
+    else:
+        with timed_stage('ingest_decode'):
+            accepted = run_blocking(ingest_camera.push, frame_data)
+    ingest_frames_total.inc(outcome='accepted' if accepted else 'dropped')
+    
+    interval = ingest_camera.adapt(not accepted)
+    return {'accepted': accepted, 'interval_ms': round(interval * 1000)}
+
+
 @socketio.on('get_frame')
-def handle_frame_request():
-    if session_state['active']:
-        result = camera.get_frame()
+def handle_frame_request(data=None):
+    data = data or {}
+    session = session_manager.resolve(data.get('session_id'))
+    if session is not None and session.active:
+        preview_camera = session.cameras.get(data.get('camera'), session.primary_camera)
+        result = run_blocking(preview_camera.get_frame)
         if result:
             jpeg_data, _ = result
             frame_base64 = base64.b64encode(jpeg_data).decode('utf-8')
-            emit('frame', {'data': f'data:image/jpeg;base64,{frame_base64}'})
+            with timed_stage('socketio_emit'):
+                emit('frame', {'data': f'data:image/jpeg;base64,{frame_base64}'})
 
 
-def on_wake_word():
-    if session_state['active'] and not session_state['voice_listening']:
-        session_state['voice_listening'] = True
-        socketio.emit('wake_word_detected')
+def on_wake_word(position=None):
+    voice_system = subsystems.get('voice')
+    session = session_manager.local_session()
+    if voice_system and session and session.active and not session.voice_listening:
+        session.voice_listening = True
+        timed_emit('wake_word_detected', to=session.room)
         
-        def listen_callback(text):
-            session_state['voice_listening'] = False
-            socketio.emit('voice_command', {'command': text})
+        voice_text = voice_system.listen(start_position=position)
+        session.voice_listening = False
         
-        voice_text = voice_system.listen(callback=listen_callback)
         if voice_text:
-            session_state['voice_listening'] = False
+            timed_emit('voice_command', {'command': voice_text}, to=session.room)
+            frame = session.primary_camera.get_raw_frame()
+            if frame is not None:
+                response_text = execute_voice_command(session, voice_text, frame)
+                timed_emit('voice_response', {'command': voice_text, 'response': response_text},
+                           to=session.room)
+
+
+subsystems.start()
+atexit.register(subsystems.shutdown)
+session_manager.start()
+atexit.register(session_manager.shutdown)
+socketio.start_background_task(hub_bridge.run, socketio.sleep)
+socketio.start_background_task(loop_monitor.run, socketio.sleep)
+atexit.register(loop_monitor.stop)
 
 
 if __name__ == '__main__':
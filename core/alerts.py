@@ -1,6 +1,6 @@
 import time
-from typing import Dict, Optional
-from collections import deque
+from typing import Dict, Optional, List, Tuple
+from collections import deque, OrderedDict
 
 
 class AlertManager:
@@ -71,3 +71,117 @@ class AlertManager:
     def clear_cooldowns(self):
         self.cooldowns.clear()
 
+
+
+PRIORITY_RANK = {'critical': 0, 'important': 1, 'informational': 2}
+
+DISTANCE_RANK = {'very close': 0, 'close': 1, 'medium': 2}
+
+COUNT_WORDS = {2: 'two', 3: 'three', 4: 'four', 5: 'five', 6: 'six', 7: 'seven', 8: 'eight', 9: 'nine'}
+
+DIRECTION_PHRASES = {
+    'left': 'on your left',
+    'right': 'on your right',
+    'front': 'in front',
+    'behind': 'behind you'
+}
+
+
+def pluralize(word: str) -> str:
+    if word == 'person':
+        return 'people'
+    if word.endswith(('s', 'x', 'ch', 'sh')):
+        return word + 'es'
+    return word + 's'
+
+
+class AlertAggregator:
+    def __init__(self, config: dict):
+        self.config = config
+        self.window = config['alerts'].get('aggregation_window_seconds', 0)
+        self.max_groups = config['alerts'].get('max_summary_items', 3)
+        self.items = {}
+        self.window_start = None
+
+    def add(self, event_type: str, priority: str, message: str, metadata: Dict,
+            subject: str, direction: str, distance: Optional[str] = None, identifier: Optional[str] = None,
+            instance: int = 0):
+        if self.window_start is None:
+            self.window_start = time.time()
+
+        # One entry per detected object: several cars in one frame are separate instances
+        # of the same identifier, while a later frame re-reporting them replaces them.
+        key = (identifier, instance) if identifier else (event_type, subject, direction, len(self.items))
+        self.items[key] = {
+            'event_type': event_type,
+            'priority': priority,
+            'message': message,
+            'metadata': metadata,
+            'subject': subject,
+            'direction': direction,
+            'distance': distance
+        }
+
+    def ready(self) -> bool:
+        if not self.items:
+            return False
+        if self.window <= 0:
+            return True
+        if any(item['priority'] == 'critical' for item in self.items.values()):
+            return True
+        return time.time() - self.window_start >= self.window
+
+    def flush(self) -> Optional[Dict]:
+        if not self.items:
+            return None
+
+        items = sorted(self.items.values(), key=self._rank)
+        self.items = {}
+        self.window_start = None
+
+        priority = items[0]['priority']
+        if len(items) == 1:
+            message = items[0]['message']
+        else:
+            message = self._summarize(items)
+
+        return {
+            'priority': priority,
+            'message': message,
+            'items': items
+        }
+
+    def _rank(self, item: Dict) -> Tuple:
+        return (
+            PRIORITY_RANK.get(item['priority'], len(PRIORITY_RANK)),
+            DISTANCE_RANK.get(item['distance'], len(DISTANCE_RANK))
+        )
+
+    def _summarize(self, items: List[Dict]) -> str:
+        # Objects are only counted together when the same camera saw them; one car seen by
+        # two cameras is still one car.
+        groups = OrderedDict()
+        for item in items:
+            camera = (item['metadata'] or {}).get('camera')
+            key = (item['subject'], item['distance'], item['direction'], camera)
+            groups.setdefault(key, []).append(item)
+        several_cameras = len({key[3] for key in groups}) > 1
+
+        clauses = []
+        for (subject, distance, direction, camera), members in list(groups.items())[:self.max_groups]:
+            count = len(members)
+            if count > 1:
+                subject = f"{COUNT_WORDS.get(count, str(count))} {pluralize(subject)}"
+            parts = [subject]
+            if distance in ('very close', 'close'):
+                parts.append(distance)
+            parts.append(DIRECTION_PHRASES.get(direction, direction))
+            if several_cameras and camera:
+                parts.append(f"({camera} camera)")
+            clauses.append(' '.join(parts))
+
+        remaining = len(groups) - self.max_groups
+        if remaining > 0:
+            clauses.append(f"and {remaining} more")
+
+        return ', '.join(clauses)
@@ -0,0 +1,378 @@
+import time
+import wave
+import threading
+from typing import Optional, List
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+
+class MicrophoneSource:
+    def __init__(self, sample_rate: int = SAMPLE_RATE, chunk_frames: int = 1600, device_index: Optional[int] = None):
+        self.sample_rate = sample_rate
+        self.chunk_frames = chunk_frames
+        self.device_index = device_index
+        self.audio = None
+        self.stream = None
+
+    def open(self):
+        import pyaudio
+
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True,
+                                      frames_per_buffer=self.chunk_frames,
+                                      input_device_index=self.device_index)
+        self.stream.start_stream()
+
+    def read(self) -> Optional[bytes]:
+        return self.stream.read(self.chunk_frames, exception_on_overflow=False)
+
+    def close(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.audio:
+            self.audio.terminate()
+            self.audio = None
+
+
+class WavFileSource:
+    def __init__(self, paths, sample_rate: int = SAMPLE_RATE, chunk_frames: int = 1600,
+                 realtime: bool = True, loop: bool = False):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.sample_rate = sample_rate
+        self.chunk_frames = chunk_frames
+        self.realtime = realtime
+        self.loop = loop
+        self.samples = None
+        self.position = 0
+        self.next_deadline = None
+
+    def open(self):
+        self.samples = np.concatenate([load_wav(path, self.sample_rate) for path in self.paths])
+        self.position = 0
+        self.next_deadline = time.monotonic()
+
+    def read(self) -> Optional[bytes]:
+        if self.position >= len(self.samples):
+            if not self.loop:
+                return None
+            self.position = 0
+
+        chunk = self.samples[self.position:self.position + self.chunk_frames]
+        self.position += len(chunk)
+
+        if self.realtime:
+            self.next_deadline += len(chunk) / float(self.sample_rate)
+            delay = self.next_deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        return chunk.tobytes()
+
+    def close(self):
+        self.samples = None
+
+
+def load_wav(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    with wave.open(path, 'rb') as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        data = wav.readframes(wav.getnframes())
+
+    if width != SAMPLE_WIDTH:
+        raise ValueError(f"{path}: expected 16-bit PCM, got {width * 8}-bit")
+
+    samples = np.frombuffer(data, dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    if rate != sample_rate:
+        target_length = int(len(samples) * sample_rate / rate)
+        samples = np.interp(np.linspace(0, len(samples) - 1, target_length),
+                            np.arange(len(samples)), samples).astype(np.int16)
+    return samples
+
+
+def rms(samples: np.ndarray) -> float:
+    if len(samples) == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+
+
+def record_utterance(subscription: 'AudioSubscription', sample_rate: int = SAMPLE_RATE, timeout: float = 3,
+                     phrase_time_limit: float = 5, silence_seconds: float = 0.8,
+                     threshold: float = 500) -> Optional[bytes]:
+    chunk_samples = sample_rate // 10
+    started = False
+    collected = []
+    silence = 0.0
+    waited = 0.0
+    spoken = 0.0
+
+    while True:
+        chunk = subscription.read(chunk_samples, timeout=1.0)
+        if chunk is None:
+            break
+        if len(chunk) == 0:
+            waited += 1.0
+            if not started and waited >= timeout:
+                return None
+            continue
+
+        duration = len(chunk) / float(sample_rate)
+        loud = rms(chunk) >= threshold
+        collected.append(chunk)
+
+        if not started:
+            waited += duration
+            if loud:
+                started = True
+            elif waited >= timeout:
+                return None
+            else:
+                # Keep a little lead-in so the first consonant is not clipped.
+                collected = collected[-3:]
+            continue
+
+        spoken += duration
+        silence = 0.0 if loud else silence + duration
+        if silence >= silence_seconds or spoken >= phrase_time_limit:
+            break
+
+    if not started:
+        return None
+    return np.concatenate(collected).tobytes()
+
+
+class AudioRingBuffer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=np.int16)
+        # Total samples ever written. Only the capture thread writes; readers
+        # copy out and then re-check this value to detect being overrun.
+        self.write_position = 0
+
+    def write(self, samples: np.ndarray):
+        position = self.write_position
+        if len(samples) > self.capacity:
+            position += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+
+        count = len(samples)
+        start = position % self.capacity
+        first = min(count, self.capacity - start)
+        self.data[start:start + first] = samples[:first]
+        if first < count:
+            self.data[:count - first] = samples[first:]
+        self.write_position = position + count
+
+    def oldest_position(self) -> int:
+        return max(0, self.write_position - self.capacity)
+
+    def read(self, position: int, max_samples: int):
+        end = min(self.write_position, position + max_samples)
+        position = max(position, self.oldest_position())
+        if position >= end:
+            return position, np.zeros(0, dtype=np.int16)
+
+        start = position % self.capacity
+        count = end - position
+        first = min(count, self.capacity - start)
+        chunk = np.concatenate([self.data[start:start + first], self.data[:count - first]])
+
+        # If the writer lapped us while copying, drop the part that was overwritten.
+        overrun = self.oldest_position() - position
+        if overrun > 0:
+            chunk = chunk[overrun:]
+            position += overrun
+        return position + len(chunk), chunk
+
+
+class AudioSubscription:
+    def __init__(self, service: 'AudioCaptureService', position: int):
+        self.service = service
+        self.position = position
+        self.closed = False
+
+    def read(self, max_samples: int = 1600, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.closed:
+            self.position, chunk = self.service.buffer.read(self.position, max_samples)
+            if len(chunk):
+                return chunk
+            if not self.service.running:
+                return None
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return np.zeros(0, dtype=np.int16)
+            self.service.wait_for_data(remaining)
+        return None
+
+    def read_bytes(self, max_samples: int = 1600, timeout: Optional[float] = None) -> Optional[bytes]:
+        chunk = self.read(max_samples, timeout)
+        return None if chunk is None else chunk.tobytes()
+
+    def close(self):
+        self.closed = True
+        self.service.unsubscribe(self)
+
+
+class AudioCaptureService:
+    def __init__(self, config: dict, source=None):
+        self.config = config
+        audio_config = config.get('audio', {})
+        self.sample_rate = audio_config.get('sample_rate', SAMPLE_RATE)
+        self.chunk_frames = audio_config.get('chunk_frames', 1600)
+        self.preroll_seconds = audio_config.get('preroll_seconds', 0.5)
+        self.buffer = AudioRingBuffer(int(audio_config.get('buffer_seconds', 30) * self.sample_rate))
+        self.source = source or self._create_source(audio_config)
+        self.subscribers = []
+        self.data_ready = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def _create_source(self, audio_config: dict):
+        source = audio_config.get('source', 'microphone')
+        if source == 'microphone':
+            return MicrophoneSource(self.sample_rate, self.chunk_frames, audio_config.get('input_device_index'))
+        return WavFileSource(source, self.sample_rate, self.chunk_frames,
+                             realtime=True, loop=audio_config.get('loop_source', False))
+
+    def start(self) -> bool:
+        with self.lock:
+            if self.running:
+                return True
+            try:
+                self.source.open()
+            except Exception as e:
+                print(f"Audio capture error: {e}")
+                return False
+            self.running = True
+            self.thread = threading.Thread(target=self._capture_loop, name='audio-capture', daemon=True)
+            self.thread.start()
+            return True
+
+    def _capture_loop(self):
+        while self.running:
+            try:
+                data = self.source.read()
+            except Exception as e:
+                print(f"Audio capture error: {e}")
+                data = None
+
+            if data is None:
+                self.running = False
+                break
+
+            self.buffer.write(np.frombuffer(data, dtype=np.int16))
+            with self.data_ready:
+                self.data_ready.notify_all()
+
+        with self.data_ready:
+            self.data_ready.notify_all()
+
+    def wait_for_data(self, timeout: Optional[float] = None):
+        with self.data_ready:
+            self.data_ready.wait(timeout if timeout is not None else 0.5)
+
+    def position(self) -> int:
+        return self.buffer.write_position
+
+    def subscribe(self, start_position: Optional[int] = None, preroll_seconds: float = 0.0) -> AudioSubscription:
+        if start_position is None:
+            start_position = self.buffer.write_position - int(preroll_seconds * self.sample_rate)
+        subscription = AudioSubscription(self, max(start_position, self.buffer.oldest_position()))
+        with self.lock:
+            self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: AudioSubscription):
+        with self.lock:
+            if subscription in self.subscribers:
+                self.subscribers.remove(subscription)
+
+    def stop(self):
+        with self.lock:
+            if not self.running and self.thread is None:
+                return
+            self.running = False
+            subscribers: List[AudioSubscription] = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.closed = True
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+        try:
+            self.source.close()
+        except Exception:
+            pass
+
+
+class VoiceActivityDetector:
+    def __init__(self, config: dict, sample_rate: int = SAMPLE_RATE):
+        vad_config = config.get('audio', {}).get('vad', {})
+        self.sample_rate = sample_rate
+        self.enabled = vad_config.get('enabled', True)
+        self.min_threshold = vad_config.get('min_rms', 300)
+        self.noise_multiplier = vad_config.get('noise_multiplier', 3.0)
+        self.hangover_seconds = vad_config.get('hangover_seconds', 0.5)
+        self.preroll_chunks = vad_config.get('preroll_chunks', 2)
+        self.noise_floor = float(self.min_threshold) / self.noise_multiplier
+        self.history = []
+        self.silence = 0.0
+        self.active = not self.enabled
+        self.webrtc = None
+
+        if vad_config.get('mode', 'energy') == 'webrtc':
+            try:
+                import webrtcvad
+                self.webrtc = webrtcvad.Vad(vad_config.get('aggressiveness', 2))
+            except Exception as e:
+                print(f"WebRTC VAD unavailable, using energy VAD: {e}")
+
+    def is_speech(self, samples: np.ndarray) -> bool:
+        if self.webrtc is not None:
+            frame = int(self.sample_rate * 0.03)
+            frames = [samples[i:i + frame] for i in range(0, len(samples) - frame + 1, frame)]
+            if not frames:
+                return False
+            voiced = sum(self.webrtc.is_speech(f.tobytes(), self.sample_rate) for f in frames)
+            return voiced >= max(1, len(frames) // 3)
+
+        level = rms(samples)
+        speech = level >= max(self.min_threshold, self.noise_floor * self.noise_multiplier)
+        if not speech:
+            # Track the background level slowly so a noisy room raises the bar.
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * level
+        return speech
+
+    def process(self, samples: np.ndarray) -> List[np.ndarray]:
+        if not self.enabled:
+            # Without VAD the stream is one continuous utterance.
+            self.active = True
+            return [samples]
+
+        duration = len(samples) / float(self.sample_rate)
+        if self.is_speech(samples):
+            forward = self.history + [samples] if not self.active else [samples]
+            self.history = []
+            self.active = True
+            self.silence = 0.0
+            return forward
+
+        if self.active:
+            self.silence += duration
+            if self.silence <= self.hangover_seconds:
+                return [samples]
+            self.active = False
+
+        self.history = (self.history + [samples])[-self.preroll_chunks:] if self.preroll_chunks else []
+        return []
+
+    def utterance_ended(self) -> bool:
+        return not self.active
@@ -1,36 +1,51 @@
 import cv2
 import threading
 import time
-from typing import Optional, Tuple
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.metrics import frames_total, stage_seconds
 
 
 class Camera:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, camera_config: Optional[dict] = None, name: str = 'main'):
         self.config = config
+        # Per-camera entries from `cameras` override the shared `camera` defaults.
+        self.camera_config = dict(config['camera'], **(camera_config or {}))
+        self.name = name
         self.cap = None
         self.running = False
         self.frame = None
         self.lock = threading.Lock()
         self.thread = None
-        self.fps = config['camera'].get('fps', 20)
+        self.fps = self.camera_config.get('fps', 20)
+        self.buffer = deque(maxlen=self.camera_config.get('buffer_frames', 8))
+        self.sequence = 0
+        self.listeners = []
+
+    def add_listener(self, callback: Callable[[str, int, float, np.ndarray], None]):
+        self.listeners.append(callback)
 
     def start(self) -> bool:
         if self.running:
             return True
         
         try:
-            self.cap = cv2.VideoCapture(self.config['camera']['device_id'])
+            # `source` may be a video file or stream URL; otherwise the device index is used.
+            self.cap = cv2.VideoCapture(self.camera_config.get('source', self.camera_config.get('device_id', 0)))
             if not self.cap.isOpened():
                 return False
             
-            width = self.config['camera']['resolution_width']
-            height = self.config['camera']['resolution_height']
+            width = self.camera_config['resolution_width']
+            height = self.camera_config['resolution_height']
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
             self.cap.set(cv2.CAP_PROP_FPS, self.fps)
             
             self.running = True
-            self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+            self.thread = threading.Thread(target=self._capture_loop, name=f"camera-{self.name}", daemon=True)
             self.thread.start()
             return True
         except Exception as e:
@@ -41,14 +56,32 @@ class Camera:
         frame_time = 1.0 / self.fps
         while self.running:
             start_time = time.time()
-            ret, frame = self.cap.read()
+            with stage_seconds.time(stage='capture'):
+                ret, frame = self.cap.read()
+                if not ret and self.camera_config.get('loop', False):
+                    # Replay file sources from the start (soak and load testing).
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    ret, frame = self.cap.read()
             if ret:
-                with self.lock:
-                    self.frame = frame.copy()
+                self._publish(frame, time.time())
+            else:
+                frames_total.inc(outcome='missing')
             elapsed = time.time() - start_time
             sleep_time = max(0, frame_time - elapsed)
             time.sleep(sleep_time)
 
+    def _publish(self, frame: np.ndarray, timestamp: float):
+        with self.lock:
+            self.sequence += 1
+            sequence = self.sequence
+            self.frame = frame
+            self.buffer.append((sequence, timestamp, frame))
+        for listener in self.listeners:
+            try:
+                listener(self.name, sequence, timestamp, frame)
+            except Exception as e:
+                print(f"Camera {self.name} listener error: {e}")
+
     def get_frame(self) -> Optional[Tuple[bytes, bytes]]:
         with self.lock:
             if self.frame is None:
@@ -71,6 +104,17 @@ class Camera:
                 return None
             return self.frame.copy()
 
+    def get_latest(self) -> Optional[Tuple[int, float, np.ndarray]]:
+        with self.lock:
+            if not self.buffer:
+                return None
+            return self.buffer[-1]
+
+    def get_recent(self, count: Optional[int] = None) -> List[Tuple[int, float, np.ndarray]]:
+        with self.lock:
+            frames = list(self.buffer)
+        return frames[-count:] if count else frames
+
     def stop(self):
         self.running = False
         if self.thread:
@@ -78,7 +122,73 @@ class Camera:
         if self.cap:
             self.cap.release()
         self.frame = None
+        with self.lock:
+            self.buffer.clear()
 
     def is_running(self) -> bool:
         return self.running
 
+
+
+class RemoteCamera(Camera):
+    # Frames arrive as JPEG from a browser or phone over the session's socket rather
+    # than from a capture device on this machine.
+    def __init__(self, config: dict, camera_config: Optional[dict] = None, name: str = 'device'):
+        ingest_config = config.get('ingest', {})
+        # Every uploaded frame is meant for inference, so none are skipped.
+        defaults = {'fps': ingest_config.get('max_fps', 10), 'frame_skip': 1}
+        super().__init__(config, dict(defaults, **(camera_config or {})), name)
+        self.min_interval = 1.0 / self.fps
+        self.max_interval = ingest_config.get('max_interval_ms', 1000) / 1000.0
+        self.interval = self.min_interval
+        self.decoding = threading.Lock()
+        self.counts = {'received': 0, 'decoded': 0, 'dropped': 0, 'invalid': 0}
+
+    def start(self) -> bool:
+        self.running = True
+        return True
+
+    def push(self, data: bytes) -> bool:
+        self.counts['received'] += 1
+        if not self.running:
+            return False
+        # A frame arriving while the previous one is still being decoded is dropped.
+        if not self.decoding.acquire(blocking=False):
+            self.counts['dropped'] += 1
+            return False
+        try:
+            frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                self.counts['invalid'] += 1
+                return False
+            width = self.camera_config['resolution_width']
+            height = self.camera_config['resolution_height']
+            if frame.shape[1] > width or frame.shape[0] > height:
+                # Oversized frames would miss the worker shared-memory slots.
+                scale = min(width / frame.shape[1], height / frame.shape[0])
+                frame = cv2.resize(frame, (int(frame.shape[1] * scale), int(frame.shape[0] * scale)),
+                                   interpolation=cv2.INTER_AREA)
+            self._publish(frame, time.time())
+            self.counts['decoded'] += 1
+            return True
+        finally:
+            self.decoding.release()
+
+    def drop(self):
+        self.counts['received'] += 1
+        self.counts['dropped'] += 1
+
+    def adapt(self, behind: bool) -> float:
+        # The client waits this long between frames: back off quickly while inference is
+        # behind, then creep back towards the configured rate.
+        if behind:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        else:
+            self.interval = max(self.min_interval, self.interval * 0.9)
+        return self.interval
+
+    def stop(self):
+        self.running = False
+        self.frame = None
+        with self.lock:
+            self.buffer.clear()
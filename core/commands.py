@@ -0,0 +1,80 @@
+import re
+from typing import Optional, List, Iterable, Tuple
+
+
+# Intent -> substrings that select it, checked in order. This mirrors the keyword
+# matching handle_voice_command has always done so typed commands behave the same.
+COMMAND_KEYWORDS = [
+    ('describe', ["what's in front", 'what is in front', 'describe', 'what do you see']),
+    ('traffic_light', ['traffic light', 'red light', 'the light']),
+    ('read', ['read this', 'read']),
+    ('who_is_here', ['who is here', "who's here"]),
+    ('pause', ['pause']),
+    ('resume', ['resume'])
+]
+
+# Phrases the offline recogniser is allowed to hear.
+COMMAND_PHRASES = [
+    "what's in front of me",
+    'what is in front of me',
+    'describe',
+    'describe the scene',
+    'describe what you see',
+    'what do you see',
+    'traffic light',
+    'what is the traffic light',
+    "what's the traffic light",
+    'is the light red',
+    'red light',
+    'read this',
+    'read',
+    'who is here',
+    "who's here",
+    'pause',
+    'resume'
+]
+
+FIND_PERSON_PATTERN = re.compile(r'\b(?:where is|is) (.+?)(?: here)?$')
+
+
+def parse_command(text: str, names: Iterable[str] = ()) -> Tuple[Optional[str], Optional[str]]:
+    text = text.lower().strip()
+    if not text:
+        return None, None
+
+    for intent, keywords in COMMAND_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return intent, None
+
+    match = FIND_PERSON_PATTERN.search(text)
+    if match:
+        wanted = match.group(1).strip()
+        for name in names:
+            if name.lower() == wanted:
+                return 'find_person', name
+
+    return None, None
+
+
+def command_grammar(names: Iterable[str] = ()) -> List[str]:
+    phrases = list(COMMAND_PHRASES)
+    for name in sorted({n.lower() for n in names if n}):
+        phrases.append(f"where is {name}")
+        phrases.append(f"is {name} here")
+    phrases.append('[unk]')
+    return phrases
+
+
+def is_unambiguous(partial: str, names: Iterable[str] = ()) -> bool:
+    names = list(names)
+    intent, argument = parse_command(partial, names)
+    if intent is None:
+        return False
+
+    partial = partial.lower().strip()
+    # If a longer grammar phrase could still turn this into a different command, keep listening.
+    for phrase in command_grammar(names):
+        if phrase != partial and phrase.startswith(partial):
+            if parse_command(phrase, names) != (intent, argument):
+                return False
+    return True
@@ -1,6 +1,5 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
 from typing import List, Dict, Tuple
 import os
 from pathlib import Path
@@ -17,6 +16,9 @@ class ObjectDetector:
 
     def _load_model(self):
         try:
+            # Imported here so importing this module does not pull in torch.
+            from ultralytics import YOLO
+
             model_name = f"yolov8{self.model_size}.pt"
             self.model = YOLO(model_name)
         except Exception as e:
@@ -36,51 +38,66 @@ class ObjectDetector:
         try:
             results = self.model(frame, conf=self.confidence_threshold, verbose=False)
             detections = []
-            
             for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    cls_id = int(box.cls[0])
-                    cls_name = self.model.names[cls_id]
-                    
-                    if self.classes and cls_name not in self.classes:
-                        continue
-                    
-                    conf = float(box.conf[0])
-                    x1, y1, x2, y2 = [int(v) for v in box.xyxy[0].cpu().numpy()]
-                    
-                    center_x = (x1 + x2) / 2
-                    center_y = (y1 + y2) / 2
-                    
-                    width = float(x2 - x1)
-                    height = float(y2 - y1)
-                    
-                    frame_center_x = frame.shape[1] / 2
-                    frame_center_y = frame.shape[0] / 2
-                    
-                    rel_x = center_x - frame_center_x
-                    rel_y = center_y - frame_center_y
-                    
-                    if abs(rel_x) > abs(rel_y):
-                        direction = "left" if rel_x < 0 else "right"
-                    else:
-                        direction = "front" if rel_y < 0 else "behind"
-                    
-                    detections.append({
-                        'class': cls_name,
-                        'confidence': float(conf),
-                        'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                        'center': (int(center_x), int(center_y)),
-                        'size': (width, height),
-                        'direction': direction,
-                        'priority': self._get_priority(cls_name, height, frame.shape[0])
-                    })
-            
+                detections.extend(self._parse_result(result, frame.shape))
             return detections
         except Exception as e:
             print(f"Detection error: {e}")
             return []
 
+    def detect_batch(self, frames: List[np.ndarray]) -> List[List[Dict]]:
+        # One forward pass over frames from several cameras; YOLO returns one result per image.
+        if self.model is None or not frames:
+            return [[] for _ in frames]
+
+        try:
+            results = self.model(list(frames), conf=self.confidence_threshold, verbose=False)
+            return [self._parse_result(result, frame.shape) for result, frame in zip(results, frames)]
+        except Exception as e:
+            print(f"Batch detection error: {e}")
+            return [[] for _ in frames]
+
+    def _parse_result(self, result, frame_shape: Tuple[int, ...]) -> List[Dict]:
+        detections = []
+        boxes = result.boxes
+        for box in boxes:
+            cls_id = int(box.cls[0])
+            cls_name = self.model.names[cls_id]
+            
+            if self.classes and cls_name not in self.classes:
+                continue
+            
+            conf = float(box.conf[0])
+            x1, y1, x2, y2 = [int(v) for v in box.xyxy[0].cpu().numpy()]
+            
+            center_x = (x1 + x2) / 2
+            center_y = (y1 + y2) / 2
+            
+            width = float(x2 - x1)
+            height = float(y2 - y1)
+            
+            frame_center_x = frame_shape[1] / 2
+            frame_center_y = frame_shape[0] / 2
+            
+            rel_x = center_x - frame_center_x
+            rel_y = center_y - frame_center_y
+            
+            if abs(rel_x) > abs(rel_y):
+                direction = "left" if rel_x < 0 else "right"
+            else:
+                direction = "front" if rel_y < 0 else "behind"
+            
+            detections.append({
+                'class': cls_name,
+                'confidence': float(conf),
+                'bbox': [int(x1), int(y1), int(x2), int(y2)],
+                'center': (int(center_x), int(center_y)),
+                'size': (width, height),
+                'direction': direction,
+                'priority': self._get_priority(cls_name, height, frame_shape[0])
+            })
+        return detections
+
     def _get_priority(self, class_name: str, bbox_height: float, frame_height: int) -> str:
         height_ratio = bbox_height / frame_height
         
@@ -1,4 +1,3 @@
-import deepface
 import numpy as np
 import cv2
 from typing import List, Tuple, Optional
@@ -6,6 +5,12 @@ import pickle
 from pathlib import Path
 
 
+def _deepface():
+    # DeepFace drags in TensorFlow; defer it until a face is actually processed.
+    from deepface import DeepFace
+    return DeepFace
+
+
 class FaceRecognizer:
     def __init__(self, config: dict, database):
         self.config = config
@@ -17,6 +22,12 @@ class FaceRecognizer:
         self.cooldowns = {}
         self.load_faces()
 
+    def warm_up(self):
+        try:
+            _deepface().build_model(self.model_name)
+        except Exception as e:
+            print(f"Face model warm-up error: {e}")
+
     def load_faces(self):
         faces = self.database.get_all_faces()
         self.known_faces = {}
@@ -33,7 +44,7 @@ class FaceRecognizer:
 
     def add_face(self, image_path: str, name: str, relationship: str) -> Optional[int]:
         try:
-            embedding_objs = deepface.DeepFace.represent(img_path=image_path, model_name=self.model_name, enforce_detection=True)
+            embedding_objs = _deepface().represent(img_path=image_path, model_name=self.model_name, enforce_detection=True)
             if not embedding_objs:
                 return None
             embedding = np.array(embedding_objs[0]['embedding'], dtype=np.float64)
@@ -51,19 +62,21 @@ class FaceRecognizer:
             return None
 
     def recognize(self, frame: np.ndarray, current_time: float) -> List[dict]:
+        return self.apply_cooldowns(self.identify(frame), current_time)
+
+    def identify(self, frame: np.ndarray) -> List[dict]:
         if not self.known_faces:
             return []
 
         try:
             rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            detections = deepface.DeepFace.extract_faces(img_path=rgb_frame, target_size=(224, 224), detector_backend='opencv', enforce_detection=False)
+            detections = _deepface().extract_faces(img_path=rgb_frame, target_size=(224, 224), detector_backend='opencv', enforce_detection=False)
             
             recognitions = []
-            cooldown_seconds = self.config['face_recognition'].get('cooldown_seconds', 60)
             
             for detection in detections:
                 face_img = detection['face']
-                embedding_objs = deepface.DeepFace.represent(img_path=face_img, model_name=self.model_name, enforce_detection=False)
+                embedding_objs = _deepface().represent(img_path=face_img, model_name=self.model_name, enforce_detection=False)
                 if not embedding_objs:
                     continue
                 embedding = np.array(embedding_objs[0]['embedding'], dtype=np.float64)
@@ -81,8 +94,6 @@ class FaceRecognizer:
                     top = y
                     right = x + w
                     bottom = y + h
-                    if self._check_cooldown(best_match_id, current_time, cooldown_seconds):
-                        continue
                     frame_center_x = frame.shape[1] / 2
                     center_x = (left + right) / 2
                     rel_x = center_x - frame_center_x
@@ -100,17 +111,31 @@ class FaceRecognizer:
                         'direction': direction,
                         'distance_feet': float(distance_feet)
                     })
-                    self.cooldowns[best_match_id] = current_time
             return recognitions
         except Exception as e:
             print(f"Face recognition error: {e}")
             return []
 
-    def _check_cooldown(self, face_id: int, current_time: float, cooldown_seconds: int) -> bool:
-        if face_id not in self.cooldowns:
+    def apply_cooldowns(self, recognitions: List[dict], current_time: float,
+                        cooldowns: Optional[dict] = None) -> List[dict]:
+        # Kept apart from identify() so matching can run in worker processes while
+        # cooldown state stays in one place (per session when `cooldowns` is given).
+        cooldowns = self.cooldowns if cooldowns is None else cooldowns
+        cooldown_seconds = self.config['face_recognition'].get('cooldown_seconds', 60)
+        fresh = []
+        for recognition in recognitions:
+            face_id = recognition['face_id']
+            if self._check_cooldown(face_id, current_time, cooldown_seconds, cooldowns):
+                continue
+            fresh.append(recognition)
+            cooldowns[face_id] = current_time
+        return fresh
+
+    def _check_cooldown(self, face_id: int, current_time: float, cooldown_seconds: int, cooldowns: dict) -> bool:
+        if face_id not in cooldowns:
             return False
         
-        elapsed = current_time - self.cooldowns[face_id]
+        elapsed = current_time - cooldowns[face_id]
         return elapsed < cooldown_seconds
 
     def _estimate_distance(self, face_height: float, frame_height: int) -> float:
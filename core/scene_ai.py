@@ -1,113 +1,295 @@
-import google.generativeai as genai
 import os
 import time
+import json
 import base64
+import random
+import hashlib
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import Optional, Dict
 import cv2
-import io
-from PIL import Image
+import numpy as np
+
+
+DESCRIBE_PROMPT = """Describe this scene for a blind person. Focus on:
+- People and their actions
+- Objects and their locations
+- Potential hazards
+- Spatial layout
+Be concise (2-4 sentences)."""
+
+TRAFFIC_LIGHT_PROMPT = "What color is the traffic light in this image? Answer only with: red, yellow, green, or none."
+
+PROMPTS = {
+    'describe': DESCRIBE_PROMPT,
+    'traffic_light': TRAFFIC_LIGHT_PROMPT
+}
+
+
+class SceneAIError(Exception):
+    pass
+
+
+class RateLimitedError(SceneAIError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self, timeout: float = 0) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate if self.rate > 0 else float('inf')
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class SceneBackend:
+    name = 'base'
+
+    def generate(self, prompt: str, image_jpeg: bytes, timeout: float) -> str:
+        raise NotImplementedError
+
+
+class GeminiBackend(SceneBackend):
+    name = 'gemini'
+
+    def __init__(self, api_key: str, model_name: str = 'gemini-pro-vision'):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str, image_jpeg: bytes, timeout: float) -> str:
+        response = self.model.generate_content([prompt, {'mime_type': 'image/jpeg', 'data': image_jpeg}],
+                                               request_options={'timeout': timeout})
+        return response.text.strip()
+
+
+class HTTPBackend(SceneBackend):
+    name = 'http'
+
+    def __init__(self, url: str):
+        self.url = url.rstrip('/') + '/generate'
+
+    def generate(self, prompt: str, image_jpeg: bytes, timeout: float) -> str:
+        body = json.dumps({
+            'prompt': prompt,
+            'image': base64.b64encode(image_jpeg).decode('ascii')
+        }).encode('utf-8')
+        req = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8')).get('text', '').strip()
 
 
 class SceneAI:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, backend: Optional[SceneBackend] = None):
         self.config = config
+        gemini_config = config['gemini']
         self.api_key = os.getenv('GOOGLE_GEMINI_API_KEY')
-        self.model = None
-        self.cache = {}
-        self.cache_duration = config['gemini'].get('cache_duration_seconds', 10)
-        self.rate_limit = config['gemini'].get('rate_limit_per_minute', 15)
-        self.last_request_time = 0
-        self.request_count = 0
-        self.request_window_start = time.time()
-        
-        if self.api_key:
-            try:
-                genai.configure(api_key=self.api_key)
-                self.model = genai.GenerativeModel('gemini-pro-vision')
-            except Exception as e:
-                print(f"Gemini API initialization error: {e}")
+        self.cache = OrderedDict()
+        self.cache_duration = gemini_config.get('cache_duration_seconds', 10)
+        self.cache_max_entries = gemini_config.get('cache_max_entries', 256)
+        self.cache_lock = threading.Lock()
+        self.rate_limit = gemini_config.get('rate_limit_per_minute', 15)
+        self.max_retries = gemini_config.get('max_retries', 3)
+        self.timeout_seconds = gemini_config.get('timeout_seconds', 10)
+        self.max_image_side = gemini_config.get('max_image_side', 640)
+        self.jpeg_quality = gemini_config.get('jpeg_quality', 80)
+        self.limiter = TokenBucket(self.rate_limit, gemini_config.get('burst', 3))
+        self.executor = ThreadPoolExecutor(max_workers=gemini_config.get('max_workers', 2),
+                                           thread_name_prefix='scene-ai')
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'coalesced': 0, 'cache_hits': 0, 'retries': 0, 'failures': 0}
+
+        self.backend = backend if backend is not None else self._create_backend()
+
+    def _create_backend(self) -> Optional[SceneBackend]:
+        backend_name = self.config['gemini'].get('backend', 'gemini')
+        try:
+            if backend_name == 'http':
+                return HTTPBackend(self.config['gemini'].get('http_url', 'http://127.0.0.1:8765'))
+            if self.api_key:
+                return GeminiBackend(self.api_key, self.config['gemini'].get('model_name', 'gemini-pro-vision'))
+        except Exception as e:
+            print(f"Gemini API initialization error: {e}")
+        return None
+
+    @property
+    def available(self) -> bool:
+        return self.backend is not None
+
+    def describe_scene_async(self, frame, cache_key: Optional[str] = None) -> Future:
+        return self.submit('describe', frame, cache_key)
+
+    def detect_traffic_light_async(self, frame) -> Future:
+        return self.submit('traffic_light', frame)
 
     def describe_scene(self, frame, cache_key: Optional[str] = None) -> str:
-        if not self.model:
-            return "Scene description unavailable. Please check API configuration."
-        
-        if cache_key:
-            cached_result = self._get_from_cache(cache_key)
-            if cached_result:
-                return cached_result
-        
-        if not self._check_rate_limit():
-            return "Rate limit reached. Please wait a moment."
-        
+        # Failures raise SceneAIError with a message that can be spoken, so callers can
+        # tell them apart from a description worth keeping.
+        if not self.available:
+            raise SceneAIError("Scene description unavailable. Please check API configuration.")
+
         try:
-            _, buffer = cv2.imencode('.jpg', frame)
-            image_bytes = buffer.tobytes()
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            prompt = """Describe this scene for a blind person. Focus on:
-- People and their actions
-- Objects and their locations
-- Potential hazards
-- Spatial layout
-Be concise (2-4 sentences)."""
-            
-            response = self.model.generate_content([prompt, image])
-            description = response.text.strip()
-            
-            if cache_key:
-                self._save_to_cache(cache_key, description)
-            
-            return description
+            return self._wait(self.describe_scene_async(frame, cache_key))
+        except RateLimitedError:
+            raise SceneAIError("Rate limit reached. Please wait a moment.")
         except Exception as e:
             print(f"Gemini API error: {e}")
-            return "Unable to analyze scene. Please try again."
+            raise SceneAIError("Unable to analyze scene. Please try again.")
 
     def detect_traffic_light(self, frame) -> Optional[str]:
-        if not self.model:
+        if not self.available:
             return None
-        
+
         try:
-            _, buffer = cv2.imencode('.jpg', frame)
-            image_bytes = buffer.tobytes()
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            prompt = "What color is the traffic light in this image? Answer only with: red, yellow, green, or none."
-            
-            response = self.model.generate_content([prompt, image])
-            color = response.text.strip().lower()
-            
-            if color in ['red', 'yellow', 'green']:
-                return color
-            return None
+            color = self._wait(self.detect_traffic_light_async(frame)).lower()
         except Exception as e:
             print(f"Traffic light detection error: {e}")
             return None
 
-    def _check_rate_limit(self) -> bool:
-        current_time = time.time()
-        
-        if current_time - self.request_window_start > 60:
-            self.request_window_start = current_time
-            self.request_count = 0
-        
-        if self.request_count >= self.rate_limit:
-            return False
-        
-        self.request_count += 1
-        return True
+        if color in ['red', 'yellow', 'green']:
+            return color
+        return None
+
+    def _wait(self, future: Future) -> str:
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            raise SceneAIError("Scene analysis timed out")
+
+    def submit(self, kind: str, frame, cache_key: Optional[str] = None) -> Future:
+        key = f"{kind}:{cache_key or self._fingerprint(frame)}"
+
+        cached_result = self._get_from_cache(key)
+        if cached_result is not None:
+            self.stats['cache_hits'] += 1
+            future = Future()
+            future.set_result(cached_result)
+            return future
+
+        with self.lock:
+            future = self.inflight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+                return future
+
+            if not self.available:
+                future = Future()
+                future.set_exception(SceneAIError("Scene analysis backend unavailable"))
+                return future
+
+            self.stats['requests'] += 1
+            deadline = time.monotonic() + self.timeout_seconds
+            future = self.executor.submit(self._run, kind, frame, key, deadline)
+            self.inflight[key] = future
+
+        future.add_done_callback(lambda _: self._release(key))
+        return future
+
+    def _release(self, key: str):
+        with self.lock:
+            self.inflight.pop(key, None)
+
+    def _run(self, kind: str, frame, key: str, deadline: float) -> str:
+        image_jpeg = self._encode(frame)
+        prompt = PROMPTS[kind]
+        attempt = 0
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stats['failures'] += 1
+                raise SceneAIError("Scene analysis deadline exceeded")
+
+            if not self.limiter.acquire(timeout=remaining):
+                self.stats['failures'] += 1
+                raise RateLimitedError("Rate limit reached")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stats['failures'] += 1
+                raise SceneAIError("Scene analysis deadline exceeded")
+
+            try:
+                result = self.backend.generate(prompt, image_jpeg, remaining)
+                self._save_to_cache(key, result)
+                return result
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    self.stats['failures'] += 1
+                    raise SceneAIError(f"Scene analysis failed after {attempt} attempts: {e}")
+                self.stats['retries'] += 1
+                backoff = min(2.0, 0.25 * (2 ** (attempt - 1))) * random.uniform(0.5, 1.0)
+                time.sleep(max(0.0, min(backoff, deadline - time.monotonic())))
+
+    def _encode(self, frame) -> bytes:
+        height, width = frame.shape[:2]
+        scale = self.max_image_side / float(max(height, width))
+        if scale < 1.0:
+            frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ret:
+            raise SceneAIError("Could not encode frame")
+        return buffer.tobytes()
+
+    def _fingerprint(self, frame) -> str:
+        thumb = cv2.resize(frame, (16, 16), interpolation=cv2.INTER_AREA)
+        quantized = (np.asarray(thumb, dtype=np.uint8) >> 4).tobytes()
+        return hashlib.sha1(quantized).hexdigest()
 
     def _get_from_cache(self, key: str) -> Optional[str]:
-        if key in self.cache:
-            entry = self.cache[key]
+        with self.cache_lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
             if time.time() - entry['timestamp'] < self.cache_duration:
                 return entry['value']
-            else:
-                del self.cache[key]
+            self.cache.pop(key, None)
         return None
 
     def _save_to_cache(self, key: str, value: str):
-        self.cache[key] = {
-            'value': value,
-            'timestamp': time.time()
-        }
+        now = time.time()
+        with self.cache_lock:
+            self.cache[key] = {
+                'value': value,
+                'timestamp': now
+            }
+            self.cache.move_to_end(key)
+            # Entries stay in insertion order, oldest first. A live camera produces a new
+            # fingerprint most frames, so expired ones are swept here rather than waiting
+            # for the same key to come back.
+            while self.cache:
+                oldest_key, oldest = next(iter(self.cache.items()))
+                if len(self.cache) <= self.cache_max_entries and now - oldest['timestamp'] < self.cache_duration:
+                    break
+                self.cache.pop(oldest_key)
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, inflight=len(self.inflight))
 
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,240 @@
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.metrics import stream_frames_total, stream_latency_seconds, stage_seconds, frames_total, errors_total
+from utils.profiler import tracer, timed_stage
+
+
+class Stream:
+    def __init__(self, name: str, weight: float = 1.0, priority: int = 0, frame_skip: int = 1):
+        self.name = name
+        self.weight = max(float(weight), 0.01)
+        self.priority = priority
+        self.frame_skip = max(1, frame_skip)
+        self.pending = None
+        self.seen = 0
+        self.virtual_time = 0.0
+        self.last_started = 0.0
+        self.counts = {'submitted': 0, 'skipped': 0, 'dropped': 0, 'processed': 0, 'errors': 0}
+        self.completed_at = deque(maxlen=50)
+
+
+class InferenceScheduler:
+    def __init__(self, config: dict, infer: Callable[[List[np.ndarray]], List[object]],
+                 handle: Callable[[str, int, float, np.ndarray, object], None]):
+        scheduler_config = config.get('scheduler', {})
+        self.policy = scheduler_config.get('policy', 'fair')
+        self.max_batch = scheduler_config.get('max_batch', 4)
+        self.batch_wait = scheduler_config.get('batch_wait_ms', 5) / 1000.0
+        self.thread_count = scheduler_config.get('threads', 1)
+        self.frame_skip = max(1, config['detection'].get('frame_skip', 2))
+        self.min_interval = 1.0 / config['detection'].get('target_fps', 15)
+        self.infer = infer
+        self.handle = handle
+        self.streams = {}
+        self.condition = threading.Condition()
+        self.handle_lock = threading.Lock()
+        self.threads = []
+        self.running = False
+
+    def add_stream(self, name: str, weight: float = 1.0, priority: int = 0, frame_skip: Optional[int] = None):
+        with self.condition:
+            stream = Stream(name, weight, priority, self.frame_skip if frame_skip is None else frame_skip)
+            # Start level with the others so a newcomer cannot monopolise the model.
+            if self.streams:
+                stream.virtual_time = min(s.virtual_time for s in self.streams.values())
+            self.streams[name] = stream
+
+    def remove_stream(self, name: str):
+        with self.condition:
+            self.streams.pop(name, None)
+        # Per-stream series would otherwise pile up as sessions come and go.
+        stream_frames_total.remove(camera=name)
+        stream_latency_seconds.remove(camera=name)
+
+    def submit(self, name: str, sequence: int, timestamp: float, frame: np.ndarray):
+        with self.condition:
+            stream = self.streams.get(name)
+            if stream is None or not self.running:
+                return
+            stream.seen += 1
+            if stream.seen % stream.frame_skip != 0:
+                stream.counts['skipped'] += 1
+                stream_frames_total.inc(camera=name, outcome='skipped')
+                frames_total.inc(outcome='skipped')
+                return
+            # Latest frame wins: a stream that is behind loses its stale frame rather
+            # than queueing latency.
+            if stream.pending is not None:
+                stream.counts['dropped'] += 1
+                stream_frames_total.inc(camera=name, outcome='dropped')
+                frames_total.inc(outcome='dropped')
+            stream.pending = (sequence, timestamp, frame)
+            stream.counts['submitted'] += 1
+            self.condition.notify()
+
+    def is_behind(self, name: str) -> bool:
+        # The stream's last frame is still waiting for the model.
+        with self.condition:
+            stream = self.streams.get(name)
+            return stream is not None and stream.pending is not None
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.threads = [threading.Thread(target=self._run, name=f"inference-scheduler-{i}", daemon=True)
+                        for i in range(self.thread_count)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout: float = 3.0):
+        with self.condition:
+            self.running = False
+            for stream in self.streams.values():
+                stream.pending = None
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def _eligible(self, now: float) -> List[Stream]:
+        ready = [s for s in self.streams.values()
+                 if s.pending is not None and now - s.last_started >= self.min_interval]
+        if self.policy == 'priority':
+            ready.sort(key=lambda s: (-s.priority, s.virtual_time))
+        else:
+            # Weighted fair share: lowest virtual time goes first, and each frame served
+            # advances a stream's clock by 1/weight.
+            ready.sort(key=lambda s: s.virtual_time)
+        return ready
+
+    def _next_batch(self) -> Optional[List[Tuple[Stream, Tuple[int, float, np.ndarray]]]]:
+        with self.condition:
+            while self.running:
+                now = time.time()
+                ready = self._eligible(now)
+                if ready:
+                    if len(ready) < self.max_batch and self.batch_wait > 0 and \
+                            any(s.pending is None for s in self.streams.values()):
+                        # Give other cameras a moment to land a frame in the same batch.
+                        self.condition.wait(self.batch_wait)
+                        now = time.time()
+                        ready = self._eligible(now)
+                        if not ready:
+                            continue
+                    batch = []
+                    for stream in ready[:self.max_batch]:
+                        batch.append((stream, stream.pending))
+                        stream.pending = None
+                        stream.last_started = now
+                        stream.virtual_time += 1.0 / stream.weight
+                    return batch
+                waiting = [s for s in self.streams.values() if s.pending is not None]
+                timeout = None
+                if waiting:
+                    timeout = max(0.001, min(s.last_started + self.min_interval for s in waiting) - now)
+                self.condition.wait(timeout)
+            return None
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            frames = [item[2] for _, item in batch]
+            tracer.set_frame(batch[0][1][0])
+            infer_start = time.perf_counter()
+            try:
+                results = self.infer(frames)
+            except Exception as e:
+                print(f"Inference scheduler error: {e}")
+                errors_total.inc(component='scheduler')
+                with self.condition:
+                    for stream, _ in batch:
+                        stream.counts['errors'] += 1
+                for stream, _ in batch:
+                    stream_frames_total.inc(camera=stream.name, outcome='error')
+                    frames_total.inc(outcome='error')
+                continue
+            infer_seconds = time.perf_counter() - infer_start
+
+            # Inference may overlap across threads; alert and state handling does not.
+            with self.handle_lock:
+                for (stream, (sequence, timestamp, frame)), result in zip(batch, results):
+                    if result is None:
+                        # The model never saw this frame (workers busy or unavailable); it
+                        # must not be reported as a frame with nothing in it.
+                        stream_frames_total.inc(camera=stream.name, outcome='dropped')
+                        frames_total.inc(outcome='dropped')
+                        with self.condition:
+                            stream.counts['dropped'] += 1
+                        continue
+                    tracer.set_frame(sequence)
+                    handle_start = time.perf_counter()
+                    try:
+                        self.handle(stream.name, sequence, timestamp, frame, result)
+                        outcome = 'processed'
+                    except Exception as e:
+                        print(f"Frame handling error on {stream.name}: {e}")
+                        errors_total.inc(component='process_frame')
+                        outcome = 'error'
+                    finished = time.time()
+                    # frame is processing time (the batch's inference plus this frame's
+                    # handling); stream_latency_seconds covers capture to handled.
+                    stage_seconds.observe(infer_seconds + time.perf_counter() - handle_start, stage='frame')
+                    stream_latency_seconds.observe(finished - timestamp, camera=stream.name)
+                    stream_frames_total.inc(camera=stream.name, outcome=outcome)
+                    frames_total.inc(outcome=outcome)
+                    with self.condition:
+                        stream.counts[outcome if outcome == 'processed' else 'errors'] += 1
+                        stream.completed_at.append(finished)
+
+    def get_stats(self) -> Dict:
+        latency = stream_latency_seconds.snapshot()
+        with self.condition:
+            streams = {}
+            for name, stream in self.streams.items():
+                completed = list(stream.completed_at)
+                span = completed[-1] - completed[0] if len(completed) > 1 else 0
+                streams[name] = dict(stream.counts,
+                                     weight=stream.weight,
+                                     priority=stream.priority,
+                                     fps=round((len(completed) - 1) / span, 2) if span > 0 else 0.0,
+                                     latency=latency.get(name))
+        return {'policy': self.policy, 'max_batch': self.max_batch, 'running': self.running, 'streams': streams}
+
+
+def infer_batch(frames: List[np.ndarray], detector=None, face_recognizer=None, workers=None) -> List[Tuple]:
+    # Returns (detections, face matches or None) per frame, or None for a frame detection
+    # could not run on. Offloaded stages start together on one shared-memory copy of each
+    # frame; anything not accepted runs in-process.
+    stages = [stage for stage, instance in (('detect', detector), ('faces', face_recognizer)) if instance]
+    offloaded = [workers.submit(frame, stages) if workers else {} for frame in frames]
+
+    detections = [[] for _ in frames]
+    local = [i for i, pending in enumerate(offloaded) if 'detect' not in pending]
+    if detector and local:
+        with timed_stage('detect', batch=len(local)):
+            for i, result in zip(local, detector.detect_batch([frames[i] for i in local])):
+                detections[i] = result
+    for i, pending in enumerate(offloaded):
+        if 'detect' in pending:
+            with timed_stage('detect'):
+                detections[i] = workers.collect(pending['detect'])
+
+    face_matches = [None] * len(frames)
+    for i, frame in enumerate(frames):
+        if 'faces' in offloaded[i]:
+            with timed_stage('face'):
+                face_matches[i] = workers.collect(offloaded[i]['faces'], [])
+        elif face_recognizer:
+            with timed_stage('face'):
+                face_matches[i] = face_recognizer.identify(frame)
+
+    return [None if detections[i] is None else (detections[i], face_matches[i]) for i in range(len(frames))]
@@ -0,0 +1,179 @@
+import time
+import uuid
+import threading
+from typing import Callable, Dict, List, Optional
+
+from core.alerts import AlertManager, AlertAggregator
+from core.scheduler import InferenceScheduler
+from core.traffic_light import TrafficLightClassifier
+from core.world_state import WorldState
+
+
+class Session:
+    def __init__(self, session_id: str, config: dict, cameras: Dict[str, object], local: bool = True,
+                 weight: float = 1.0, label: Optional[str] = None):
+        self.session_id = session_id
+        self.room = f"session:{session_id}"
+        self.label = label
+        self.cameras = cameras
+        self.primary_camera = next(iter(cameras.values())) if cameras else None
+        # A local session owns the server's speakers and microphone; remote sessions are
+        # spoken to through their Socket.IO room.
+        self.local = local
+        self.weight = weight
+        self.alert_manager = AlertManager(config)
+        self.alert_aggregator = AlertAggregator(config)
+        self.traffic_light_classifier = TrafficLightClassifier(config)
+        self.world_state = WorldState(config)
+        self.face_cooldowns = {}
+        self.start_time = time.time()
+        self.last_activity = self.start_time
+        self.frame_count = 0
+        self.alert_count = 0
+        self.active = False
+        self.voice_listening = False
+
+    def stream_name(self, camera_name: str) -> str:
+        return f"{self.session_id}/{camera_name}"
+
+    def start(self) -> List[str]:
+        started = [name for name, camera in self.cameras.items() if camera.start()]
+        self.active = bool(started)
+        self.last_activity = time.time()
+        return started
+
+    def stop(self):
+        self.active = False
+        for camera in self.cameras.values():
+            camera.stop()
+        self.world_state.clear()
+
+    def get_status(self) -> Dict:
+        return {
+            'session_id': self.session_id,
+            'label': self.label,
+            'local': self.local,
+            'active': self.active,
+            'start_time': self.start_time,
+            'frame_count': self.frame_count,
+            'alert_count': self.alert_count,
+            'cameras': {name: camera.is_running() for name, camera in self.cameras.items()}
+        }
+
+
+class SessionManager:
+    def __init__(self, config: dict, infer: Callable, handle: Callable):
+        sessions_config = config.get('sessions', {})
+        self.config = config
+        self.max_sessions = sessions_config.get('max_sessions', 8)
+        self.idle_timeout = config['alerts'].get('auto_pause_inactivity_minutes', 15) * 60
+        self.handle = handle
+        self.on_idle = None
+        self.sessions = {}
+        self.streams = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.monitor = None
+        # One scheduler for every session, so all of them share the loaded models.
+        self.scheduler = InferenceScheduler(config, infer, self._dispatch)
+
+    def start(self):
+        self.scheduler.start()
+        if self.monitor is None:
+            self.monitor = threading.Thread(target=self._watch_idle, name='session-monitor', daemon=True)
+            self.monitor.start()
+
+    def create(self, cameras: Dict[str, object], local: bool = True, weight: float = 1.0,
+               label: Optional[str] = None) -> Session:
+        with self.lock:
+            if len(self.sessions) >= self.max_sessions:
+                raise RuntimeError(f"Session limit reached ({self.max_sessions})")
+            if local and any(s.local for s in self.sessions.values()):
+                raise RuntimeError("A local session is already running")
+            session = Session(str(uuid.uuid4()), self.config, cameras, local, weight, label)
+            self.sessions[session.session_id] = session
+
+        # Cameras within a session split the session's share, so a session with three
+        # cameras gets no more inference than one with a single camera.
+        total_weight = sum(c.camera_config.get('weight', 1) for c in cameras.values()) or 1
+        for name, camera in cameras.items():
+            stream = session.stream_name(name)
+            self.streams[stream] = (session, name)
+            self.scheduler.add_stream(stream, weight * camera.camera_config.get('weight', 1) / total_weight,
+                                      camera.camera_config.get('priority', 0), camera.camera_config.get('frame_skip'))
+            camera.add_listener(lambda camera_name, sequence, timestamp, frame, session=session:
+                                self.scheduler.submit(session.stream_name(camera_name), sequence, timestamp, frame))
+        return session
+
+    def remove(self, session_id: str) -> Optional[Session]:
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return None
+        session.stop()
+        for name in session.cameras:
+            stream = session.stream_name(name)
+            self.scheduler.remove_stream(stream)
+            self.streams.pop(stream, None)
+        return session
+
+    def get(self, session_id: Optional[str]) -> Optional[Session]:
+        return self.sessions.get(session_id) if session_id else None
+
+    def resolve(self, session_id: Optional[str] = None) -> Optional[Session]:
+        # Requests without a session id mean the local session, or the only one running.
+        if session_id:
+            return self.sessions.get(session_id)
+        sessions = list(self.sessions.values())
+        local = next((s for s in sessions if s.local), None)
+        if local is not None:
+            return local
+        return sessions[0] if len(sessions) == 1 else None
+
+    def local_session(self) -> Optional[Session]:
+        return next((s for s in list(self.sessions.values()) if s.local), None)
+
+    def list(self) -> List[Session]:
+        return list(self.sessions.values())
+
+    def is_behind(self, session: Session, camera_name: str) -> bool:
+        return self.scheduler.is_behind(session.stream_name(camera_name))
+
+    def _dispatch(self, stream: str, sequence: int, timestamp: float, frame, result):
+        entry = self.streams.get(stream)
+        if entry is None:
+            return
+        session, camera_name = entry
+        if session.active:
+            self.handle(session, camera_name, sequence, timestamp, frame, result)
+
+    def _watch_idle(self):
+        while not self.stop_event.wait(1.0):
+            now = time.time()
+            for session in self.list():
+                if session.active and now - session.last_activity > self.idle_timeout:
+                    session.active = False
+                    if self.on_idle is not None:
+                        try:
+                            self.on_idle(session)
+                        except Exception as e:
+                            print(f"Session idle handler error: {e}")
+
+    def get_stats(self) -> Dict:
+        stats = self.scheduler.get_stats()
+        sessions = {}
+        for stream, info in stats.pop('streams').items():
+            entry = self.streams.get(stream)
+            if entry is None:
+                continue
+            session, camera_name = entry
+            info['running'] = session.cameras[camera_name].is_running()
+            sessions.setdefault(session.session_id, {})[camera_name] = info
+        stats['sessions'] = sessions
+        return stats
+
+    def shutdown(self):
+        self.stop_event.set()
+        for session in self.list():
+            self.remove(session.session_id)
+        self.scheduler.stop()
@@ -0,0 +1,221 @@
+import re
+import time
+import heapq
+import itertools
+import threading
+from typing import Optional, Callable, Dict
+
+
+PRIORITY_RANK = {'critical': 0, 'important': 1, 'informational': 2}
+
+DEFAULT_TTL = {'critical': 5, 'important': 15, 'informational': 4}
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+
+class SpeechItem:
+    __slots__ = ('text', 'sentences', 'priority', 'rank', 'key', 'created', 'expires', 'cancelled')
+
+    def __init__(self, text: str, priority: str, key: Optional[str], ttl: float):
+        self.text = text
+        self.sentences = [s for s in SENTENCE_SPLIT.split(text.strip()) if s]
+        self.priority = priority
+        self.rank = PRIORITY_RANK.get(priority, PRIORITY_RANK['informational'])
+        self.key = key or text
+        self.created = time.time()
+        self.expires = self.created + ttl
+        self.cancelled = False
+
+
+class SpeechScheduler:
+    def __init__(self, config: dict, say: Callable[[str], None], stop: Optional[Callable[[], None]] = None,
+                 idle: Optional[Callable[[], bool]] = None):
+        self.config = config
+        self.say = say
+        self.stop_current = stop
+        self.idle = idle
+        self.ttl = dict(DEFAULT_TTL, **config['voice'].get('speech_ttl_seconds', {}))
+        self.max_queue = config['voice'].get('max_speech_queue', 20)
+        self.heap = []
+        self.pending = {}
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.current = None
+        self.running = True
+        self.idle_pending = idle is not None
+        self.idle_generation = 0
+        self.lag_listeners = []
+        self.metrics = {
+            'spoken': 0,
+            'superseded': 0,
+            'expired': 0,
+            'preempted': 0,
+            'overflow': 0,
+            'last_lag_seconds': 0.0,
+            'max_lag_seconds': 0.0
+        }
+        self.thread = threading.Thread(target=self._run, name='speech-scheduler', daemon=True)
+        self.thread.start()
+
+    def add_lag_listener(self, callback: Callable[[float, str], None]):
+        self.lag_listeners.append(callback)
+
+    def submit(self, text: str, priority: str = 'important', key: Optional[str] = None,
+               ttl: Optional[float] = None) -> bool:
+        if not text or not text.strip():
+            return False
+
+        item = SpeechItem(text, priority, key, ttl if ttl is not None else self.ttl.get(priority, 5))
+
+        with self.condition:
+            existing = self.pending.get(item.key)
+            if existing is not None:
+                if existing.text == item.text and existing.rank <= item.rank:
+                    return False
+                existing.cancelled = True
+                self.metrics['superseded'] += 1
+
+            if self.current is not None and self.current.key == item.key and self.current.text == item.text:
+                return False
+
+            self.pending[item.key] = item
+            heapq.heappush(self.heap, (item.rank, next(self.sequence), item))
+            self._enforce_bound()
+            self.condition.notify()
+        return True
+
+    def _enforce_bound(self):
+        while len(self.pending) > self.max_queue:
+            victim = max(self.pending.values(), key=lambda i: (i.rank, -i.created))
+            victim.cancelled = True
+            self.pending.pop(victim.key, None)
+            self.metrics['overflow'] += 1
+
+    def _next_item(self) -> Optional[SpeechItem]:
+        now = time.time()
+        while self.heap:
+            _, _, item = heapq.heappop(self.heap)
+            if item.cancelled:
+                continue
+            if self.pending.get(item.key) is item:
+                del self.pending[item.key]
+            if now > item.expires:
+                self.metrics['expired'] += 1
+                continue
+            return item
+        return None
+
+    def _should_preempt(self, item: SpeechItem) -> bool:
+        for rank, _, queued in self.heap:
+            if not queued.cancelled and rank == PRIORITY_RANK['critical'] and rank < item.rank:
+                return True
+        return False
+
+    def _run(self):
+        while self.running:
+            with self.condition:
+                item = self._next_item()
+                while item is None and self.running and not self.idle_pending:
+                    self.condition.wait()
+                    item = self._next_item()
+                if item is not None:
+                    self.current = item
+                    lag = time.time() - item.created
+                    self.metrics['last_lag_seconds'] = lag
+                    self.metrics['max_lag_seconds'] = max(self.metrics['max_lag_seconds'], lag)
+
+            if not self.running:
+                break
+
+            if item is None:
+                self._run_idle()
+                continue
+
+            for listener in self.lag_listeners:
+                try:
+                    listener(lag, item.priority)
+                except Exception as e:
+                    print(f"Speech lag listener error: {e}")
+
+            self._speak_item(item)
+
+            with self.condition:
+                self.current = None
+
+    def _run_idle(self):
+        with self.condition:
+            generation = self.idle_generation
+        try:
+            more = self.idle()
+        except Exception as e:
+            print(f"Speech idle task error: {e}")
+            more = False
+        with self.condition:
+            if not more and generation == self.idle_generation:
+                self.idle_pending = False
+
+    def notify_idle_work(self):
+        with self.condition:
+            self.idle_generation += 1
+            self.idle_pending = self.idle is not None
+            self.condition.notify()
+
+    def _speak_item(self, item: SpeechItem):
+        while item.sentences and not item.cancelled:
+            sentence = item.sentences.pop(0)
+            try:
+                self.say(sentence)
+            except Exception as e:
+                print(f"Speech error: {e}")
+                return
+
+            if not item.sentences:
+                self.metrics['spoken'] += 1
+                return
+
+            with self.condition:
+                if self._should_preempt(item):
+                    self.metrics['preempted'] += 1
+                    if time.time() < item.expires and item.rank < PRIORITY_RANK['informational']:
+                        item.text = ' '.join(item.sentences)
+                        if self.pending.setdefault(item.key, item) is item:
+                            heapq.heappush(self.heap, (item.rank, next(self.sequence), item))
+                    return
+
+    def interrupt(self, keep_critical: bool = True):
+        with self.condition:
+            for key, item in list(self.pending.items()):
+                if keep_critical and item.rank == PRIORITY_RANK['critical']:
+                    continue
+                item.cancelled = True
+                del self.pending[key]
+            if self.current is not None:
+                self.current.cancelled = True
+        if self.stop_current:
+            try:
+                self.stop_current()
+            except Exception:
+                pass
+
+    def queue_depth(self) -> int:
+        with self.condition:
+            return len(self.pending)
+
+    def get_metrics(self) -> Dict:
+        with self.condition:
+            depth_by_priority = dict.fromkeys(PRIORITY_RANK, 0)
+            for item in self.pending.values():
+                depth_by_priority[item.priority] = depth_by_priority.get(item.priority, 0) + 1
+            oldest = min((item.created for item in self.pending.values()), default=None)
+            return dict(
+                self.metrics,
+                queue_depth=len(self.pending),
+                queue_depth_by_priority=depth_by_priority,
+                current_lag_seconds=(time.time() - oldest) if oldest else 0.0,
+                speaking=self.current is not None
+            )
+
+    def shutdown(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
@@ -0,0 +1,142 @@
+import time
+import threading
+from collections import deque
+from typing import List, Dict, Optional, Tuple
+import cv2
+import numpy as np
+
+
+STATES = ('red', 'yellow', 'green')
+
+# Hue ranges on OpenCV's 0-179 scale; red wraps around 0.
+HUE_RANGES = {
+    'red': [(0, 10), (160, 179)],
+    'yellow': [(15, 35)],
+    'green': [(40, 95)]
+}
+
+# Band index of each lamp in a vertical housing: top, middle, bottom.
+LAMP_BAND = {'red': 0, 'yellow': 1, 'green': 2}
+
+CROP_WIDTH = 24
+CROP_HEIGHT = 60
+
+
+class TrafficLightClassifier:
+    def __init__(self, config: dict):
+        self.config = config
+        light_config = config.get('traffic_light', {})
+        self.min_confidence = light_config.get('min_confidence', 0.6)
+        self.min_lit_fraction = light_config.get('min_lit_fraction', 0.02)
+        self.max_age = light_config.get('max_age_seconds', 2.0)
+        self.saturation_min = light_config.get('saturation_min', 90)
+        self.value_min = light_config.get('value_min', 140)
+        self.history = deque(maxlen=light_config.get('smoothing_window', 5))
+        self.lock = threading.Lock()
+
+    def classify(self, frame: np.ndarray, detections: List[Dict]) -> Tuple[Optional[str], float]:
+        boxes = [d['bbox'] for d in detections if d['class'] == 'traffic light']
+        if not boxes:
+            return None, 0.0
+
+        crops, areas = self._extract_crops(frame, boxes)
+        if not crops:
+            return None, 0.0
+
+        scores = self._score_crops(np.stack(crops))
+        weights = np.asarray(areas, dtype=np.float32)
+        weights /= weights.sum()
+        combined = (scores * weights[:, None]).sum(axis=0)
+
+        total = combined.sum()
+        if total <= 0:
+            return None, 0.0
+
+        best = int(np.argmax(combined))
+        return STATES[best], float(combined[best] / total)
+
+    def _extract_crops(self, frame: np.ndarray, boxes: List[List[int]]) -> Tuple[List[np.ndarray], List[int]]:
+        height, width = frame.shape[:2]
+        crops = []
+        areas = []
+
+        for x1, y1, x2, y2 in boxes:
+            x1, x2 = max(0, x1), min(width, x2)
+            y1, y2 = max(0, y1), min(height, y2)
+            if x2 - x1 < 3 or y2 - y1 < 3:
+                continue
+
+            crop = frame[y1:y2, x1:x2]
+            if crop.shape[1] > crop.shape[0]:
+                # Horizontal housings run red-yellow-green left to right.
+                crop = cv2.rotate(crop, cv2.ROTATE_90_CLOCKWISE)
+            crops.append(cv2.resize(crop, (CROP_WIDTH, CROP_HEIGHT), interpolation=cv2.INTER_AREA))
+            areas.append((x2 - x1) * (y2 - y1))
+
+        return crops, areas
+
+    def _score_crops(self, crops: np.ndarray) -> np.ndarray:
+        count = crops.shape[0]
+        # One colour conversion for the whole batch: stack crops vertically and split back.
+        hsv = cv2.cvtColor(crops.reshape(count * CROP_HEIGHT, CROP_WIDTH, 3), cv2.COLOR_BGR2HSV)
+        hsv = hsv.reshape(count, CROP_HEIGHT, CROP_WIDTH, 3)
+        hue = hsv[..., 0]
+        value = hsv[..., 2]
+
+        lit = (hsv[..., 1] >= self.saturation_min) & (value >= self.value_min)
+        band_height = CROP_HEIGHT // 3
+        band_brightness = value[:, :band_height * 3].reshape(count, 3, -1).mean(axis=2)
+        brightest_band = np.argmax(band_brightness, axis=1)
+
+        scores = np.zeros((count, len(STATES)), dtype=np.float32)
+        for index, state in enumerate(STATES):
+            mask = np.zeros_like(lit)
+            for low, high in HUE_RANGES[state]:
+                mask |= (hue >= low) & (hue <= high)
+            mask &= lit
+
+            fraction = mask.reshape(count, -1).mean(axis=1)
+            band = LAMP_BAND[state]
+            in_band = mask[:, band * band_height:(band + 1) * band_height].reshape(count, -1).sum(axis=1)
+            position = in_band / np.maximum(mask.reshape(count, -1).sum(axis=1), 1)
+
+            score = fraction * (0.5 + 0.5 * position)
+            score = score * np.where(brightest_band == band, 1.25, 1.0)
+            scores[:, index] = np.where(fraction >= self.min_lit_fraction, score, 0.0)
+
+        return scores
+
+    def update(self, frame: np.ndarray, detections: List[Dict], timestamp: Optional[float] = None) -> Tuple[Optional[str], float]:
+        state, confidence = self.classify(frame, detections)
+        if state is not None:
+            with self.lock:
+                self.history.append((timestamp or time.time(), state, confidence))
+        return state, confidence
+
+    def current_state(self) -> Tuple[Optional[str], float]:
+        now = time.time()
+        with self.lock:
+            recent = [(t, s, c) for t, s, c in self.history if now - t <= self.max_age]
+
+        if not recent:
+            return None, 0.0
+
+        votes = dict.fromkeys(STATES, 0.0)
+        for t, state, confidence in recent:
+            # Newer frames count more so a change of light wins within a couple of frames.
+            votes[state] += confidence * (0.5 ** ((now - t) / max(self.max_age / 2, 1e-3)))
+
+        total = sum(votes.values())
+        if total <= 0:
+            return None, 0.0
+
+        best = max(votes, key=votes.get)
+        agreeing = [c for _, s, c in recent if s == best]
+        return best, (votes[best] / total) * (sum(agreeing) / len(agreeing))
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= self.min_confidence
+
+    def reset(self):
+        with self.lock:
+            self.history.clear()
@@ -0,0 +1,240 @@
+import io
+import os
+import re
+import wave
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Optional, List, Tuple, Iterable
+
+
+DISTANCES = ['very close', 'close', 'medium']
+DIRECTIONS = ['left', 'right', 'front', 'behind']
+FACE_DISTANCES_FEET = [3, 5, 8, 12]
+PREFIXES = ['warning', 'alert']
+SUMMARY_DIRECTIONS = ['on your left', 'on your right', 'in front', 'behind you']
+
+# Alert messages are split into a speaker prefix, a variable name and a fixed tail so
+# that every piece comes from a small vocabulary that can be rendered ahead of time.
+TEMPLATES = [
+    re.compile(r'^(?:(WARNING|Alert): )?(.+?) (detected (?:very close|close|medium) distance from your (?:left|right|front|behind))!?$'),
+    re.compile(r'^(?:(WARNING|Alert): )?(.+?) (is \d+ feet in front of you)$'),
+    re.compile(r'^(?:(WARNING|Alert): )?(.+?) (in view)$'),
+    re.compile(r'^(?:(WARNING|Alert): )?(.+?) ((?:very close |close )?(?:on your left|on your right|in front|behind you))$'),
+    re.compile(r'^(?:(WARNING|Alert): )?(and) (\d+ more)$')
+]
+
+FRAGMENT_GAP_SECONDS = 0.06
+PLAYBACK_CHUNK_FRAMES = 1024
+
+
+def split_fragments(text: str) -> Optional[List[str]]:
+    fragments = []
+    # Aggregated alerts join several clauses with commas; each clause must match a template.
+    for clause in text.strip().split(', '):
+        for template in TEMPLATES:
+            match = template.match(clause)
+            if match:
+                prefix, subject, tail = match.groups()
+                if prefix:
+                    fragments.append(prefix.lower())
+                fragments.extend([subject.lower(), tail.lower()])
+                break
+        else:
+            return None
+    return fragments
+
+
+def encode_wav(pcm: bytes, params: tuple) -> bytes:
+    channels, sample_width, rate = params
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(rate)
+        wav.writeframes(pcm)
+    return output.getvalue()
+
+
+def alert_vocabulary(classes: Iterable[str]) -> List[str]:
+    phrases = list(PREFIXES)
+    phrases.extend(c.lower() for c in classes)
+    phrases.extend(f"detected {d} distance from your {direction}" for d in DISTANCES for direction in DIRECTIONS)
+    phrases.extend(f"is {feet} feet in front of you" for feet in FACE_DISTANCES_FEET)
+    phrases.append('in view')
+    phrases.extend(f"{d}{p}" for d in ['', 'close ', 'very close '] for p in SUMMARY_DIRECTIONS)
+    return phrases
+
+
+class PhraseCache:
+    def __init__(self, config: dict):
+        self.config = config
+        voice_config = config['voice']
+        self.cache_dir = voice_config.get('tts_cache_dir', 'cache/tts')
+        self.max_entries = voice_config.get('tts_cache_max_entries', 500)
+        self.index = OrderedDict()
+        self.buffers = OrderedDict()
+        self.max_buffers = voice_config.get('tts_cache_memory_entries', 128)
+        self.pending = deque()
+        self.pending_set = set()
+        self.vocabulary = set()
+        self.failed = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.audio = None
+        self.stats = {'hits': 0, 'misses': 0, 'rendered': 0, 'evicted': 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.wav'):
+                path = os.path.join(self.cache_dir, filename)
+                entries.append((os.path.getmtime(path), filename[:-4], path))
+        for _, key, path in sorted(entries):
+            self.index[key] = path
+
+    def _key(self, phrase: str) -> str:
+        voice_config = self.config['voice']
+        signature = f"{voice_config.get('tts_rate', 150)}:{voice_config.get('tts_volume', 0.8)}"
+        return hashlib.sha1(f"{signature}|{phrase}".encode('utf-8')).hexdigest()
+
+    def prepare(self, phrases: Iterable[str]):
+        with self.lock:
+            for phrase in phrases:
+                phrase = phrase.strip().lower()
+                if not phrase or phrase in self.pending_set or phrase in self.failed:
+                    continue
+                self.vocabulary.add(phrase)
+                if self._key(phrase) in self.index:
+                    continue
+                self.pending.append(phrase)
+                self.pending_set.add(phrase)
+
+    def render_next(self, engine) -> bool:
+        with self.lock:
+            if not self.pending:
+                return False
+            phrase = self.pending.popleft()
+            self.pending_set.discard(phrase)
+
+        key = self._key(phrase)
+        path = os.path.join(self.cache_dir, f"{key}.wav")
+        try:
+            engine.save_to_file(phrase, path)
+            engine.runAndWait()
+            self._read_wav(path)
+        except Exception as e:
+            print(f"TTS cache render error for '{phrase}': {e}")
+            with self.lock:
+                self.failed.add(phrase)
+            return True
+
+        with self.lock:
+            self.index[key] = path
+            self.index.move_to_end(key)
+            self.stats['rendered'] += 1
+            self._evict()
+        return True
+
+    def _evict(self):
+        while len(self.index) > self.max_entries:
+            key, path = self.index.popitem(last=False)
+            self.buffers.pop(key, None)
+            self.stats['evicted'] += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _read_wav(self, path: str) -> Tuple[bytes, tuple]:
+        with wave.open(path, 'rb') as wav:
+            params = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+            return wav.readframes(wav.getnframes()), params
+
+    def _get_buffer(self, phrase: str) -> Optional[Tuple[bytes, tuple]]:
+        key = self._key(phrase)
+        with self.lock:
+            if key in self.buffers:
+                self.buffers.move_to_end(key)
+                self.index.move_to_end(key)
+                return self.buffers[key]
+            path = self.index.get(key)
+            if path is None:
+                return None
+            self.index.move_to_end(key)
+
+        try:
+            buffer = self._read_wav(path)
+        except Exception:
+            with self.lock:
+                self.index.pop(key, None)
+            return None
+
+        with self.lock:
+            self.buffers[key] = buffer
+            while len(self.buffers) > self.max_buffers:
+                self.buffers.popitem(last=False)
+        return buffer
+
+    def lookup(self, text: str) -> Optional[Tuple[bytes, tuple]]:
+        fragments = split_fragments(text)
+        if fragments is None:
+            return None
+
+        buffers = []
+        missing = []
+        for fragment in fragments:
+            buffer = self._get_buffer(fragment)
+            if buffer is None:
+                missing.append(fragment)
+            else:
+                buffers.append(buffer)
+
+        if missing:
+            self.stats['misses'] += 1
+            self.prepare(missing)
+            return None
+
+        params = buffers[0][1]
+        if any(b[1] != params for b in buffers):
+            return None
+
+        channels, sample_width, rate = params
+        gap = b'\x00' * int(rate * FRAGMENT_GAP_SECONDS) * channels * sample_width
+        self.stats['hits'] += 1
+        return gap.join(b[0] for b in buffers), params
+
+    def play(self, pcm: bytes, params: tuple):
+        import pyaudio
+
+        channels, sample_width, rate = params
+        if self.audio is None:
+            self.audio = pyaudio.PyAudio()
+
+        self.stop_event.clear()
+        stream = self.audio.open(format=self.audio.get_format_from_width(sample_width),
+                                 channels=channels, rate=rate, output=True)
+        try:
+            chunk_bytes = PLAYBACK_CHUNK_FRAMES * channels * sample_width
+            for offset in range(0, len(pcm), chunk_bytes):
+                if self.stop_event.is_set():
+                    break
+                stream.write(pcm[offset:offset + chunk_bytes])
+        finally:
+            stream.stop_stream()
+            stream.close()
+
+    def refresh(self):
+        with self.lock:
+            vocabulary = list(self.vocabulary)
+            self.buffers.clear()
+        self.prepare(vocabulary)
+
+    def stop_playback(self):
+        self.stop_event.set()
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.index), pending=len(self.pending))
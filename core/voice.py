@@ -1,21 +1,31 @@
+import json
+import time
 import pyttsx3
 import speech_recognition as sr
-import threading
-from typing import Optional, Callable
-import queue
+import numpy as np
+from typing import Optional, Callable, Dict, Iterable, List
+from core.speech import SpeechScheduler
+from core.tts_cache import PhraseCache, alert_vocabulary, encode_wav
+from core.audio import AudioCaptureService, record_utterance
+from core.commands import command_grammar, is_unambiguous
 
 
 class VoiceSystem:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, audio_capture: Optional[AudioCaptureService] = None):
         self.config = config
         self.tts_engine = None
         self.recognizer = sr.Recognizer()
         self.microphone = None
-        self.speaking = False
-        self.speech_queue = queue.Queue()
-        self.interrupt_flag = threading.Event()
+        self.audio_capture = audio_capture
+        self.command_model_provider = None
+        self.command_recognizer = None
+        self.command_grammar = None
+        self.known_names = []
+        self.phrase_cache = None
         self._init_tts()
         self._init_microphone()
+        self._init_phrase_cache()
+        self.scheduler = SpeechScheduler(config, self._say, self._stop_engine, idle=self._render_cached_phrase)
 
     def _init_tts(self):
         try:
@@ -31,7 +41,20 @@ class VoiceSystem:
         except Exception as e:
             print(f"TTS initialization error: {e}")
 
+    def _init_phrase_cache(self):
+        if not self.tts_engine or not self.config['voice'].get('tts_cache_enabled', True):
+            return
+        try:
+            self.phrase_cache = PhraseCache(self.config)
+            self.phrase_cache.prepare(alert_vocabulary(self.config['detection'].get('classes', [])))
+        except Exception as e:
+            print(f"TTS cache initialization error: {e}")
+            self.phrase_cache = None
+
     def _init_microphone(self):
+        if self.audio_capture:
+            return
+        
         try:
             self.microphone = sr.Microphone()
             with self.microphone as source:
@@ -39,51 +62,94 @@ class VoiceSystem:
         except Exception as e:
             print(f"Microphone initialization error: {e}")
 
-    def speak(self, text: str, interrupt: bool = False):
-        if interrupt:
-            self.interrupt_speech()
+    def speak(self, text: str, interrupt: bool = False, priority: Optional[str] = None,
+              key: Optional[str] = None, ttl: Optional[float] = None) -> bool:
+        if not self.tts_engine:
+            return False
         
-        if self.tts_engine:
-            self.speech_queue.put(text)
-            if not self.speaking:
-                threading.Thread(target=self._speak_thread, daemon=True).start()
-
-    def _speak_thread(self):
-        self.speaking = True
-        while not self.speech_queue.empty() and not self.interrupt_flag.is_set():
-            try:
-                text = self.speech_queue.get(timeout=0.1)
-                if not self.interrupt_flag.is_set():
-                    self.tts_engine.say(text)
-                    self.tts_engine.runAndWait()
-            except queue.Empty:
-                break
+        if priority is None:
+            priority = 'critical' if interrupt else 'important'
         
-        self.interrupt_flag.clear()
-        self.speaking = False
+        return self.scheduler.submit(text, priority=priority, key=key, ttl=ttl)
 
-    def interrupt_speech(self):
-        self.interrupt_flag.set()
-        if self.tts_engine:
-            try:
-                self.tts_engine.stop()
-            except:
-                pass
-        while not self.speech_queue.empty():
-            try:
-                self.speech_queue.get_nowait()
-            except:
-                break
-
-    def listen(self, callback: Optional[Callable] = None, timeout: int = 3, phrase_time_limit: int = 5) -> Optional[str]:
-        if not self.microphone:
-            return None
+    def _lookup_phrase(self, text: str):
+        cached = self.phrase_cache.lookup(text)
+        if not cached:
+            # lookup queued any missing fragments; wake the idle renderer for them.
+            self.scheduler.notify_idle_work()
+        return cached
+
+    def _say(self, text: str):
+        if self.phrase_cache:
+            cached = self._lookup_phrase(text)
+            if cached:
+                self.phrase_cache.play(*cached)
+                return
         
+        self.tts_engine.say(text)
+        self.tts_engine.runAndWait()
+
+    def render_audio(self, text: str) -> Optional[bytes]:
+        # WAV for clients that play speech themselves. Only cached phrases are available;
+        # rendering new speech here would hold up the local engine, so misses are queued
+        # for idle rendering and the client falls back to its own synthesis.
+        if not self.phrase_cache:
+            return None
+        cached = self._lookup_phrase(text)
+        return encode_wav(*cached) if cached else None
+
+    def _stop_engine(self):
+        if self.phrase_cache:
+            self.phrase_cache.stop_playback()
+        if self.tts_engine:
+            self.tts_engine.stop()
+
+    def _render_cached_phrase(self) -> bool:
+        if not self.phrase_cache:
+            return False
+        return self.phrase_cache.render_next(self.tts_engine)
+
+    def prepare_phrases(self, phrases: Iterable[str]):
+        if self.phrase_cache:
+            self.phrase_cache.prepare(phrases)
+            self.scheduler.notify_idle_work()
+
+    def interrupt_speech(self):
+        self.scheduler.interrupt()
+
+    def get_metrics(self) -> Dict:
+        metrics = self.scheduler.get_metrics()
+        if self.phrase_cache:
+            metrics['phrase_cache'] = self.phrase_cache.get_stats()
+        return metrics
+
+    def set_command_model(self, model_provider: Callable):
+        self.command_model_provider = model_provider
+
+    def set_known_names(self, names: Iterable[str]):
+        self.known_names = list(names)
+
+    def listen(self, callback: Optional[Callable] = None, timeout: int = 3, phrase_time_limit: int = 5,
+               start_position: Optional[int] = None) -> Optional[str]:
         try:
-            with self.microphone as source:
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+            text = None
+            audio = None
+            
+            if self.audio_capture and self._use_offline_commands():
+                text, pcm = self._recognize_offline(timeout, phrase_time_limit, start_position)
+                if not text and pcm and self.config['voice'].get('cloud_fallback', True):
+                    audio = sr.AudioData(pcm, self.audio_capture.sample_rate, 2)
+            elif self.audio_capture:
+                audio = self._capture_utterance(timeout, phrase_time_limit, start_position)
+            elif self.microphone:
+                with self.microphone as source:
+                    audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
             
-            text = self.recognizer.recognize_google(audio)
+            if not text and audio is not None:
+                text = self.recognizer.recognize_google(audio)
+            
+            if not text:
+                return None
             
             if callback:
                 callback(text)
@@ -97,13 +163,106 @@ class VoiceSystem:
             print(f"Speech recognition error: {e}")
             return None
 
+    def _use_offline_commands(self) -> bool:
+        return (self.config['voice'].get('command_recognizer', 'vosk') == 'vosk'
+                and self.command_model_provider is not None)
+
+    def _get_command_recognizer(self):
+        import vosk
+
+        model = self.command_model_provider()
+        if model is None:
+            return None
+        
+        grammar = command_grammar(self.known_names)
+        if self.command_recognizer is None or grammar != self.command_grammar:
+            self.command_recognizer = vosk.KaldiRecognizer(model, self.audio_capture.sample_rate, json.dumps(grammar))
+            self.command_grammar = grammar
+        else:
+            self.command_recognizer.Reset()
+        return self.command_recognizer
+
+    def _recognize_offline(self, timeout: int, phrase_time_limit: int,
+                           start_position: Optional[int]):
+        rec = self._get_command_recognizer()
+        if rec is None:
+            return None, None
+        
+        if start_position is not None:
+            start_position -= int(self.audio_capture.preroll_seconds * self.audio_capture.sample_rate)
+        subscription = self.audio_capture.subscribe(start_position=start_position,
+                                                    preroll_seconds=self.audio_capture.preroll_seconds)
+        chunks: List[np.ndarray] = []
+        heard_speech = False
+        started = time.monotonic()
+        text = None
+        
+        try:
+            while True:
+                elapsed = time.monotonic() - started
+                if (not heard_speech and elapsed >= timeout) or elapsed >= timeout + phrase_time_limit:
+                    text = json.loads(rec.FinalResult()).get('text', '')
+                    break
+                
+                chunk = subscription.read(self.audio_capture.sample_rate // 10, timeout=0.5)
+                if chunk is None:
+                    break
+                if not len(chunk):
+                    continue
+                chunks.append(chunk)
+                
+                if rec.AcceptWaveform(chunk.tobytes()):
+                    text = json.loads(rec.Result()).get('text', '')
+                    if text and text != '[unk]':
+                        break
+                    continue
+                
+                partial = json.loads(rec.PartialResult()).get('partial', '')
+                if partial:
+                    heard_speech = True
+                    # Dispatch as soon as nothing else in the grammar could change the command.
+                    if is_unambiguous(partial, self.known_names):
+                        text = partial
+                        break
+        finally:
+            subscription.close()
+        
+        text = (text or '').replace('[unk]', '').strip()
+        pcm = np.concatenate(chunks).tobytes() if chunks and heard_speech else None
+        return text or None, pcm
+
+    def _capture_utterance(self, timeout: int, phrase_time_limit: int,
+                           start_position: Optional[int]) -> Optional[sr.AudioData]:
+        audio_config = self.config.get('audio', {})
+        if start_position is not None:
+            start_position -= int(self.audio_capture.preroll_seconds * self.audio_capture.sample_rate)
+        subscription = self.audio_capture.subscribe(start_position=start_position,
+                                                    preroll_seconds=self.audio_capture.preroll_seconds)
+        try:
+            pcm = record_utterance(subscription, self.audio_capture.sample_rate, timeout, phrase_time_limit,
+                                   audio_config.get('end_silence_seconds', 0.8),
+                                   audio_config.get('speech_rms_threshold', 500))
+        finally:
+            subscription.close()
+        
+        if pcm is None:
+            return None
+        return sr.AudioData(pcm, self.audio_capture.sample_rate, 2)
+
     def set_volume(self, volume: float):
         if self.tts_engine and 0.0 <= volume <= 1.0:
             self.config['voice']['tts_volume'] = volume
             self.tts_engine.setProperty('volume', volume)
+            self._refresh_phrase_cache()
 
     def set_rate(self, rate: int):
         if self.tts_engine and 50 <= rate <= 300:
             self.config['voice']['tts_rate'] = rate
             self.tts_engine.setProperty('rate', rate)
+            self._refresh_phrase_cache()
+
+    def _refresh_phrase_cache(self):
+        if self.phrase_cache:
+            self.phrase_cache.refresh()
+            self.scheduler.notify_idle_work()
 
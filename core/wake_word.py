@@ -1,40 +1,68 @@
 import os
 import vosk
 import json
-import pyaudio
+import time
 import threading
+import numpy as np
 from typing import Optional, Callable
+from core.audio import AudioCaptureService, VoiceActivityDetector
 
 
 class WakeWordDetector:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, audio_capture: Optional[AudioCaptureService] = None):
         self.config = config
+        self.audio_capture = audio_capture or AudioCaptureService(config)
         self.model_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models", "vosk-model-small-en-us-0.15")
         if not os.path.exists(self.model_path):
             self.model_path = "models/vosk-model-small-en-us-0.15"
         self.wake_word = config['voice'].get('wake_word', 'hey aura').lower()
+        self.debounce_seconds = config['voice'].get('wake_word_debounce_seconds', 2.0)
+        self.grammar_limited = config['voice'].get('wake_word_grammar', True)
         self.model = None
         self.rec = None
+        self.vad = None
         self.is_listening = False
         self.callback = None
         self.thread = None
+        self.model_lock = threading.Lock()
+        self.last_trigger = 0.0
+        self.triggered_utterance = False
+        self.in_utterance = False
         
     def _load_model(self) -> bool:
         try:
             self.model = vosk.Model(self.model_path)
-            self.rec = vosk.KaldiRecognizer(self.model, 16000)
+            self.reset()
             return True
         except Exception as e:
             print(f"Wake word model loading error: {e}")
             return False
 
+    def _create_recognizer(self):
+        if self.grammar_limited:
+            # Only the wake phrase and a garbage token: far cheaper than full-vocabulary decoding.
+            return vosk.KaldiRecognizer(self.model, 16000, json.dumps([self.wake_word, '[unk]']))
+        return vosk.KaldiRecognizer(self.model, 16000)
+
+    def reset(self):
+        self.rec = self._create_recognizer()
+        self.vad = VoiceActivityDetector(self.config)
+        self.last_trigger = 0.0
+        self.triggered_utterance = False
+        self.in_utterance = False
+
+    def get_model(self):
+        with self.model_lock:
+            if not self.model:
+                self._load_model()
+        return self.model
+
     def start_listening(self, callback: Callable):
         if self.is_listening:
             return
         
-        if not self.model:
-            if not self._load_model():
-                return
+        if not self.get_model():
+            return
         
         self.callback = callback
         self.is_listening = True
@@ -42,37 +70,61 @@ class WakeWordDetector:
         self.thread.start()
 
     def _listen_loop(self):
-        p = pyaudio.PyAudio()
-        stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=8000)
-        stream.start_stream()
+        if not self.audio_capture.start():
+            self.is_listening = False
+            return
         
-        buffer = ""
+        subscription = self.audio_capture.subscribe()
         
         while self.is_listening:
-            data = stream.read(4000, exception_on_overflow=False)
-            if self.rec.AcceptWaveform(data):
-                result = json.loads(self.rec.Result())
-                text = result.get('text', '').lower()
-                if text:
-                    buffer += " " + text
-                    
-                    if self.wake_word in buffer:
-                        if self.callback:
-                            self.callback()
-                        buffer = ""
+            chunk = subscription.read(4000, timeout=0.5)
+            if chunk is None:
+                break
+            if not len(chunk):
+                continue
+            
+            if self.process_chunk(chunk):
+                self._trigger(subscription.position)
+        
+        subscription.close()
+
+    def process_chunk(self, chunk: np.ndarray, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        detected = False
+        already_triggered = self.triggered_utterance
+        
+        for samples in self.vad.process(chunk):
+            self.in_utterance = True
+            if self.rec.AcceptWaveform(samples.tobytes()):
+                text = json.loads(self.rec.Result()).get('text', '')
+                detected = detected or self.wake_word in text
+                if not self.vad.enabled:
+                    # No VAD means one endless utterance; Vosk's own endpoint separates phrases.
+                    already_triggered = self.triggered_utterance = False
             else:
-                partial = json.loads(self.rec.PartialResult())
-                text = partial.get('partial', '').lower()
-                if self.wake_word in text:
-                    if self.callback:
-                        self.callback()
+                # Cheap substring test on the raw JSON; no parse per chunk.
+                detected = detected or self.wake_word in self.rec.PartialResult()
         
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
+        if self.in_utterance and self.vad.utterance_ended():
+            detected = detected or self.wake_word in self.rec.FinalResult()
+            self.in_utterance = False
+            self.triggered_utterance = False
+        
+        if not detected or already_triggered:
+            return False
+        
+        self.triggered_utterance = self.in_utterance
+        if now - self.last_trigger < self.debounce_seconds:
+            return False
+        
+        self.last_trigger = now
+        return True
+
+    def _trigger(self, position: int):
+        if self.callback:
+            self.callback(position)
 
     def stop_listening(self):
         self.is_listening = False
         if self.thread:
             self.thread.join(timeout=2)
-
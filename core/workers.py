@@ -0,0 +1,382 @@
+import time
+import queue
+import itertools
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.metrics import stage_seconds, errors_total
+
+
+class SharedFramePool:
+    def __init__(self, slots: int, max_shape: Tuple[int, ...]):
+        self.slot_bytes = int(np.prod(max_shape))
+        self.blocks = [shared_memory.SharedMemory(create=True, size=self.slot_bytes) for _ in range(slots)]
+        self.names = [block.name for block in self.blocks]
+        self.free = list(range(slots))
+        self.readers = [0] * slots
+        self.condition = threading.Condition()
+        self.rejected = 0
+
+    def put(self, frame: np.ndarray, readers: int, timeout: float = 0.0) -> Optional[int]:
+        # Frames that don't fit a slot (camera ignored the configured resolution) are
+        # refused and the caller runs the stage in-process instead.
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            self.rejected += 1
+            return None
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.free, timeout):
+                self.rejected += 1
+                return None
+            slot = self.free.pop()
+            self.readers[slot] = readers
+        np.ndarray(frame.shape, dtype=np.uint8, buffer=self.blocks[slot].buf)[...] = frame
+        return slot
+
+    def release(self, slot: int):
+        with self.condition:
+            self.readers[slot] -= 1
+            if self.readers[slot] <= 0:
+                self.free.append(slot)
+                self.condition.notify()
+
+    def close(self):
+        for block in self.blocks:
+            try:
+                block.close()
+                block.unlink()
+            except Exception as e:
+                print(f"Shared frame slot cleanup error: {e}")
+
+
+def _load_stage(stage: str, config: dict, db_path: str) -> Tuple[Callable, Optional[Callable]]:
+    # Runs inside the worker process, so each model is loaded once per worker.
+    if stage == 'detect':
+        from core.detector import ObjectDetector
+        detector = ObjectDetector(config)
+        if detector.model is None:
+            raise RuntimeError("YOLO model could not be loaded")
+        return detector.detect, None
+    if stage == 'faces':
+        from core.face_rec import FaceRecognizer
+        from utils.database import Database
+        recognizer = FaceRecognizer(config, Database(db_path))
+        recognizer.warm_up()
+        return recognizer.identify, recognizer.load_faces
+    if stage == 'ocr':
+        from core.ocr import OCRReader
+        return OCRReader(config).read_text, None
+    raise ValueError(f"Unknown worker stage: {stage}")
+
+
+def _worker_main(stage: str, index: int, config: dict, db_path: str, slot_names: List[str], tasks, results):
+    try:
+        run, reload = _load_stage(stage, config, db_path)
+    except Exception as e:
+        results.put((index, None, None, f"{stage} worker failed to load: {e}", 0.0))
+        return
+    results.put((index, None, 'ready', None, 0.0))
+
+    blocks = {}
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, slot, shape = task
+        if slot is None:
+            if reload is not None:
+                reload()
+            continue
+        started = time.perf_counter()
+        try:
+            block = blocks.get(slot)
+            if block is None:
+                block = blocks[slot] = shared_memory.SharedMemory(name=slot_names[slot])
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=block.buf)
+            result = run(frame)
+            del frame
+            results.put((index, task_id, result, None, time.perf_counter() - started))
+        except Exception as e:
+            results.put((index, task_id, None, str(e), time.perf_counter() - started))
+
+    for block in blocks.values():
+        block.close()
+
+
+class StagePool:
+    def __init__(self, stage: str, processes: int, config: dict, db_path: str, frames: SharedFramePool, context):
+        self.stage = stage
+        self.frames = frames
+        self.results = context.Queue()
+        self.workers = []
+        self.ready = [False] * processes
+        self.in_flight = [0] * processes
+        self.pending = {}
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        self.settled = threading.Event()
+        self.failures = 0
+        self.completed = 0
+        self.errors = 0
+
+        for index in range(processes):
+            tasks = context.Queue()
+            process = context.Process(target=_worker_main, name=f"aura-{stage}-{index}", daemon=True,
+                                      args=(stage, index, config, db_path, frames.names, tasks, self.results))
+            process.start()
+            self.workers.append((process, tasks))
+        self.reader = None
+
+    def listen(self):
+        # Started only once every pool has forked, so no child inherits this thread's locks.
+        self.reader = threading.Thread(target=self._read_results, name=f"{self.stage}-worker-results", daemon=True)
+        self.reader.start()
+
+    def is_ready(self) -> bool:
+        return any(self.ready)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        self.settled.wait(timeout)
+        return self.is_ready()
+
+    def submit(self, slot: int, shape: Tuple[int, ...]) -> Optional[Future]:
+        with self.lock:
+            candidates = [i for i, ready in enumerate(self.ready) if ready]
+            if not candidates:
+                return None
+            # Least-loaded worker; each worker has its own queue so reloads can be broadcast.
+            index = min(candidates, key=lambda i: self.in_flight[i])
+            task_id = next(self.ids)
+            future = Future()
+            self.pending[task_id] = (future, index, slot)
+            self.in_flight[index] += 1
+        self.workers[index][1].put((task_id, slot, tuple(shape)))
+        return future
+
+    def abandon(self, future: Future) -> bool:
+        # A task the caller gave up on frees its slot now rather than when (or if) a hung
+        # worker answers; a late result is then ignored by the reader.
+        with self.lock:
+            for task_id, (pending_future, index, slot) in self.pending.items():
+                if pending_future is future:
+                    del self.pending[task_id]
+                    self.in_flight[index] -= 1
+                    break
+            else:
+                return False
+        self.frames.release(slot)
+        return True
+
+    def broadcast_reload(self):
+        for process, tasks in self.workers:
+            if process.is_alive():
+                tasks.put((None, None, None))
+
+    def _read_results(self):
+        while True:
+            try:
+                index, task_id, result, error, seconds = self.results.get(timeout=1.0)
+            except queue.Empty:
+                self._reap_dead_workers()
+                continue
+            except (EOFError, OSError):
+                return
+
+            if task_id is None:
+                with self.lock:
+                    if error:
+                        print(error)
+                        self.failures += 1
+                    else:
+                        self.ready[index] = True
+                    if self.is_ready() or self.failures >= len(self.workers):
+                        self.settled.set()
+                continue
+
+            with self.lock:
+                entry = self.pending.pop(task_id, None)
+                if entry is not None:
+                    self.in_flight[index] -= 1
+                    self.completed += 1
+                    if error:
+                        self.errors += 1
+            if entry is None:
+                continue
+            future, _, slot = entry
+            self.frames.release(slot)
+            stage_seconds.observe(seconds, stage=f"{self.stage}_worker")
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(result)
+
+    def _reap_dead_workers(self):
+        orphaned = []
+        with self.lock:
+            for index, (process, _) in enumerate(self.workers):
+                if process.is_alive():
+                    continue
+                if self.ready[index]:
+                    print(f"{self.stage} worker {index} exited with code {process.exitcode}")
+                    self.ready[index] = False
+                for task_id, (future, owner, slot) in list(self.pending.items()):
+                    if owner == index:
+                        orphaned.append((future, slot))
+                        del self.pending[task_id]
+                self.in_flight[index] = 0
+            if not any(process.is_alive() for process, _ in self.workers):
+                self.settled.set()
+        for future, slot in orphaned:
+            self.frames.release(slot)
+            future.set_exception(RuntimeError(f"{self.stage} worker exited"))
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {
+                'workers': len(self.workers),
+                'ready': sum(self.ready),
+                'in_flight': sum(self.in_flight),
+                'completed': self.completed,
+                'errors': self.errors
+            }
+
+    def close(self, timeout: float = 2.0):
+        for _, tasks in self.workers:
+            try:
+                tasks.put(None)
+            except Exception:
+                pass
+        for process, _ in self.workers:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+
+class InferenceWorkers:
+    def __init__(self, config: dict, db_path: str):
+        self.config = config
+        self.db_path = db_path
+        workers_config = config.get('workers', {})
+        camera_config = config.get('camera', {})
+        shape = (camera_config.get('resolution_height', 480), camera_config.get('resolution_width', 640), 3)
+        self.task_timeout = workers_config.get('task_timeout_seconds', 5)
+        self.load_timeout = workers_config.get('load_timeout_seconds', 120)
+        self.slot_wait = workers_config.get('slot_wait_seconds', 0.05)
+        self.stage_processes = {
+            'faces': workers_config.get('face_processes', 1),
+            'ocr': workers_config.get('ocr_processes', 1),
+            'detect': workers_config.get('detection_processes', 1) if workers_config.get('offload_detection', False) else 0
+        }
+        # spawn and forkserver re-import the entry module in every child, which only an
+        # import-safe entry point (not app.py) tolerates; with fork, start() must run before
+        # the process creates any other thread.
+        self.context = multiprocessing.get_context(workers_config.get('start_method', 'fork'))
+        self.frames = SharedFramePool(workers_config.get('frame_slots', 8), shape)
+        self.pools = {}
+        self.fallbacks = 0
+
+    def offloads(self, stage: str) -> bool:
+        return self.stage_processes.get(stage, 0) > 0
+
+    def start(self):
+        for stage, processes in self.stage_processes.items():
+            if processes > 0:
+                self.pools[stage] = StagePool(stage, processes, self.config, self.db_path, self.frames, self.context)
+        for pool in self.pools.values():
+            pool.listen()
+        return self
+
+    def wait_ready(self):
+        for stage, pool in list(self.pools.items()):
+            if not pool.wait_ready(self.load_timeout):
+                print(f"No {stage} worker came up; running {stage} in-process")
+                pool.close()
+                del self.pools[stage]
+        return self
+
+    def has_stage(self, stage: str) -> bool:
+        pool = self.pools.get(stage)
+        return pool is not None and pool.is_ready()
+
+    def submit(self, frame: np.ndarray, stages: Iterable[str]) -> Dict[str, Future]:
+        # One copy into shared memory serves every stage; the slot is freed when the
+        # last of them reports back. Stages missing from the result must run locally.
+        pools = [self.pools[stage] for stage in stages if self.has_stage(stage)]
+        if not pools:
+            return {}
+        slot = self.frames.put(frame, len(pools), self.slot_wait)
+        if slot is None:
+            self.fallbacks += 1
+            return {}
+        futures = {}
+        for pool in pools:
+            future = pool.submit(slot, frame.shape)
+            if future is None:
+                self.frames.release(slot)
+            else:
+                futures[pool.stage] = future
+        return futures
+
+    def collect(self, future: Future, default=None):
+        try:
+            return future.result(timeout=self.task_timeout)
+        except FutureTimeoutError:
+            print(f"Worker task timed out after {self.task_timeout}s")
+            errors_total.inc(component='workers')
+            for pool in self.pools.values():
+                if pool.abandon(future):
+                    break
+            return default
+        except Exception as e:
+            print(f"Worker task error: {e}")
+            errors_total.inc(component='workers')
+            return default
+
+    def run(self, stage: str, frame: np.ndarray, default=None, fallback: Optional[Callable[[], object]] = None):
+        future = self.submit(frame, (stage,)).get(stage)
+        if future is None:
+            return fallback() if fallback is not None else default
+        return self.collect(future, default)
+
+    def reload(self, stage: str):
+        pool = self.pools.get(stage)
+        if pool is not None:
+            pool.broadcast_reload()
+
+    def in_flight(self) -> Dict[str, int]:
+        return {stage: pool.get_stats()['in_flight'] for stage, pool in self.pools.items()}
+
+    def get_stats(self) -> Dict:
+        with self.frames.condition:
+            free_slots = len(self.frames.free)
+        return {
+            'stages': {stage: pool.get_stats() for stage, pool in self.pools.items()},
+            'frame_slots': len(self.frames.blocks),
+            'free_slots': free_slots,
+            'rejected_frames': self.frames.rejected,
+            'fallbacks': self.fallbacks
+        }
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+        self.pools = {}
+        self.frames.close()
+
+
+class OffloadedDetector:
+    # None means the frame was not looked at (no free slot or worker, or the task failed),
+    # which callers must not mistake for a frame with nothing in it.
+    def __init__(self, workers: InferenceWorkers):
+        self.workers = workers
+
+    def detect(self, frame: np.ndarray) -> Optional[List[dict]]:
+        return self.workers.run('detect', frame)
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[Optional[List[dict]]]:
+        pending = [self.workers.submit(frame, ('detect',)).get('detect') for frame in frames]
+        return [self.workers.collect(future) if future else None for future in pending]
@@ -0,0 +1,107 @@
+import time
+import threading
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional
+
+
+SECTIONS = ('objects', 'people', 'text', 'scene')
+
+
+def _freeze(value):
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class WorldState:
+    def __init__(self, config: dict):
+        world_config = config.get('world_state', {})
+        self.max_age = {
+            'objects': world_config.get('objects_max_age_seconds', 2),
+            'people': world_config.get('people_max_age_seconds', 3),
+            'text': world_config.get('text_max_age_seconds', 5),
+            'scene': world_config.get('scene_max_age_seconds', 15)
+        }
+        self.people_memory = world_config.get('people_memory_seconds', 10)
+        self.lock = threading.Lock()
+        self.snapshot = _freeze({'version': 0, 'updated_at': None, **dict.fromkeys(SECTIONS)})
+
+    def publish(self, timestamp: Optional[float] = None, frame: Optional[int] = None,
+                camera: Optional[str] = None, **sections) -> int:
+        # Copy-on-write: readers hold on to whichever snapshot they fetched, and a new
+        # one replaces it in a single reference assignment.
+        timestamp = timestamp or time.time()
+        with self.lock:
+            current = dict(self.snapshot)
+            for name, value in sections.items():
+                if name not in SECTIONS:
+                    raise ValueError(f"Unknown world state section: {name}")
+                if name == 'people':
+                    value = self._merge_people(current['people'], value, timestamp)
+                elif name == 'objects' and camera is not None:
+                    value = self._merge_objects(current['objects'], value, camera, timestamp)
+                current[name] = _freeze({'value': value, 'timestamp': timestamp, 'frame': frame})
+            current['version'] += 1
+            current['updated_at'] = timestamp
+            self.snapshot = MappingProxyType(current)
+            return current['version']
+
+    def _merge_people(self, previous, recognitions: Iterable[Dict], timestamp: float):
+        # Someone stays present for a while after their last sighting, so a glance away
+        # or a missed frame does not make them vanish.
+        people = {}
+        if previous is not None:
+            for person in previous['value']:
+                if timestamp - person['last_seen'] <= self.people_memory:
+                    people[person['face_id']] = person
+        for recognition in recognitions:
+            people[recognition['face_id']] = dict(recognition, last_seen=timestamp)
+        return sorted(people.values(), key=lambda person: person['last_seen'], reverse=True)
+
+    def _merge_objects(self, previous, detections: Iterable[Dict], camera: str, timestamp: float):
+        # Each camera replaces only its own detections; other cameras' stay until they age out.
+        objects = []
+        if previous is not None:
+            objects = [obj for obj in previous['value'] if obj.get('camera') != camera and
+                       timestamp - obj.get('seen_at', previous['timestamp']) <= self.max_age['objects']]
+        return objects + [dict(detection, camera=camera, seen_at=timestamp) for detection in detections]
+
+    def current(self):
+        return self.snapshot
+
+    def fresh(self, section: str, max_age: Optional[float] = None):
+        entry = self.snapshot[section]
+        if entry is None:
+            return None
+        limit = self.max_age[section] if max_age is None else max_age
+        return entry if time.time() - entry['timestamp'] <= limit else None
+
+    def clear(self):
+        with self.lock:
+            current = dict(self.snapshot, **dict.fromkeys(SECTIONS))
+            current['version'] += 1
+            current['updated_at'] = time.time()
+            self.snapshot = MappingProxyType(current)
+
+    def to_dict(self, snapshot=None) -> Dict:
+        snapshot = snapshot or self.snapshot
+        now = time.time()
+        result = {'version': snapshot['version'], 'updated_at': snapshot['updated_at']}
+        for section in SECTIONS:
+            entry = snapshot[section]
+            if entry is None:
+                result[section] = None
+                continue
+            age = now - entry['timestamp']
+            result[section] = dict(_thaw(entry), age_seconds=round(age, 3), fresh=age <= self.max_age[section])
+        return result
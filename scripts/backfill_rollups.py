@@ -0,0 +1,41 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.database import Database
+
+
+def backfill(db_path: str, chunk_size: int):
+    # Opening the database applies pending migrations, which add the promoted
+    # columns and the rollup table but leave existing rows untouched.
+    db = Database(db_path)
+    print(f"Schema version: {db.schema_version()}")
+
+    start = time.time()
+    updated = db.backfill_promoted_fields(chunk_size)
+    print(f"Promoted metadata fields on {updated} event rows ({time.time() - start:.1f}s)")
+
+    start = time.time()
+    try:
+        buckets = db.rebuild_rollups()
+    except RuntimeError as e:
+        print(f"ERROR: {e}. Existing rollups were left as they are.")
+        db.close()
+        return 1
+    if buckets:
+        print(f"Rebuilt {buckets} rollup buckets ({time.time() - start:.1f}s)")
+    else:
+        print("Rollups already cover every event; nothing to rebuild")
+    db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Populate promoted columns and analytics rollups for existing event logs")
+    parser.add_argument('--db', default='database/aura.db')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+    sys.exit(backfill(args.db, args.chunk_size))
@@ -0,0 +1,85 @@
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.helpers import load_config
+from core.scene_ai import SceneAI, HTTPBackend
+from scripts.scene_stub_server import create_server
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    return float(np.percentile(values, pct))
+
+
+def run_benchmark(url: str, requests: int, concurrency: int, distinct_frames: int, config: dict):
+    scene_ai = SceneAI(config, backend=HTTPBackend(url))
+    height = config['camera']['resolution_height']
+    width = config['camera']['resolution_width']
+    frames = [np.random.randint(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(distinct_frames)]
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one_request(i):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            scene_ai.describe_scene_async(frames[i % distinct_frames]).result()
+            with lock:
+                latencies.append(time.perf_counter() - start)
+        except Exception:
+            with lock:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    print(f"Requests:      {requests} ({concurrency} concurrent, {distinct_frames} distinct frames)")
+    print(f"Elapsed:       {elapsed:.2f}s")
+    print(f"Throughput:    {requests / elapsed:.1f} req/s")
+    print(f"Latency p50:   {percentile(latencies, 50) * 1000:.0f} ms")
+    print(f"Latency p95:   {percentile(latencies, 95) * 1000:.0f} ms")
+    print(f"Errors:        {errors}")
+    print(f"Client stats:  {scene_ai.get_stats()}")
+    scene_ai.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the scene AI client against a local stand-in backend")
+    parser.add_argument('--url', help="Existing backend URL (default: start an in-process stub)")
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--distinct-frames', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=6000, help="Requests per minute for the client limiter")
+    args = parser.parse_args()
+
+    config = load_config()
+    config['gemini']['rate_limit_per_minute'] = args.rate_limit
+    config['gemini']['cache_duration_seconds'] = 0
+
+    server = None
+    url = args.url
+    if not url:
+        server = create_server(port=0, latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 4,
+                               error_rate=args.error_rate)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print("=== AURA Scene AI Benchmark ===")
+    run_benchmark(url, args.requests, args.concurrency, args.distinct_frames, config)
+
+    if server:
+        server.shutdown()
@@ -0,0 +1,83 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.helpers import load_config
+from core.audio import load_wav, SAMPLE_RATE
+from core.wake_word import WakeWordDetector
+
+
+CHUNK_SAMPLES = 4000
+
+
+def run_file(detector: WakeWordDetector, path: Path) -> Tuple[int, float]:
+    samples = load_wav(str(path))
+    detector.reset()
+    triggers = 0
+    for offset in range(0, len(samples), CHUNK_SAMPLES):
+        # Feed a simulated clock so debouncing behaves as it would in real time.
+        if detector.process_chunk(samples[offset:offset + CHUNK_SAMPLES], now=offset / float(SAMPLE_RATE)):
+            triggers += 1
+    return triggers, len(samples) / float(SAMPLE_RATE)
+
+
+def run_corpus(config: dict, corpus: Path, label: str):
+    detector = WakeWordDetector(config)
+    if not detector.get_model():
+        print("ERROR: Vosk model not available. Run scripts/download_models.py first.")
+        sys.exit(1)
+
+    results = {}
+    audio_seconds = 0.0
+    negative_seconds = 0.0
+    cpu_start = time.process_time()
+
+    for kind in ('positive', 'negative'):
+        files = sorted((corpus / kind).glob('*.wav'))
+        hits = 0
+        triggers_total = 0
+        for path in files:
+            triggers, duration = run_file(detector, path)
+            audio_seconds += duration
+            if kind == 'negative':
+                negative_seconds += duration
+            triggers_total += triggers
+            hits += 1 if triggers else 0
+        results[kind] = (len(files), hits, triggers_total)
+
+    cpu_seconds = time.process_time() - cpu_start
+    positives, detected, _ = results['positive']
+    negatives, false_files, false_triggers = results['negative']
+    negative_hours = negative_seconds / 3600.0
+
+    print(f"--- {label} ---")
+    print(f"Audio processed:     {audio_seconds:.1f}s")
+    print(f"CPU time:            {cpu_seconds:.2f}s ({100.0 * cpu_seconds / max(audio_seconds, 1e-6):.1f}% of one core in real time)")
+    print(f"False reject rate:   {100.0 * (positives - detected) / max(positives, 1):.1f}% ({positives - detected}/{positives})")
+    print(f"False accept rate:   {100.0 * false_files / max(negatives, 1):.1f}% of negative clips ({false_files}/{negatives})")
+    if negative_hours > 0:
+        print(f"False accepts/hour:  {false_triggers / negative_hours:.2f}")
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure wake word CPU use and accuracy on a WAV corpus")
+    parser.add_argument('corpus', help="Directory containing positive/ and negative/ subdirectories of WAV files")
+    parser.add_argument('--compare', action='store_true', help="Also run the ungated full-vocabulary recogniser")
+    args = parser.parse_args()
+
+    corpus = Path(args.corpus)
+    print("=== AURA Wake Word Benchmark ===")
+    print()
+
+    config = load_config()
+    run_corpus(config, corpus, "VAD gated, wake-phrase grammar")
+
+    if args.compare:
+        config['voice']['wake_word_grammar'] = False
+        config.setdefault('audio', {}).setdefault('vad', {})['enabled'] = False
+        run_corpus(config, corpus, "Ungated, full vocabulary")
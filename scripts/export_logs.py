@@ -0,0 +1,86 @@
+import os
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.database import Database, EVENT_LOG_COLUMNS, SESSION_COLUMNS
+from utils.export import export_rows, write_parquet
+
+
+def read_state(path: str) -> int:
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, 'r') as f:
+        return int(f.read().strip() or 0)
+
+
+def write_state(path: str, last_id: int):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(str(last_id))
+    os.replace(tmp_path, path)
+
+
+def export(args):
+    db = Database(args.db)
+    last_seen = {'id': None, 'count': 0}
+
+    if args.table == 'logs':
+        columns = list(EVENT_LOG_COLUMNS)
+        since_id = args.since_id if args.since_id is not None else read_state(args.state_file)
+
+        def rows():
+            for row in db.iter_event_logs(session_id=args.session_id, since_id=since_id,
+                                          chunk_size=args.chunk_size):
+                last_seen['id'] = row['id']
+                last_seen['count'] += 1
+                yield row
+    else:
+        columns = list(SESSION_COLUMNS)
+
+        def rows():
+            for row in db.iter_sessions(chunk_size=args.chunk_size):
+                last_seen['count'] += 1
+                yield row
+
+    if args.format == 'parquet':
+        if not args.output:
+            print("Parquet export needs --output")
+            return 1
+        try:
+            write_parquet(rows(), args.output, columns)
+        except ImportError:
+            print("Parquet export requires pyarrow (pip install pyarrow)")
+            return 1
+    else:
+        out = open(args.output, 'w', newline='') if args.output else sys.stdout
+        try:
+            for chunk in export_rows(rows(), args.format, columns):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+
+    if args.table == 'logs' and args.state_file and last_seen['id'] is not None:
+        write_state(args.state_file, last_seen['id'])
+
+    print(f"Exported {last_seen['count']} {args.table} rows", file=sys.stderr)
+    if last_seen['id'] is not None:
+        print(f"Last event id: {last_seen['id']}", file=sys.stderr)
+    db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream sessions or event logs out of the AURA database")
+    parser.add_argument('table', choices=['logs', 'sessions'])
+    parser.add_argument('--format', choices=['ndjson', 'csv', 'parquet'], default='ndjson')
+    parser.add_argument('--output', '-o', help="Output file (default: stdout; required for parquet)")
+    parser.add_argument('--db', default='database/aura.db')
+    parser.add_argument('--session-id', help="Only export logs for this session")
+    parser.add_argument('--since-id', type=int, help="Only export logs with a larger id")
+    parser.add_argument('--state-file', help="Read the starting id from and record the last exported id to this file")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    sys.exit(export(parser.parse_args()))
@@ -0,0 +1,190 @@
+import sys
+import time
+import threading
+import argparse
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.helpers import load_config
+from utils.database import Database
+from core.camera import Camera
+from core.detector import ObjectDetector
+from core.face_rec import FaceRecognizer
+from core.scheduler import infer_batch
+from core.sessions import SessionManager
+from core.workers import InferenceWorkers, OffloadedDetector
+
+
+class NoiseSource:
+    # Stands in for cv2.VideoCapture so sessions can be generated without cameras.
+    def __init__(self, width: int, height: int, seed: int):
+        rng = np.random.default_rng(seed)
+        self.frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(8)]
+        self.index = 0
+
+    def read(self):
+        self.index += 1
+        return True, self.frames[self.index % len(self.frames)]
+
+    def set(self, *args):
+        return True
+
+    def release(self):
+        pass
+
+
+class SyntheticCamera(Camera):
+    def start(self) -> bool:
+        if self.running:
+            return True
+        self.cap = NoiseSource(self.camera_config['resolution_width'], self.camera_config['resolution_height'],
+                               hash(self.name) & 0xffff)
+        self.running = True
+        self.thread = threading.Thread(target=self._capture_loop, name=f"camera-{self.name}", daemon=True)
+        self.thread.start()
+        return True
+
+
+class Recorder:
+    def __init__(self, face_recognizer=None):
+        self.face_recognizer = face_recognizer
+        self.lock = threading.Lock()
+        self.recording = False
+        self.latencies = {}
+
+    def reset(self):
+        with self.lock:
+            self.latencies = {}
+
+    def handle(self, session, camera_name, sequence, timestamp, frame, result):
+        # Same per-frame session work as the app, minus alerts and speech.
+        detections, face_matches = result
+        now = time.time()
+        session.frame_count += 1
+        session.last_activity = now
+        sections = {'objects': detections}
+        if face_matches is not None:
+            sections['people'] = face_matches
+            if self.face_recognizer:
+                self.face_recognizer.apply_cooldowns(face_matches, now, session.face_cooldowns)
+        session.world_state.publish(now, sequence, camera=camera_name, **sections)
+        if self.recording:
+            with self.lock:
+                self.latencies.setdefault(session.session_id, []).append(time.time() - timestamp)
+
+
+def build_cameras(config: dict, args, index: int) -> Dict[str, Camera]:
+    cameras = {}
+    for camera_index in range(args.cameras):
+        name = f"load{index}-{camera_index}"
+        if args.video:
+            cameras[name] = Camera(config, {'source': args.video, 'loop': True}, name)
+        else:
+            cameras[name] = SyntheticCamera(config, {}, name)
+    return cameras
+
+
+def run_step(config: dict, manager: SessionManager, recorder: Recorder, args, count: int) -> Dict:
+    sessions = [manager.create(build_cameras(config, args, i), local=False, label=f"load-{i}")
+                for i in range(count)]
+    for session in sessions:
+        if not session.start():
+            print(f"ERROR: Could not start the frame source for {session.label}")
+            sys.exit(1)
+
+    time.sleep(args.warmup)
+    recorder.reset()
+    recorder.recording = True
+    time.sleep(args.duration)
+    recorder.recording = False
+    with recorder.lock:
+        latencies = dict(recorder.latencies)
+
+    stats = manager.get_stats()
+    for session in sessions:
+        manager.remove(session.session_id)
+
+    rates = []
+    p95s = []
+    for session in sessions:
+        samples = latencies.get(session.session_id, [])
+        rates.append(len(samples) / args.duration / args.cameras)
+        p95s.append(float(np.percentile(samples, 95)) if samples else float('inf'))
+    dropped = sum(info['dropped'] for streams in stats['sessions'].values() for info in streams.values())
+    return {
+        'sessions': count,
+        'min_fps': min(rates),
+        'mean_fps': sum(rates) / len(rates),
+        'worst_p95': max(p95s),
+        'dropped': dropped
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ramp synthetic sessions against the shared models to find capacity")
+    parser.add_argument('--max-sessions', type=int, default=8, help="Largest number of concurrent sessions to try")
+    parser.add_argument('--cameras', type=int, default=1, help="Cameras per session")
+    parser.add_argument('--video', help="Loop this video file as every camera instead of generated noise")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds measured at each step")
+    parser.add_argument('--warmup', type=float, default=5.0, help="Seconds discarded at the start of each step")
+    parser.add_argument('--min-fps-ratio', type=float, default=0.8,
+                        help="Each camera must get this fraction of its target inference rate")
+    parser.add_argument('--max-p95-ms', type=float, default=500.0, help="Worst per-session p95 frame latency allowed")
+    parser.add_argument('--no-faces', action='store_true', help="Run detection only")
+    parser.add_argument('--workers', action='store_true', help="Run models in worker processes as configured")
+    parser.add_argument('--db', default='database/aura.db')
+    args = parser.parse_args()
+
+    config = load_config()
+    config['sessions'] = dict(config.get('sessions', {}), max_sessions=args.max_sessions)
+    config['alerts'] = dict(config['alerts'], auto_pause_inactivity_minutes=24 * 60)
+
+    workers = None
+    if args.workers:
+        workers = InferenceWorkers(config, args.db).start().wait_ready()
+    detector = OffloadedDetector(workers) if workers and workers.has_stage('detect') else ObjectDetector(config)
+    face_recognizer = None
+    if not args.no_faces:
+        face_recognizer = FaceRecognizer(config, Database(args.db))
+        face_recognizer.warm_up()
+
+    recorder = Recorder(face_recognizer)
+    manager = SessionManager(config, lambda frames: infer_batch(frames, detector, face_recognizer, workers),
+                             recorder.handle)
+    manager.start()
+
+    detection_config = config['detection']
+    camera_fps = config['camera'].get('fps', 20)
+    target_fps = min(detection_config.get('target_fps', 15), camera_fps / max(1, detection_config.get('frame_skip', 2)))
+
+    print("=== AURA Session Load Test ===")
+    print(f"Target per camera:  {target_fps:.1f} fps, p95 <= {args.max_p95_ms:.0f} ms")
+    print(f"{'sessions':>8} {'min fps':>8} {'mean fps':>9} {'p95 ms':>8} {'dropped':>8}")
+
+    capacity = 0
+    try:
+        for count in range(1, args.max_sessions + 1):
+            result = run_step(config, manager, recorder, args, count)
+            ok = result['min_fps'] >= target_fps * args.min_fps_ratio and \
+                result['worst_p95'] * 1000 <= args.max_p95_ms
+            print(f"{count:>8} {result['min_fps']:>8.1f} {result['mean_fps']:>9.1f} "
+                  f"{result['worst_p95'] * 1000:>8.0f} {result['dropped']:>8} {'ok' if ok else 'over'}")
+            if not ok:
+                break
+            capacity = count
+    finally:
+        manager.shutdown()
+        if workers:
+            workers.close()
+
+    print()
+    print(f"Capacity: {capacity} concurrent session(s) with {args.cameras} camera(s) each")
+    return 0 if capacity else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
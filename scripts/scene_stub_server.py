@@ -0,0 +1,66 @@
+import json
+import time
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DESCRIPTION = "A person is standing about ten feet ahead. A parked car is on your left and the sidewalk is clear."
+
+
+def make_handler(latency_ms: float, jitter_ms: float, error_rate: float):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != '/generate':
+                self.send_error(404)
+                return
+
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+
+            time.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000.0)
+
+            if random.random() < error_rate:
+                self.send_error(503, "Simulated backend failure")
+                return
+
+            if 'traffic light' in payload.get('prompt', '').lower():
+                text = random.choice(['red', 'yellow', 'green', 'none'])
+            else:
+                text = DESCRIPTION
+
+            body = json.dumps({'text': text}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def create_server(host: str = '127.0.0.1', port: int = 8765, latency_ms: float = 800,
+                  jitter_ms: float = 200, error_rate: float = 0.0) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), make_handler(latency_ms, jitter_ms, error_rate))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the scene AI backend")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=800)
+    parser.add_argument('--jitter-ms', type=float, default=200)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"Scene AI stub listening on http://{args.host}:{args.port}")
+    print("Set gemini.backend to \"http\" in config.yaml to use it.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
@@ -1,17 +1,47 @@
+let currentSessionId = null;
+
+function joinSession(sessionId) {
+    currentSessionId = sessionId;
+    socket.emit('join_session', { session_id: sessionId });
+}
+
 document.addEventListener('DOMContentLoaded', () => {
+    // Pick up the local session if one is already running (page reload, second tab).
+    fetch('/api/sessions/active')
+        .then(response => response.json())
+        .then(data => {
+            const local = (data.sessions || []).find(session => session.local && session.active);
+            if (local) {
+                joinSession(local.session_id);
+                updateSessionStatus(true);
+            }
+        })
+        .catch(error => console.error('Error loading sessions:', error));
+    
     const startBtn = document.getElementById('start-btn');
     const stopBtn = document.getElementById('stop-btn');
     
     if (startBtn) {
         startBtn.addEventListener('click', async () => {
             try {
+                const useDeviceCamera = document.getElementById('use-device-camera')?.checked;
                 const response = await fetch('/api/session/start', {
-                    method: 'POST'
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json'
+                    },
+                    body: JSON.stringify({ ingest: Boolean(useDeviceCamera) })
                 });
                 const data = await response.json();
                 
                 if (response.ok) {
                     console.log('Session started:', data);
+                    joinSession(data.session_id);
+                    if (data.ingest) {
+                        startIngest(data.session_id, data.ingest).catch(error => {
+                            alert('Could not open this device\'s camera: ' + error.message);
+                        });
+                    }
                     startBtn.classList.add('hidden');
                     stopBtn.classList.remove('hidden');
                     document.getElementById('status-indicator').classList.replace('bg-gray-400', 'bg-green-500');
@@ -29,12 +59,19 @@ document.addEventListener('DOMContentLoaded', () => {
         stopBtn.addEventListener('click', async () => {
             try {
                 const response = await fetch('/api/session/stop', {
-                    method: 'POST'
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json'
+                    },
+                    body: JSON.stringify({ session_id: currentSessionId })
                 });
                 const data = await response.json();
                 
                 if (response.ok) {
                     console.log('Session stopped');
+                    stopIngest();
+                    socket.emit('leave_session', { session_id: currentSessionId });
+                    currentSessionId = null;
                     stopBtn.classList.add('hidden');
                     startBtn.classList.remove('hidden');
                     document.getElementById('status-indicator').classList.replace('bg-green-500', 'bg-gray-400');
@@ -59,10 +96,14 @@ document.addEventListener('DOMContentLoaded', () => {
                         headers: {
                             'Content-Type': 'application/json'
                         },
-                        body: JSON.stringify({ command: command })
+                        body: JSON.stringify({ command: command, session_id: currentSessionId })
                     });
                     const data = await response.json();
-                    console.log('Voice command response:', data);
+                    if (!response.ok) {
+                        alert('Error: ' + data.error);
+                    } else {
+                        console.log('Voice command queued:', data.command_id);
+                    }
                 } catch (error) {
                     console.error('Error sending voice command:', error);
                 }
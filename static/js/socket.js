@@ -15,11 +15,15 @@ socket.on('session_started', (data) => {
 
 socket.on('session_stopped', () => {
     console.log('Session stopped');
+    stopIngest();
+    currentSessionId = null;
     updateSessionStatus(false);
 });
 
 socket.on('session_paused', (data) => {
     console.log('Session paused:', data);
+    stopIngest();
+    currentSessionId = null;
     alert('Session paused due to inactivity');
     updateSessionStatus(false);
 });
@@ -40,6 +44,106 @@ socket.on('voice_command', (data) => {
     showWakeWordStatus(false);
 });
 
+socket.on('voice_response', (data) => {
+    if (data.error) {
+        console.error('Voice command failed:', data.error);
+    } else {
+        console.log('Voice command response:', data);
+    }
+});
+
+socket.on('session_error', (data) => {
+    console.error('Session error:', data.error);
+});
+
+// Remote sessions have no server speakers; their alerts and answers are spoken here.
+// Cached phrases arrive as WAV audio, anything else is synthesised by the browser.
+let speechAudio = null;
+
+socket.on('speak', (data) => {
+    if (data.priority === 'critical') {
+        speechAudio?.pause();
+        if ('speechSynthesis' in window) window.speechSynthesis.cancel();
+    }
+    if (data.audio) {
+        const url = URL.createObjectURL(new Blob([data.audio], { type: 'audio/wav' }));
+        speechAudio = new Audio(url);
+        speechAudio.onended = () => URL.revokeObjectURL(url);
+        speechAudio.play().catch(error => console.error('Audio playback failed:', error));
+    } else if ('speechSynthesis' in window) {
+        window.speechSynthesis.speak(new SpeechSynthesisUtterance(data.text));
+    }
+});
+
+// Streams this device's camera to the session as binary JPEG frames. Only one frame is
+// in flight at a time and the server's acknowledgement says how long to wait before
+// the next, so a busy server slows the upload instead of queueing frames.
+const ingest = { running: false, stream: null, video: null, canvas: null, sessionId: null, interval: 100, quality: 0.7 };
+
+async function startIngest(sessionId, options) {
+    ingest.stream = await navigator.mediaDevices.getUserMedia({
+        video: { facingMode: 'environment', width: { ideal: options.width }, height: { ideal: options.height } },
+        audio: false
+    });
+    ingest.video = document.createElement('video');
+    ingest.video.muted = true;
+    ingest.video.playsInline = true;
+    ingest.video.srcObject = ingest.stream;
+    await ingest.video.play();
+    
+    ingest.canvas = document.createElement('canvas');
+    ingest.sessionId = sessionId;
+    ingest.interval = options.interval_ms;
+    ingest.quality = options.quality;
+    ingest.maxWidth = options.width;
+    ingest.maxHeight = options.height;
+    ingest.running = true;
+    sendIngestFrame();
+}
+
+function sendIngestFrame() {
+    if (!ingest.running) return;
+    const started = performance.now();
+    const next = () => {
+        if (ingest.running) {
+            setTimeout(sendIngestFrame, Math.max(0, ingest.interval - (performance.now() - started)));
+        }
+    };
+    
+    const video = ingest.video;
+    const scale = Math.min(1, ingest.maxWidth / video.videoWidth, ingest.maxHeight / video.videoHeight);
+    if (!video.videoWidth || !scale) {
+        next();
+        return;
+    }
+    ingest.canvas.width = Math.round(video.videoWidth * scale);
+    ingest.canvas.height = Math.round(video.videoHeight * scale);
+    ingest.canvas.getContext('2d').drawImage(video, 0, 0, ingest.canvas.width, ingest.canvas.height);
+    
+    ingest.canvas.toBlob(async (blob) => {
+        if (!blob || !ingest.running) {
+            next();
+            return;
+        }
+        const frame = await blob.arrayBuffer();
+        socket.timeout(5000).emit('ingest_frame', { session_id: ingest.sessionId, frame: frame }, (error, ack) => {
+            if (error) {
+                ingest.interval = Math.min(ingest.interval * 2, 2000);
+            } else if (ack && ack.interval_ms) {
+                ingest.interval = ack.interval_ms;
+            }
+            next();
+        });
+    }, 'image/jpeg', ingest.quality);
+}
+
+function stopIngest() {
+    ingest.running = false;
+    ingest.stream?.getTracks().forEach(track => track.stop());
+    ingest.stream = null;
+    ingest.video = null;
+}
+
 socket.on('frame', (data) => {
     console.log('Frame data received:', data); // Debug log
     const img = document.getElementById('camera-feed');
@@ -122,7 +226,9 @@ function showWakeWordStatus(show) {
 }
 
 function requestFrame() {
-    socket.emit('get_frame');
+    if (currentSessionId) {
+        socket.emit('get_frame', { session_id: currentSessionId });
+    }
 }
 
 if (document.getElementById('camera-feed')) {
@@ -1,163 +1,625 @@
+import re
 import sqlite3
 import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Iterator
+
+
+DEFAULT_DB_PATH = "database/aura.db"
+# Ranked search scores only this many of the newest matches; older hits are reachable
+# with order=recent.
+SEARCH_RANK_WINDOW = 1000
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Hot statements are module constants so every call passes the identical string
+# and hits the connection's prepared statement cache instead of re-parsing.
+INSERT_EVENT_LOG_AT = """INSERT INTO event_logs (session_id, timestamp, event_type, priority, message, metadata,
+                                         object_class, direction)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+UPSERT_EVENT_ROLLUP = """INSERT INTO event_rollups (bucket_hour, session_id, event_type, priority, object_class, direction, count)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (bucket_hour, session_id, event_type, priority, object_class, direction)
+               DO UPDATE SET count = count + excluded.count"""
+UPDATE_SESSION_PROGRESS = "UPDATE sessions SET duration_seconds = ?, total_alerts = ? WHERE session_id = ?"
+SELECT_SESSION_LOGS = "SELECT * FROM event_logs WHERE session_id = ? ORDER BY timestamp DESC"
+SELECT_ALL_EVENT_LOGS = "SELECT * FROM event_logs ORDER BY timestamp DESC LIMIT ?"
+SELECT_ALL_SESSIONS = "SELECT * FROM sessions ORDER BY start_time DESC"
+SELECT_ALL_FACES = "SELECT * FROM known_faces ORDER BY created_at DESC"
+SELECT_SEARCH_SNIPPET = """SELECT snippet(event_logs_fts, 0, '<mark>', '</mark>', '…', 12)
+               FROM event_logs_fts WHERE event_logs_fts MATCH ? AND rowid = ?"""
+
+EVENT_LOG_COLUMNS = ('id', 'session_id', 'timestamp', 'event_type', 'priority', 'message', 'metadata',
+                     'object_class', 'direction')
+SESSION_COLUMNS = ('session_id', 'start_time', 'end_time', 'duration_seconds', 'total_alerts')
+ROLLUP_DIMENSIONS = ('hour', 'day', 'session_id', 'event_type', 'priority', 'object_class', 'direction')
+ROLLUP_EXPRESSIONS = {'hour': 'bucket_hour', 'day': 'substr(bucket_hour, 1, 10)'}
+
+FTS_SUBJECT = ("trim(COALESCE({row}.object_class, '') || ' ' || "
+               "COALESCE(CASE WHEN json_valid({row}.metadata) THEN json_extract({row}.metadata, '$.name') END, ''))")
+SEARCH_TERM = re.compile(r'\w+', re.UNICODE)
+
+# Each entry upgrades the schema from the previous version; PRAGMA user_version
+# records how far a database has been migrated.
+MIGRATIONS = [
+    [
+        "CREATE INDEX IF NOT EXISTS idx_event_logs_session ON event_logs(session_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_event_logs_timestamp ON event_logs(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_event_logs_priority ON event_logs(priority, id)",
+        "CREATE INDEX IF NOT EXISTS idx_event_logs_event_type ON event_logs(event_type, id)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions(start_time, session_id)"
+    ],
+    [
+        # Fields dashboards filter on are lifted out of the metadata JSON. Rollup key
+        # columns use '' instead of NULL so they can form the primary key.
+        "ALTER TABLE event_logs ADD COLUMN object_class TEXT",
+        "ALTER TABLE event_logs ADD COLUMN direction TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_event_logs_object_class ON event_logs(object_class, id)",
+        "CREATE INDEX IF NOT EXISTS idx_event_logs_direction ON event_logs(direction, id)",
+        """CREATE TABLE IF NOT EXISTS event_rollups (
+            bucket_hour TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            object_class TEXT NOT NULL,
+            direction TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket_hour, session_id, event_type, priority, object_class, direction)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_event_rollups_session ON event_rollups(session_id, bucket_hour)"
+    ],
+    [
+        # Search index over messages plus the detected class or recognised name.
+        # Triggers keep it in step with inserts and deletes from any writer.
+        """CREATE VIRTUAL TABLE IF NOT EXISTS event_logs_fts USING fts5(
+            message, subject, tokenize='porter unicode61 remove_diacritics 2', prefix='2 3 4'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS event_logs_fts_insert AFTER INSERT ON event_logs BEGIN
+            INSERT INTO event_logs_fts (rowid, message, subject) VALUES (new.id, new.message, {FTS_SUBJECT.format(row='new')});
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS event_logs_fts_delete AFTER DELETE ON event_logs BEGIN
+            DELETE FROM event_logs_fts WHERE rowid = old.id;
+        END""",
+        f"""INSERT INTO event_logs_fts (rowid, message, subject)
+            SELECT id, message, {FTS_SUBJECT.format(row='event_logs')} FROM event_logs"""
+    ],
+    [
+        # Rollups are kept after raw events expire, so the backfill has to know whether
+        # it still covers every event. A database with no events yet is covered by
+        # the live rollups from the start.
+        "CREATE TABLE IF NOT EXISTS rollup_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO rollup_state (key, value) SELECT 'complete', 1 WHERE NOT EXISTS (SELECT 1 FROM event_logs)"
+    ],
+    [
+        # The promoted-field backfill updates rows after they were indexed, so updates
+        # re-index too; rows indexed before this trigger existed are rebuilt once.
+        f"""CREATE TRIGGER IF NOT EXISTS event_logs_fts_update AFTER UPDATE OF message, metadata, object_class
+            ON event_logs BEGIN
+            DELETE FROM event_logs_fts WHERE rowid = old.id;
+            INSERT INTO event_logs_fts (rowid, message, subject) VALUES (new.id, new.message, {FTS_SUBJECT.format(row='new')});
+        END""",
+        "DELETE FROM event_logs_fts",
+        f"""INSERT INTO event_logs_fts (rowid, message, subject)
+            SELECT id, message, {FTS_SUBJECT.format(row='event_logs')} FROM event_logs"""
+    ]
+]
+
+
+def promoted_fields(metadata) -> Tuple[Optional[str], Optional[str]]:
+    if not isinstance(metadata, dict):
+        return None, None
+    return metadata.get('class'), metadata.get('direction')
+
+
+def fts_match_expression(text: str) -> Optional[str]:
+    # Quote every word so punctuation in user input can never be read as FTS5
+    # query syntax; the last word is a prefix so results appear while typing.
+    terms = SEARCH_TERM.findall(text or '')
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def rollup_key(row: Tuple) -> Tuple:
+    session_id, timestamp, event_type, priority, _, _, object_class, direction = row
+    return (str(timestamp)[:13] + ':00:00', session_id or '', event_type or '', priority or '',
+            object_class or '', direction or '')
 
 
 class Database:
-    def __init__(self, db_path: str = "database/aura.db"):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
         self.db_path = db_path
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.local = threading.local()
+        self.write_lock = threading.RLock()
+        self.connections = []
+        self.connections_lock = threading.Lock()
         self._init_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        # check_same_thread is off only so connections of finished threads can be
+        # closed from here; each live connection is still used by one thread.
+        conn = sqlite3.connect(self.db_path, timeout=10, cached_statements=128, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Only takes effect on a new, empty file (and must come before the switch to WAL);
+        # existing databases keep their mode until an explicit rebuild.
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        self.local.conn = conn
+        with self.connections_lock:
+            self._prune_connections()
+            self.connections.append((threading.current_thread(), conn))
+        return conn
+
+    def _prune_connections(self):
+        alive = []
+        for thread, conn in self.connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self.connections = alive
+
+    @contextmanager
+    def _write(self):
+        # WAL allows one writer alongside any number of readers. Serialising writers
+        # in-process avoids busy waits on SQLite's own lock.
+        conn = self._connect()
+        with self.write_lock:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Dict]:
+        cursor = self._connect().execute(sql, params)
+        return [dict(row) for row in cursor.fetchall()]
+
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS known_faces (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                relationship TEXT,
-                face_encoding BLOB NOT NULL,
-                photo_path TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                session_id TEXT PRIMARY KEY,
-                start_time TIMESTAMP,
-                end_time TIMESTAMP,
-                duration_seconds INTEGER,
-                total_alerts INTEGER DEFAULT 0
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS event_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                event_type TEXT,
-                priority TEXT,
-                message TEXT,
-                metadata TEXT,
-                FOREIGN KEY (session_id) REFERENCES sessions(session_id)
-            )
-        """)
+        with self._write() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS known_faces (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    relationship TEXT,
+                    face_encoding BLOB NOT NULL,
+                    photo_path TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    start_time TIMESTAMP,
+                    end_time TIMESTAMP,
+                    duration_seconds INTEGER,
+                    total_alerts INTEGER DEFAULT 0
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS event_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    event_type TEXT,
+                    priority TEXT,
+                    message TEXT,
+                    metadata TEXT,
+                    FOREIGN KEY (session_id) REFERENCES sessions(session_id)
+                )
+            """)
+
+        self._migrate()
+
+    def _migrate(self):
+        conn = self._connect()
+        with self.write_lock:
+            # Other processes may open the same file at once (the inference workers do);
+            # holding the write lock from the version check to the commit means only one
+            # of them applies each migration.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                    for statement in statements:
+                        conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {target}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
 
-        conn.commit()
-        conn.close()
+    def schema_version(self) -> int:
+        return self._connect().execute("PRAGMA user_version").fetchone()[0]
 
     def add_face(self, name: str, relationship: str, face_encoding: bytes, photo_path: str) -> int:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO known_faces (name, relationship, face_encoding, photo_path) VALUES (?, ?, ?, ?)",
-            (name, relationship, face_encoding, photo_path)
-        )
-        face_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return face_id
+        with self._write() as cursor:
+            cursor.execute(
+                "INSERT INTO known_faces (name, relationship, face_encoding, photo_path) VALUES (?, ?, ?, ?)",
+                (name, relationship, face_encoding, photo_path)
+            )
+            return cursor.lastrowid
 
     def get_all_faces(self) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM known_faces ORDER BY created_at DESC")
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+        return self._query(SELECT_ALL_FACES)
 
     def delete_face(self, face_id: int) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM known_faces WHERE id = ?", (face_id,))
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        return deleted
+        with self._write() as cursor:
+            cursor.execute("DELETE FROM known_faces WHERE id = ?", (face_id,))
+            return cursor.rowcount > 0
 
     def get_face_by_id(self, face_id: int) -> Optional[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM known_faces WHERE id = ?", (face_id,))
-        row = cursor.fetchone()
-        conn.close()
-        return dict(row) if row else None
+        rows = self._query("SELECT * FROM known_faces WHERE id = ?", (face_id,))
+        return rows[0] if rows else None
 
     def create_session(self, session_id: str) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         try:
-            cursor.execute(
-                "INSERT INTO sessions (session_id, start_time) VALUES (?, ?)",
-                (session_id, datetime.now().isoformat())
-            )
-            conn.commit()
-            conn.close()
+            with self._write() as cursor:
+                cursor.execute(
+                    "INSERT INTO sessions (session_id, start_time) VALUES (?, ?)",
+                    (session_id, datetime.now().isoformat())
+                )
             return True
         except sqlite3.IntegrityError:
-            conn.close()
             return False
 
     def end_session(self, session_id: str, duration_seconds: int, total_alerts: int) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """UPDATE sessions SET end_time = ?, duration_seconds = ?, total_alerts = ?
-               WHERE session_id = ?""",
-            (datetime.now().isoformat(), duration_seconds, total_alerts, session_id)
-        )
-        updated = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        return updated
+        with self._write() as cursor:
+            cursor.execute(
+                """UPDATE sessions SET end_time = ?, duration_seconds = ?, total_alerts = ?
+                   WHERE session_id = ?""",
+                (datetime.now().isoformat(), duration_seconds, total_alerts, session_id)
+            )
+            return cursor.rowcount > 0
 
     def add_event_log(self, session_id: str, event_type: str, priority: str, message: str, metadata: Dict = None):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        metadata_json = json.dumps(metadata) if metadata else None
-        cursor.execute(
-            """INSERT INTO event_logs (session_id, event_type, priority, message, metadata)
-               VALUES (?, ?, ?, ?, ?)""",
-            (session_id, event_type, priority, message, metadata_json)
-        )
-        conn.commit()
-        conn.close()
+        self.add_event_logs(session_id, [(event_type, priority, message, metadata)])
+
+    def add_event_logs(self, session_id: str, events: List[Tuple[str, str, str, Optional[Dict]]]):
+        if not events:
+            return
+        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(session_id, timestamp, event_type, priority, message,
+                 json.dumps(metadata) if metadata else None) + promoted_fields(metadata)
+                for event_type, priority, message, metadata in events]
+        self.write_event_batch(rows)
+
+    def write_event_batch(self, rows: List[Tuple]) -> List[int]:
+        # executemany does not report row ids, and live subscribers need them to
+        # resume; per-row execute in one transaction costs little more.
+        rollups = {}
+        for row in rows:
+            key = rollup_key(row)
+            rollups[key] = rollups.get(key, 0) + 1
+
+        ids = []
+        with self._write() as cursor:
+            for row in rows:
+                cursor.execute(INSERT_EVENT_LOG_AT, row)
+                ids.append(cursor.lastrowid)
+            cursor.executemany(UPSERT_EVENT_ROLLUP, [key + (count,) for key, count in rollups.items()])
+        return ids
+
+    def checkpoint_sessions(self, updates: List[Tuple[int, int, str]]):
+        with self._write() as cursor:
+            cursor.executemany(UPDATE_SESSION_PROGRESS, updates)
 
     def get_session_logs(self, session_id: str) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM event_logs WHERE session_id = ? ORDER BY timestamp DESC",
-            (session_id,)
-        )
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+        return self._query(SELECT_SESSION_LOGS, (session_id,))
 
     def get_all_sessions(self) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM sessions ORDER BY start_time DESC")
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+        return self._query(SELECT_ALL_SESSIONS)
 
     def get_all_event_logs(self, limit: int = 100) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM event_logs ORDER BY timestamp DESC LIMIT ?", (limit,))
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+        return self._query(SELECT_ALL_EVENT_LOGS, (limit,))
+
+    def query_event_logs(self, session_id: Optional[str] = None, priorities: Optional[List[str]] = None,
+                         event_types: Optional[List[str]] = None, since: Optional[str] = None,
+                         until: Optional[str] = None, before_id: Optional[int] = None,
+                         after_id: Optional[int] = None, limit: int = 100,
+                         fields: Optional[List[str]] = None, object_classes: Optional[List[str]] = None,
+                         directions: Optional[List[str]] = None) -> List[Dict]:
+        columns = [c for c in (fields or EVENT_LOG_COLUMNS) if c in EVENT_LOG_COLUMNS]
+        if 'id' not in columns:
+            columns.insert(0, 'id')
+
+        clauses = []
+        params = []
+        if session_id:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if priorities:
+            clauses.append(f"priority IN ({','.join('?' * len(priorities))})")
+            params.extend(priorities)
+        if event_types:
+            clauses.append(f"event_type IN ({','.join('?' * len(event_types))})")
+            params.extend(event_types)
+        if object_classes:
+            clauses.append(f"object_class IN ({','.join('?' * len(object_classes))})")
+            params.extend(object_classes)
+        if directions:
+            clauses.append(f"direction IN ({','.join('?' * len(directions))})")
+            params.extend(directions)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        if after_id is not None:
+            clauses.append("id > ?")
+            params.append(after_id)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "ASC" if after_id is not None and before_id is None else "DESC"
+        params.append(limit)
+        return self._query(
+            f"SELECT {', '.join(columns)} FROM event_logs {where} ORDER BY id {order} LIMIT ?",
+            tuple(params)
+        )
+
+    def query_sessions(self, before: Optional[Tuple[str, str]] = None, limit: int = 50,
+                       fields: Optional[List[str]] = None) -> List[Dict]:
+        columns = [c for c in (fields or SESSION_COLUMNS) if c in SESSION_COLUMNS]
+        for key in ('start_time', 'session_id'):
+            if key not in columns:
+                columns.append(key)
+
+        where = ""
+        params = []
+        if before is not None:
+            where = "WHERE (start_time, session_id) < (?, ?)"
+            params.extend(before)
+        params.append(limit)
+        return self._query(
+            f"SELECT {', '.join(columns)} FROM sessions {where} "
+            f"ORDER BY start_time DESC, session_id DESC LIMIT ?",
+            tuple(params)
+        )
+
+    def iter_event_logs(self, session_id: Optional[str] = None, since_id: Optional[int] = None,
+                        fields: Optional[List[str]] = None, chunk_size: int = 1000) -> Iterator[Dict]:
+        # Keyset chunks rather than one long-lived cursor: memory stays bounded and no
+        # read transaction is held open across the export, so WAL checkpoints proceed.
+        last_id = since_id or 0
+        while True:
+            rows = self.query_event_logs(session_id=session_id, after_id=last_id, limit=chunk_size, fields=fields)
+            for row in rows:
+                yield row
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1]['id']
+
+    def iter_sessions(self, fields: Optional[List[str]] = None, chunk_size: int = 1000) -> Iterator[Dict]:
+        before = None
+        while True:
+            rows = self.query_sessions(before=before, limit=chunk_size, fields=fields)
+            for row in rows:
+                yield row
+            if len(rows) < chunk_size:
+                return
+            before = (rows[-1]['start_time'], rows[-1]['session_id'])
+
+    def search_event_logs(self, text: str, session_id: Optional[str] = None,
+                          priorities: Optional[List[str]] = None, event_types: Optional[List[str]] = None,
+                          since: Optional[str] = None, until: Optional[str] = None, order: str = 'rank',
+                          offset: int = 0, limit: int = 50, rank_window: int = SEARCH_RANK_WINDOW) -> List[Dict]:
+        match = fts_match_expression(text)
+        if not match:
+            return []
+
+        clauses = ["event_logs_fts MATCH ?"]
+        params = [match]
+        if session_id:
+            clauses.append("e.session_id = ?")
+            params.append(session_id)
+        for column, values in (('priority', priorities), ('event_type', event_types)):
+            if values:
+                clauses.append(f"e.{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        if since:
+            clauses.append("e.timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("e.timestamp < ?")
+            params.append(until)
+
+        score = "event_logs_fts.rank" if order == 'rank' else "NULL"
+        matches = f"""SELECT e.id, e.session_id, e.timestamp, e.event_type, e.priority, e.message,
+                              {score} AS score
+                       FROM event_logs_fts JOIN event_logs e ON e.id = event_logs_fts.rowid
+                       WHERE {' AND '.join(clauses)}
+                       ORDER BY event_logs_fts.rowid DESC"""
+        if order == 'rank':
+            # bm25 has to score every candidate, so a term present in most rows would
+            # cost a full pass; rank only the newest window of matches instead.
+            sql = f"SELECT * FROM ({matches} LIMIT ?) ORDER BY score LIMIT ? OFFSET ?"
+            params.extend([rank_window, limit, offset])
+        else:
+            sql = f"{matches} LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+        results = self._query(sql, tuple(params))
+
+        if results:
+            # Snippets are only worth building for the page being returned; an equality
+            # rowid constraint lets FTS5 seek straight to each row.
+            conn = self._connect()
+            for row in results:
+                snippet = conn.execute(SELECT_SEARCH_SNIPPET, (match, row['id'])).fetchone()
+                row['snippet'] = snippet[0] if snippet else row['message']
+        return results
+
+    def query_rollups(self, group_by: List[str], session_id: Optional[str] = None,
+                      priorities: Optional[List[str]] = None, event_types: Optional[List[str]] = None,
+                      object_classes: Optional[List[str]] = None, directions: Optional[List[str]] = None,
+                      since: Optional[str] = None, until: Optional[str] = None, limit: int = 1000) -> List[Dict]:
+        dimensions = [d for d in group_by if d in ROLLUP_DIMENSIONS]
+        selects = [f"{ROLLUP_EXPRESSIONS.get(d, d)} AS {d}" for d in dimensions]
 
+        clauses = []
+        params = []
+        for column, values in (('priority', priorities), ('event_type', event_types),
+                               ('object_class', object_classes), ('direction', directions)):
+            if values:
+                clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        if session_id:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if since:
+            clauses.append("bucket_hour >= ?")
+            params.append(since)
+        if until:
+            clauses.append("bucket_hour < ?")
+            params.append(until)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        group = f"GROUP BY {', '.join(dimensions)} ORDER BY {', '.join(dimensions)}" if dimensions else ""
+        params.append(limit)
+        return self._query(
+            f"SELECT {', '.join(selects + ['SUM(count) AS count'])} FROM event_rollups {where} {group} LIMIT ?",
+            tuple(params)
+        )
+
+    def backfill_promoted_fields(self, chunk_size: int = 5000) -> int:
+        max_id = self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM event_logs").fetchone()[0]
+        updated = 0
+        for start in range(0, max_id, chunk_size):
+            with self._write() as cursor:
+                cursor.execute(
+                    """UPDATE event_logs
+                       SET object_class = json_extract(metadata, '$.class'),
+                           direction = json_extract(metadata, '$.direction')
+                       WHERE id > ? AND id <= ? AND metadata IS NOT NULL AND json_valid(metadata)""",
+                    (start, start + chunk_size)
+                )
+                updated += cursor.rowcount
+        return updated
+
+    def rebuild_rollups(self) -> int:
+        # Rebuilding recounts from the raw events, so it only runs while all of them are
+        # still present; afterwards the live rollups keep it complete and it is a no-op.
+        with self._write() as cursor:
+            state = dict(cursor.execute("SELECT key, value FROM rollup_state").fetchall())
+            if state.get('complete'):
+                return 0
+            oldest_event = cursor.execute("SELECT MIN(timestamp) FROM event_logs").fetchone()[0]
+            oldest_bucket = cursor.execute("SELECT MIN(bucket_hour) FROM event_rollups").fetchone()[0]
+            if state.get('events_purged') or (oldest_bucket and (
+                    oldest_event is None or oldest_bucket < str(oldest_event)[:13] + ':00:00')):
+                raise RuntimeError("Raw events have already been purged; rebuilding would lose rollup history")
+            cursor.execute("DELETE FROM event_rollups")
+            cursor.execute(
+                """INSERT INTO event_rollups (bucket_hour, session_id, event_type, priority, object_class, direction, count)
+                   SELECT substr(timestamp, 1, 13) || ':00:00', COALESCE(session_id, ''), COALESCE(event_type, ''),
+                          COALESCE(priority, ''), COALESCE(object_class, ''), COALESCE(direction, ''), COUNT(*)
+                   FROM event_logs
+                   GROUP BY 1, 2, 3, 4, 5, 6"""
+            )
+            buckets = cursor.rowcount
+            cursor.execute("INSERT OR REPLACE INTO rollup_state (key, value) VALUES ('complete', 1)")
+            return buckets
+
+    def select_expired_events(self, cutoff: str, critical: bool, limit: int) -> List[Dict]:
+        # Ordered by timestamp so the scan walks idx_event_logs_timestamp from the oldest rows.
+        priority_clause = "priority = 'critical'" if critical else "(priority IS NULL OR priority != 'critical')"
+        return self._query(
+            f"""SELECT {', '.join(EVENT_LOG_COLUMNS)} FROM event_logs
+                WHERE timestamp < ? AND {priority_clause}
+                ORDER BY timestamp LIMIT ?""",
+            (cutoff, limit)
+        )
+
+    def delete_event_logs(self, ids: List[int]) -> int:
+        if not ids:
+            return 0
+        with self._write() as cursor:
+            cursor.execute(f"DELETE FROM event_logs WHERE id IN ({','.join('?' * len(ids))})", tuple(ids))
+            cursor.execute("INSERT OR REPLACE INTO rollup_state (key, value) VALUES ('events_purged', 1)")
+            return cursor.rowcount
+
+    def select_expired_sessions(self, cutoff: str, limit: int) -> List[Dict]:
+        return self._query(
+            f"""SELECT {', '.join(SESSION_COLUMNS)} FROM sessions s
+                WHERE s.start_time < ? AND s.end_time IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM event_logs e WHERE e.session_id = s.session_id)
+                ORDER BY s.start_time LIMIT ?""",
+            (cutoff, limit)
+        )
+
+    def delete_sessions(self, session_ids: List[str]) -> int:
+        if not session_ids:
+            return 0
+        with self._write() as cursor:
+            cursor.execute(f"DELETE FROM sessions WHERE session_id IN ({','.join('?' * len(session_ids))})",
+                           tuple(session_ids))
+            return cursor.rowcount
+
+    def auto_vacuum_mode(self) -> int:
+        return self._connect().execute("PRAGMA auto_vacuum").fetchone()[0]
+
+    def enable_incremental_vacuum(self):
+        # auto_vacuum only changes on a rebuilt file, so this needs one full VACUUM.
+        conn = self._connect()
+        with self.write_lock:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+
+    def incremental_vacuum(self, pages: int) -> int:
+        conn = self._connect()
+        with self.write_lock:
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after
+
+    def checkpoint_wal(self):
+        with self.write_lock:
+            self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+    def storage_stats(self) -> Dict:
+        conn = self._connect()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        wal_path = f"{self.db_path}-wal"
+        return {
+            'file_bytes': os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+            'wal_bytes': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+            'page_size': page_size,
+            'page_count': page_count,
+            'free_pages': freelist,
+            'free_bytes': freelist * page_size,
+            'auto_vacuum': conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+            'event_logs': conn.execute("SELECT COUNT(*) FROM event_logs").fetchone()[0],
+            'sessions': conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0],
+            'rollup_buckets': conn.execute("SELECT COUNT(*) FROM event_rollups").fetchone()[0]
+        }
+
+    def close(self):
+        with self.connections_lock:
+            connections, self.connections = self.connections, []
+        for _, conn in connections:
+            conn.close()
+        self.local = threading.local()
@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import queue
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from utils.metrics import loop_lag_seconds
+
+
+def configure_blocking_pool(threads: int):
+    try:
+        from eventlet import tpool
+        tpool.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def in_green_thread() -> bool:
+    # Native threads run in their own root greenlet; anything with a parent was
+    # spawned onto the eventlet hub.
+    try:
+        import greenlet
+    except ImportError:
+        return False
+    return greenlet.getcurrent().parent is not None
+
+
+def run_blocking(fn: Callable, *args, **kwargs):
+    # Hands blocking native work (model inference, Tesseract, cloud SDK calls) to
+    # eventlet's OS thread pool so the hub keeps serving other clients while the
+    # calling green thread waits. Plain threads just make the call.
+    if not in_green_thread():
+        return fn(*args, **kwargs)
+    from eventlet import tpool
+    return tpool.execute(fn, *args, **kwargs)
+
+
+class HubBridge:
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.calls = queue.SimpleQueue()
+        self.running = False
+
+    def call(self, fn: Callable, *args, **kwargs):
+        # Socket.IO emits are only safe on the hub. Calls from native threads (frame loop,
+        # wake word listener, model loaders) are queued and replayed by run(), including
+        # those made before it has started.
+        if in_green_thread():
+            return fn(*args, **kwargs)
+        self.calls.put((fn, args, kwargs))
+
+    def run(self, sleep: Callable[[float], None]):
+        # No thread-safe way to wake the hub without monkey patching, so poll briefly.
+        self.running = True
+        while self.running:
+            while True:
+                try:
+                    fn, args, kwargs = self.calls.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    fn(*args, **kwargs)
+                except Exception as e:
+                    print(f"Hub bridge call error: {e}")
+            sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+
+
+class LoopLagMonitor:
+    def __init__(self, config: dict):
+        monitor_config = config.get('execution', {})
+        self.interval = monitor_config.get('loop_lag_interval_ms', 100) / 1000.0
+        self.stall_threshold = monitor_config.get('loop_stall_threshold_ms', 250) / 1000.0
+        self.stack_depth = monitor_config.get('stall_stack_depth', 12)
+        self.recent = deque(maxlen=monitor_config.get('recent_stalls', 20))
+        self.heartbeat = time.perf_counter()
+        self.loop_thread = None
+        self.current_stall = None
+        self.max_lag = 0.0
+        self.stall_count = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.watchdog = None
+
+    def run(self, sleep: Callable[[float], None]):
+        # Runs as a green task: whatever the hub could not get back to on time shows up
+        # as oversleep.
+        self.loop_thread = threading.get_ident()
+        if self.watchdog is None:
+            self.watchdog = threading.Thread(target=self._watch, name='loop-lag-watchdog', daemon=True)
+            self.watchdog.start()
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - started - self.interval)
+            loop_lag_seconds.observe(lag)
+            with self.lock:
+                self.heartbeat = now
+                self.max_lag = max(self.max_lag, lag)
+                if self.current_stall is not None:
+                    self.current_stall['seconds'] = round(lag, 3)
+                    self.recent.append(self.current_stall)
+                    print(f"Event loop stalled for {lag * 1000:.0f} ms in {self.current_stall['where']}")
+                    self.current_stall = None
+
+    def _watch(self):
+        # A native thread can still look at the hub while it is stuck, so the stall is
+        # attributed to the code that caused it rather than noticed afterwards.
+        while not self.stop_event.wait(self.interval):
+            with self.lock:
+                overdue = time.perf_counter() - self.heartbeat - self.interval
+                if overdue < self.stall_threshold or self.current_stall is not None:
+                    continue
+                self.stall_count += 1
+                stack = self._capture_stack()
+                # Name the innermost application frame; the top of the stack is usually
+                # inside a library.
+                root = os.getcwd()
+                where = next((f for f in stack if root in f and 'site-packages' not in f),
+                             stack[0] if stack else 'unknown')
+                self.current_stall = {
+                    'detected_at': time.time(),
+                    'where': where,
+                    'stack': stack,
+                    'seconds': None
+                }
+
+    def _capture_stack(self):
+        frame = sys._current_frames().get(self.loop_thread)
+        stack = []
+        while frame is not None and len(stack) < self.stack_depth:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+            frame = frame.f_back
+        return stack
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {
+                'interval_ms': self.interval * 1000,
+                'stall_threshold_ms': self.stall_threshold * 1000,
+                'max_lag_ms': round(self.max_lag * 1000, 1),
+                'stalls': self.stall_count,
+                'stalled_now': self.current_stall is not None,
+                'recent': list(self.recent)
+            }
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        self.stop_event.set()
+        if self.watchdog is not None:
+            self.watchdog.join(timeout)
@@ -0,0 +1,82 @@
+import io
+import csv
+import json
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+PARQUET_BATCH_ROWS = 10000
+
+
+def export_ndjson(rows: Iterable[Dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+def export_csv(rows: Iterable[Dict], columns: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        # Hand each line to the response as it is produced instead of growing the buffer.
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    remainder = buffer.getvalue()
+    if remainder:
+        yield remainder
+
+
+def export_rows(rows: Iterable[Dict], export_format: str, columns: List[str]) -> Iterator[str]:
+    if export_format == 'ndjson':
+        return export_ndjson(rows)
+    if export_format == 'csv':
+        return export_csv(rows, columns)
+    raise ValueError(f"Unsupported export format: {export_format}")
+
+
+def write_parquet(rows: Iterable[Dict], path: str, columns: List[str],
+                  batch_rows: int = PARQUET_BATCH_ROWS) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Every column is written as a nullable string or integer so the schema is fixed
+    # before the first batch arrives; analytics tools cast on read.
+    integer_columns = {'id', 'duration_seconds', 'total_alerts'}
+    schema = pa.schema([(c, pa.int64() if c in integer_columns else pa.string()) for c in columns])
+
+    written = 0
+    writer: Optional[pq.ParquetWriter] = None
+    batch = []
+    try:
+        writer = pq.ParquetWriter(path, schema)
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                writer.write_table(_parquet_table(batch, schema, columns))
+                written += len(batch)
+                batch = []
+        if batch or written == 0:
+            writer.write_table(_parquet_table(batch, schema, columns))
+            written += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def _parquet_table(batch: List[Dict], schema, columns: List[str]):
+    import pyarrow as pa
+
+    arrays = {}
+    for column in columns:
+        values = [row.get(column) for row in batch]
+        if schema.field(column).type == pa.string():
+            values = [None if v is None else str(v) for v in values]
+        arrays[column] = values
+    return pa.table(arrays, schema=schema)
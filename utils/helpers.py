@@ -1,7 +1,10 @@
 import os
+import json
+import base64
 import yaml
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Tuple
+from typing import Tuple, Optional, List
 
 
 def load_config(config_path: str = "config.yaml") -> dict:
@@ -37,3 +40,37 @@ def format_distance_message(distance_category: str, distance_feet: float, direct
     direction_text = f" from your {direction}" if direction else ""
     return f"{distance_feet:.0f} feet{direction_text}"
 
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[list]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def split_query_list(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def inclusive_until(value: Optional[str]) -> Optional[str]:
+    # A bare date means "through the end of that day", while the queries compare with <.
+    if not value:
+        return None
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return value
+    return (day + timedelta(days=1)).strftime('%Y-%m-%d')
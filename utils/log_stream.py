@@ -0,0 +1,112 @@
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class LogSubscription:
+    def __init__(self, session_id: Optional[str] = None, priorities: Optional[List[str]] = None,
+                 last_id: int = 0, max_buffer: int = 500):
+        self.session_id = session_id
+        self.priorities = set(priorities) if priorities else None
+        self.last_id = last_id
+        self.buffer = deque(maxlen=max_buffer)
+        self.backlog = []
+        self.truncated = False
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def matches(self, row: Dict) -> bool:
+        if self.session_id and row.get('session_id') != self.session_id:
+            return False
+        if self.priorities and row.get('priority') not in self.priorities:
+            return False
+        return True
+
+    def push(self, rows: List[Dict]):
+        with self.lock:
+            for row in rows:
+                if not self.matches(row):
+                    continue
+                # A full deque discards its oldest entry; count it so the client
+                # knows to fill the gap from /api/logs.
+                if len(self.buffer) == self.buffer.maxlen:
+                    self.dropped += 1
+                self.buffer.append(row)
+
+    def drain(self) -> Dict:
+        with self.lock:
+            pending = self.backlog + list(self.buffer)
+            self.backlog = []
+            self.buffer.clear()
+            dropped, self.dropped = self.dropped, 0
+            truncated, self.truncated = self.truncated, False
+
+        # Backfill and live rows can overlap while subscribing; ids only move forward.
+        rows = []
+        for row in pending:
+            if row['id'] > self.last_id:
+                rows.append(row)
+                self.last_id = row['id']
+        return {'rows': rows, 'dropped': dropped, 'truncated': truncated, 'last_id': self.last_id}
+
+
+class LogStream:
+    def __init__(self, database, config: dict):
+        self.database = database
+        session_config = config.get('session', {})
+        self.max_buffer = session_config.get('stream_buffer_size', 500)
+        self.backfill_limit = session_config.get('stream_backfill_limit', 500)
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.stats = {'published': 0, 'delivered': 0, 'dropped': 0}
+
+    def subscribe(self, session_id: Optional[str] = None, priorities: Optional[List[str]] = None,
+                  last_id: Optional[int] = None) -> LogSubscription:
+        start_id = last_id if last_id is not None else self._latest_id()
+        subscription = LogSubscription(session_id, priorities, start_id, self.max_buffer)
+        # Register before backfilling so nothing written in between is missed.
+        with self.lock:
+            self.subscribers.append(subscription)
+
+        if last_id is not None:
+            try:
+                backlog = self.database.query_event_logs(session_id=session_id, priorities=priorities,
+                                                         after_id=last_id, limit=self.backfill_limit)
+            except Exception as e:
+                print(f"Log stream backfill error: {e}")
+                backlog = []
+            with subscription.lock:
+                subscription.backlog = backlog
+                subscription.truncated = len(backlog) >= self.backfill_limit
+        return subscription
+
+    def _latest_id(self) -> int:
+        try:
+            rows = self.database.query_event_logs(limit=1, fields=['id'])
+        except Exception:
+            return 0
+        return rows[0]['id'] if rows else 0
+
+    def unsubscribe(self, subscription: LogSubscription):
+        subscription.closed = True
+        with self.lock:
+            if subscription in self.subscribers:
+                self.subscribers.remove(subscription)
+
+    def publish(self, rows: List[Dict]):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        self.stats['published'] += len(rows)
+        for subscription in subscribers:
+            subscription.push(rows)
+
+    def drain(self, subscription: LogSubscription) -> Dict:
+        batch = subscription.drain()
+        self.stats['delivered'] += len(batch['rows'])
+        self.stats['dropped'] += batch['dropped']
+        return batch
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return dict(self.stats, subscribers=len(self.subscribers))
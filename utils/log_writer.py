@@ -0,0 +1,161 @@
+import json
+import time
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from utils.database import EVENT_LOG_COLUMNS, promoted_fields
+from utils.metrics import errors_total
+from utils.profiler import timed_stage
+
+
+class EventLogWriter:
+    def __init__(self, database, config: dict):
+        self.database = database
+        session_config = config.get('session', {})
+        self.flush_interval = session_config.get('log_flush_interval_seconds', 1.0)
+        self.batch_size = session_config.get('log_batch_size', 200)
+        self.auto_save_interval = session_config.get('auto_save_interval_seconds', 30)
+        self.max_entries = session_config.get('max_log_entries_per_session', 1000)
+        self.queue = queue.Queue(maxsize=session_config.get('log_queue_size', 5000))
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.stats = {'written': 0, 'batches': 0, 'dropped_full': 0, 'dropped_cap': 0, 'checkpoints': 0}
+        self.last_checkpoint = time.time()
+        self.listeners = []
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='event-log-writer', daemon=True)
+        self.thread.start()
+
+    def track_session(self, session_id: str, start_time: float):
+        with self.lock:
+            self.sessions[session_id] = {'start_time': start_time, 'total_alerts': 0, 'entries': 0}
+
+    def update_session(self, session_id: str, total_alerts: int):
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session['total_alerts'] = total_alerts
+
+    def untrack_session(self, session_id: str):
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def log(self, session_id: str, event_type: str, priority: str, message: str, metadata: Dict = None) -> bool:
+        return self.log_many(session_id, [(event_type, priority, message, metadata)]) > 0
+
+    def log_many(self, session_id: str, events: List[Tuple[str, str, str, Optional[Dict]]]) -> int:
+        timestamp = time.time()
+        accepted = 0
+
+        for event_type, priority, message, metadata in events:
+            if not self._reserve(session_id, priority):
+                continue
+            try:
+                self.queue.put_nowait((session_id, timestamp, event_type, priority, message, metadata))
+                accepted += 1
+            except queue.Full:
+                self.stats['dropped_full'] += 1
+        return accepted
+
+    def _reserve(self, session_id: str, priority: str) -> bool:
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return True
+            # Critical events are always kept; the cap only trims routine chatter.
+            if priority != 'critical' and self.max_entries and session['entries'] >= self.max_entries:
+                self.stats['dropped_cap'] += 1
+                return False
+            session['entries'] += 1
+            return True
+
+    def _run(self):
+        while self.running or not self.queue.empty():
+            batch = []
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    self._write(batch)
+                    batch = []
+                    self._checkpoint(force=True)
+                    item.set()
+                    continue
+                batch.append(item)
+
+            self._write(batch)
+            self._checkpoint()
+
+    def _write(self, batch: List[Tuple]):
+        if not batch:
+            return
+
+        rows = [
+            (session_id, time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp)), event_type, priority,
+             message, json.dumps(metadata, default=str) if metadata else None) + promoted_fields(metadata)
+            for session_id, timestamp, event_type, priority, message, metadata in batch
+        ]
+        try:
+            with timed_stage('db_write'):
+                ids = self.database.write_event_batch(rows)
+            self.stats['written'] += len(rows)
+            self.stats['batches'] += 1
+        except Exception as e:
+            print(f"Event log write error: {e}")
+            errors_total.inc(component='db_write')
+            return
+
+        if self.listeners:
+            written = [dict(zip(EVENT_LOG_COLUMNS, (row_id,) + row)) for row_id, row in zip(ids, rows)]
+            for listener in self.listeners:
+                try:
+                    listener(written)
+                except Exception as e:
+                    print(f"Event log listener error: {e}")
+
+    def _checkpoint(self, force: bool = False):
+        now = time.time()
+        if not force and now - self.last_checkpoint < self.auto_save_interval:
+            return
+        self.last_checkpoint = now
+
+        # Duration grows whether or not anything happened, so every tracked session is
+        # written on each interval, quiet ones included.
+        with self.lock:
+            updates = [(int(now - session['start_time']), session['total_alerts'], session_id)
+                       for session_id, session in self.sessions.items()]
+
+        if not updates:
+            return
+        try:
+            self.database.checkpoint_sessions(updates)
+            self.stats['checkpoints'] += 1
+        except Exception as e:
+            print(f"Session checkpoint error: {e}")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        if not self.thread.is_alive():
+            return False
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, queued=self.queue.qsize())
+
+    def stop(self, timeout: float = 5.0):
+        if not self.running:
+            return
+        self.flush(timeout)
+        self.running = False
+        self.thread.join(timeout)
@@ -0,0 +1,231 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# Seconds, from sub-millisecond queue hops up to slow cloud calls.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict) -> Tuple:
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _format_labels(labelnames: Tuple[str, ...], key: Tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = [(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for name, value in pairs]
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _remove_series(series: Dict, labelnames: Tuple[str, ...], labels: Dict, lock):
+    # Drops every series whose given labels match, whatever its other labels are.
+    positions = [(labelnames.index(name), str(value)) for name, value in labels.items()]
+    with lock:
+        for key in [k for k in series if all(k[i] == value for i, value in positions)]:
+            del series[key]
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def remove(self, **labels):
+        _remove_series(self.values, self.labelnames, labels, self.lock)
+
+    def render(self) -> List[str]:
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {','.join(key) or 'total': value for key, value in sorted(self.values.items())}
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum and count.
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def remove(self, **labels):
+        _remove_series(self.series, self.labelnames, labels, self.lock)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _copy(self) -> List[Tuple[Tuple, List[int], float, int]]:
+        with self.lock:
+            return [(key, list(s[0]), s[1], s[2]) for key, s in sorted(self.series.items())]
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, counts, total, count in self._copy():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        # Linear interpolation inside the bucket, as histogram_quantile() does.
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if bound == float('inf'):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = bound if bound != float('inf') else lower
+        return lower
+
+    def snapshot(self) -> Dict:
+        result = {}
+        for key, counts, total, count in self._copy():
+            result[','.join(key) or 'total'] = {
+                'count': count,
+                'mean': total / count if count else 0.0,
+                'p50': self._quantile(counts, count, 0.5),
+                'p95': self._quantile(counts, count, 0.95),
+                'p99': self._quantile(counts, count, 0.99)
+            }
+        return result
+
+
+class Gauge:
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], object], labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def _read(self) -> List[Tuple[Tuple, float]]:
+        # Gauges are sampled at scrape time so the hot paths pay nothing for them.
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            return [((str(label),), float(v)) for label, v in sorted(value.items())
+                    if isinstance(v, (int, float))]
+        return [((), float(value))] if isinstance(value, (int, float)) else []
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in self._read()]
+
+    def snapshot(self) -> Dict:
+        return {','.join(key) or 'value': value for key, value in self._read()}
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = 'aura_'):
+        self.prefix = prefix
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric):
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self.prefix + name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, callback: Callable[[], object],
+              labelnames: Iterable[str] = ()) -> Gauge:
+        gauge = Gauge(self.prefix + name, help_text, callback, labelnames)
+        with self.lock:
+            self.metrics[gauge.name] = gauge
+        return gauge
+
+    def render_prometheus(self) -> str:
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda m: m.name)
+        return {metric.name[len(self.prefix):]: {'type': metric.kind, 'values': metric.snapshot()}
+                for metric in metrics}
+
+
+registry = MetricsRegistry()
+
+# Shared instruments; modules import these rather than creating their own names.
+stage_seconds = registry.histogram('stage_seconds', "Time spent in each processing stage", ['stage'])
+frames_total = registry.counter('frames_total', "Camera frames by outcome", ['outcome'])
+alerts_total = registry.counter('alerts_total', "Alerts dispatched by priority", ['priority'])
+errors_total = registry.counter('errors_total', "Errors by component", ['component'])
+loop_lag_seconds = registry.histogram('event_loop_lag_seconds', "How late the Socket.IO event loop ran a scheduled wakeup")
+stream_frames_total = registry.counter('stream_frames_total', "Frames per camera by scheduler outcome", ['camera', 'outcome'])
+stream_latency_seconds = registry.histogram('stream_latency_seconds', "Capture to handled latency per camera", ['camera'])
+ingest_frames_total = registry.counter('ingest_frames_total', "Frames uploaded by clients by outcome", ['outcome'])
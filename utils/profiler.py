@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+from utils.metrics import stage_seconds
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self.sample_count = 0
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        self.samples.clear()
+        self.sample_count = 0
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[';'.join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def write_collapsed(self, path: str):
+        # One "frame;frame;frame count" line per stack, the input flamegraph.pl and speedscope expect.
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(self, max_events: int = 200000):
+        self.enabled = False
+        self.max_events = max_events
+        self.events = []
+        self.origin = time.perf_counter()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def start(self, max_events: Optional[int] = None):
+        with self.lock:
+            self.events = []
+            self.max_events = max_events or self.max_events
+            self.origin = time.perf_counter()
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def set_frame(self, sequence: int):
+        self.local.frame = sequence
+
+    def span(self, name: str, **args):
+        # Disabled tracing costs one attribute check and returns a shared no-op.
+        if not self.enabled:
+            return NULL_SPAN
+        return self._span(name, args)
+
+    @contextmanager
+    def _span(self, name: str, args: Dict):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            frame = getattr(self.local, 'frame', None)
+            if frame is not None:
+                args['frame'] = frame
+            event = {
+                'name': name,
+                'ph': 'X',
+                'ts': (start - self.origin) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args
+            }
+            with self.lock:
+                if len(self.events) < self.max_events:
+                    self.events.append(event)
+
+    def write(self, path: str):
+        with self.lock:
+            events = list(self.events)
+        names = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': t.ident, 'args': {'name': t.name}}
+                 for t in threading.enumerate()]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': names + events, 'displayTimeUnit': 'ms'}, f)
+
+
+tracer = Tracer()
+
+
+@contextmanager
+def timed_stage(name: str, **args):
+    with stage_seconds.time(stage=name), tracer.span(name, **args):
+        yield
+
+
+class ProfilingSession:
+    def __init__(self, config: dict):
+        profiling_config = config.get('profiling', {})
+        self.output_dir = profiling_config.get('output_dir', 'logs/profiles')
+        self.max_duration = profiling_config.get('max_duration_seconds', 120)
+        self.default_interval = profiling_config.get('sample_interval_ms', 5) / 1000.0
+        self.max_trace_events = profiling_config.get('max_trace_events', 200000)
+        self.profiler = None
+        self.timer = None
+        self.started_at = None
+        self.duration = 0
+        self.last_outputs = []
+        self.lock = threading.Lock()
+
+    def start(self, duration: float, sample_interval: Optional[float] = None,
+              sample: bool = True, trace: bool = True) -> Dict:
+        with self.lock:
+            if self.started_at is not None:
+                raise RuntimeError("A profiling window is already running")
+            self.duration = max(1.0, min(float(duration), self.max_duration))
+            self.started_at = time.time()
+            if sample:
+                self.profiler = SamplingProfiler(sample_interval or self.default_interval)
+                self.profiler.start()
+            if trace:
+                tracer.start(self.max_trace_events)
+            self.timer = threading.Timer(self.duration, self.stop)
+            self.timer.daemon = True
+            self.timer.start()
+        return self.status()
+
+    def stop(self) -> Dict:
+        with self.lock:
+            if self.started_at is None:
+                return self.status()
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            outputs = []
+            if self.profiler is not None:
+                self.profiler.stop()
+                path = os.path.join(self.output_dir, f"profile_{stamp}.collapsed")
+                self.profiler.write_collapsed(path)
+                outputs.append(os.path.basename(path))
+                self.profiler = None
+            if tracer.enabled:
+                tracer.stop()
+                path = os.path.join(self.output_dir, f"trace_{stamp}.json")
+                tracer.write(path)
+                outputs.append(os.path.basename(path))
+
+            self.started_at = None
+            self.last_outputs = outputs
+        return self.status()
+
+    def status(self) -> Dict:
+        # The Timer-driven stop() can clear started_at at any moment.
+        with self.lock:
+            started_at = self.started_at
+            duration = self.duration
+            sampling = self.profiler is not None
+            last_outputs = list(self.last_outputs)
+        running = started_at is not None
+        files = sorted(os.listdir(self.output_dir)) if os.path.isdir(self.output_dir) else []
+        return {
+            'running': running,
+            'remaining_seconds': round(started_at + duration - time.time(), 1) if running else 0,
+            'sampling': sampling,
+            'tracing': tracer.enabled,
+            'last_outputs': last_outputs,
+            'files': files
+        }
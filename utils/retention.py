@@ -0,0 +1,169 @@
+import os
+import gzip
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from utils.export import export_ndjson
+
+
+class RetentionManager:
+    def __init__(self, database, config: dict):
+        self.database = database
+        retention_config = config.get('retention', {})
+        self.enabled = retention_config.get('enabled', True)
+        self.keep_events_days = retention_config.get('keep_events_days', 30)
+        self.keep_critical_days = retention_config.get('keep_critical_days', 180)
+        self.keep_sessions_days = retention_config.get('keep_sessions_days', 365)
+        self.interval = retention_config.get('run_interval_hours', 6) * 3600
+        self.batch_size = retention_config.get('batch_size', 500)
+        self.batch_pause = retention_config.get('batch_pause_seconds', 0.05)
+        self.vacuum_pages = retention_config.get('vacuum_pages_per_step', 256)
+        self.allow_full_vacuum = retention_config.get('allow_full_vacuum', False)
+        self.archive_dir = retention_config.get('archive_dir', 'database/archive') \
+            if retention_config.get('archive', True) else None
+        self.vacuum_warned = False
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_run = None
+        self.totals = {'runs': 0, 'events_deleted': 0, 'sessions_deleted': 0, 'archived': 0, 'reclaimed_bytes': 0}
+
+    def start(self):
+        if not self.enabled or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run_loop, name='retention', daemon=True)
+        self.thread.start()
+
+    def _run_loop(self):
+        # Let startup settle before the first pass.
+        while not self.stop_event.wait(60 if self.last_run is None else self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Retention error: {e}")
+
+    def run_once(self) -> Dict:
+        if not self.lock.acquire(blocking=False):
+            return {'skipped': 'already running'}
+        try:
+            return self._run()
+        finally:
+            self.lock.release()
+
+    def _run(self) -> Dict:
+        started = time.time()
+        size_before = self.database.storage_stats()
+        now = datetime.utcnow()
+        report = {'events_deleted': 0, 'sessions_deleted': 0, 'archived': 0}
+
+        if self.keep_events_days is not None:
+            cutoff = (now - timedelta(days=self.keep_events_days)).strftime('%Y-%m-%d %H:%M:%S')
+            self._expire_events(cutoff, critical=False, report=report)
+        if self.keep_critical_days is not None:
+            cutoff = (now - timedelta(days=self.keep_critical_days)).strftime('%Y-%m-%d %H:%M:%S')
+            self._expire_events(cutoff, critical=True, report=report)
+        if self.keep_sessions_days is not None:
+            # Session times are stored as local ISO strings.
+            cutoff = (datetime.now() - timedelta(days=self.keep_sessions_days)).isoformat()
+            self._expire_sessions(cutoff, report)
+
+        self._compact()
+        self.database.checkpoint_wal()
+
+        size_after = self.database.storage_stats()
+        reclaimed = (size_before['file_bytes'] + size_before['wal_bytes']) - \
+                    (size_after['file_bytes'] + size_after['wal_bytes'])
+        report.update({
+            'reclaimed_bytes': max(0, reclaimed),
+            'size_before': size_before,
+            'size_after': size_after,
+            'duration_seconds': round(time.time() - started, 2),
+            'finished_at': datetime.now().isoformat()
+        })
+
+        self.totals['runs'] += 1
+        self.totals['events_deleted'] += report['events_deleted']
+        self.totals['sessions_deleted'] += report['sessions_deleted']
+        self.totals['archived'] += report['archived']
+        self.totals['reclaimed_bytes'] += report['reclaimed_bytes']
+        self.last_run = report
+        return report
+
+    def _expire_events(self, cutoff: str, critical: bool, report: Dict):
+        # Small transactions with a pause between them keep the live log writer's
+        # waits on the write lock short.
+        while not self.stop_event.is_set():
+            rows = self.database.select_expired_events(cutoff, critical, self.batch_size)
+            if not rows:
+                return
+            if self.archive_dir:
+                report['archived'] += self._archive('event_logs', rows, 'timestamp')
+            report['events_deleted'] += self.database.delete_event_logs([row['id'] for row in rows])
+            if len(rows) < self.batch_size:
+                return
+            time.sleep(self.batch_pause)
+
+    def _expire_sessions(self, cutoff: str, report: Dict):
+        while not self.stop_event.is_set():
+            rows = self.database.select_expired_sessions(cutoff, self.batch_size)
+            if not rows:
+                return
+            if self.archive_dir:
+                self._archive('sessions', rows, 'start_time')
+            report['sessions_deleted'] += self.database.delete_sessions([row['session_id'] for row in rows])
+            if len(rows) < self.batch_size:
+                return
+            time.sleep(self.batch_pause)
+
+    def _archive(self, table: str, rows: List[Dict], time_column: str) -> int:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(str(row.get(time_column) or 'unknown')[:7], []).append(row)
+
+        for month, month_rows in by_month.items():
+            # Appending writes another gzip member; readers see one continuous stream.
+            path = os.path.join(self.archive_dir, f"{table}_{month}.ndjson.gz")
+            with gzip.open(path, 'at', encoding='utf-8') as f:
+                f.writelines(export_ndjson(month_rows))
+        return len(rows)
+
+    def _compact(self):
+        if self.database.auto_vacuum_mode() != 2:
+            # A full VACUUM holds the write lock for the whole rebuild, so it only runs
+            # when asked for, ideally while no session is recording.
+            if not self.allow_full_vacuum:
+                if not self.vacuum_warned:
+                    print("Retention: database predates incremental vacuum; freed pages are reused but "
+                          "the file will not shrink until retention.allow_full_vacuum is enabled once")
+                    self.vacuum_warned = True
+                return
+            print("Retention: rebuilding database once to enable incremental vacuum")
+            self.database.enable_incremental_vacuum()
+            return
+
+        while not self.stop_event.is_set():
+            if self.database.incremental_vacuum(self.vacuum_pages) <= 0:
+                return
+            time.sleep(self.batch_pause)
+
+    def get_report(self) -> Dict:
+        return {
+            'storage': self.database.storage_stats(),
+            'policy': {
+                'keep_events_days': self.keep_events_days,
+                'keep_critical_days': self.keep_critical_days,
+                'keep_sessions_days': self.keep_sessions_days,
+                'archive_dir': self.archive_dir
+            },
+            'totals': dict(self.totals),
+            'last_run': self.last_run
+        }
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
@@ -0,0 +1,124 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+
+class Subsystem:
+    def __init__(self, name: str, factory: Callable[[], object], depends_on: Iterable[str] = (),
+                 required: bool = False):
+        self.name = name
+        self.factory = factory
+        self.depends_on = tuple(depends_on)
+        self.required = required
+        self.state = 'pending'
+        self.instance = None
+        self.error = None
+        self.started_at = None
+        self.load_seconds = None
+        self.ready_event = threading.Event()
+
+
+class SubsystemLoader:
+    def __init__(self, max_workers: int = 4):
+        self.subsystems = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='subsystem-loader')
+        self.started = False
+
+    def register(self, name: str, factory: Callable[[], object], depends_on: Iterable[str] = (),
+                 required: bool = False):
+        self.subsystems[name] = Subsystem(name, factory, depends_on, required)
+
+    def add_listener(self, callback: Callable[[str, object], None]):
+        self.listeners.append(callback)
+
+    def start(self):
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+            ready = [s for s in self.subsystems.values() if not s.depends_on]
+            for subsystem in ready:
+                subsystem.state = 'loading'
+        for subsystem in ready:
+            self.executor.submit(self._load, subsystem)
+
+    def _load(self, subsystem: Subsystem):
+        subsystem.started_at = time.time()
+        try:
+            instance = subsystem.factory()
+        except Exception as e:
+            print(f"Subsystem {subsystem.name} failed to load: {e}")
+            self._finish(subsystem, None, str(e))
+            return
+        self._finish(subsystem, instance, None)
+
+    def _finish(self, subsystem: Subsystem, instance, error: Optional[str]):
+        with self.lock:
+            subsystem.instance = instance
+            subsystem.error = error
+            subsystem.state = 'failed' if error else 'ready'
+            if subsystem.started_at is not None:
+                subsystem.load_seconds = round(time.time() - subsystem.started_at, 3)
+            subsystem.ready_event.set()
+
+            # Release dependents whose dependencies have all settled.
+            runnable = []
+            failed = []
+            for other in self.subsystems.values():
+                if other.state != 'pending' or subsystem.name not in other.depends_on:
+                    continue
+                states = [self.subsystems[d].state for d in other.depends_on if d in self.subsystems]
+                if 'failed' in states:
+                    failed.append(other)
+                elif all(state == 'ready' for state in states):
+                    other.state = 'loading'
+                    runnable.append(other)
+
+        if not error:
+            for listener in self.listeners:
+                try:
+                    listener(subsystem.name, instance)
+                except Exception as e:
+                    print(f"Subsystem listener error for {subsystem.name}: {e}")
+
+        for other in failed:
+            self._finish(other, None, f"dependency {subsystem.name} failed")
+        for other in runnable:
+            self.executor.submit(self._load, other)
+
+    def get(self, name: str):
+        subsystem = self.subsystems.get(name)
+        return subsystem.instance if subsystem is not None else None
+
+    def is_ready(self, name: str) -> bool:
+        subsystem = self.subsystems.get(name)
+        return subsystem is not None and subsystem.state == 'ready'
+
+    def wait(self, name: str, timeout: Optional[float] = None):
+        subsystem = self.subsystems.get(name)
+        if subsystem is None:
+            return None
+        subsystem.ready_event.wait(timeout)
+        return subsystem.instance
+
+    def status(self) -> Dict:
+        with self.lock:
+            subsystems = {
+                name: {
+                    'state': s.state,
+                    'required': s.required,
+                    'load_seconds': s.load_seconds if s.load_seconds is not None else (
+                        round(time.time() - s.started_at, 3) if s.started_at else None),
+                    'error': s.error
+                }
+                for name, s in self.subsystems.items()
+            }
+        ready = all(s['state'] == 'ready' for s in subsystems.values() if s['required'])
+        settled = all(s['state'] in ('ready', 'failed') for s in subsystems.values())
+        return {'ready': ready, 'fully_loaded': settled, 'subsystems': subsystems}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)